@@ -3,6 +3,10 @@ ASGI config for aspersax_api project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The dashboard event stream (/api/dashboard/stream/) keeps one long-lived
+connection per client, so it should be served through this module with an
+ASGI server (e.g. uvicorn or daphne) rather than through WSGI.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
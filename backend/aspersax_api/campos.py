@@ -0,0 +1,165 @@
+"""
+Campos a pedido (?fields=) y relaciones expandibles (?expand=) en las lecturas.
+
+``?fields=id_jornada,fecha`` deja en la respuesta solo esos campos del
+objeto principal; ``?expand=robot,tanque,maleza`` incrusta esas relaciones
+como objetos completos y, si el parámetro está presente, las relaciones que
+no nombra se devuelven como su id. Sin ``?expand`` cada serializer conserva
+su representación de siempre.
+
+Los parámetros solo se aplican a GET y HEAD: en una escritura el serializer
+necesita todos sus campos para validar. Con OptimizarConsultaMixin la vista
+además ajusta la consulta a lo que se va a serializar: only() con las
+columnas de los campos pedidos, select_related para las relaciones
+incrustadas y prefetch_related solo si se pide una relación inversa.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+PARAMETRO_CAMPOS = 'fields'
+PARAMETRO_EXPANDIR = 'expand'
+
+
+def _lista(valor):
+    return {nombre.strip() for nombre in valor.split(',') if nombre.strip()}
+
+
+def campos_solicitados(request):
+    """
+    Nombres pedidos en ?fields=, o None si la petición no lo trae o no es una
+    lectura.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    valor = request.query_params.get(PARAMETRO_CAMPOS)
+    return _lista(valor) if valor is not None else None
+
+
+def expansion_solicitada(request):
+    """
+    Relaciones pedidas en ?expand=, o None si la petición no lo trae o no es
+    una lectura.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    valor = request.query_params.get(PARAMETRO_EXPANDIR)
+    return _lista(valor) if valor is not None else None
+
+
+def _campo_modelo(modelo, nombre):
+    """
+    Campo o relación inversa del modelo con ese nombre de atributo, o None.
+    """
+    try:
+        return modelo._meta.get_field(nombre)
+    except FieldDoesNotExist:
+        pass
+    for relacion in modelo._meta.related_objects:
+        if relacion.get_accessor_name() == nombre:
+            return relacion
+    return None
+
+
+class CamposDinamicosMixin:
+    """
+    Mixin para ModelSerializer. ``Meta.expandibles`` asocia cada relación
+    expandible con la clase que la representa completa; la relación sin
+    expandir se representa con su id.
+
+    ``fields`` solo se aplica al serializer principal; ``expand`` también a
+    los anidados, así ``?expand=maleza`` alcanza la maleza de cada detalle de
+    un reporte. Fuera de una petición se pueden indicar ``campos`` y
+    ``expandir`` al crear el serializer.
+    """
+    def __init__(self, *args, campos=None, expandir=None, **kwargs):
+        self._campos = set(campos) if campos is not None else None
+        self._expandir = set(expandir) if expandir is not None else None
+        super().__init__(*args, **kwargs)
+
+    def _es_principal(self):
+        padre = self.parent
+        return padre is None or (isinstance(padre, serializers.ListSerializer) and padre.parent is None)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+
+        expandir = self._expandir
+        if expandir is None:
+            expandir = expansion_solicitada(request)
+        if expandir is not None:
+            for nombre, clase in getattr(self.Meta, 'expandibles', {}).items():
+                if nombre not in fields:
+                    continue
+                if nombre in expandir:
+                    fields[nombre] = clase(read_only=True)
+                elif not isinstance(fields[nombre], serializers.RelatedField):
+                    fields[nombre] = serializers.PrimaryKeyRelatedField(read_only=True)
+
+        campos = self._campos
+        if campos is None and self._es_principal():
+            campos = campos_solicitados(request)
+        if campos is not None:
+            for nombre in list(fields):
+                if nombre not in campos:
+                    del fields[nombre]
+        return fields
+
+    def optimizar(self, queryset, columnas=()):
+        """
+        Ajusta ``queryset`` a los campos que este serializer va a leer.
+        ``columnas`` son campos adicionales que la vista necesita cargar
+        (por ejemplo el de la paginación por cursor). Si algún campo sale de
+        un método o propiedad del modelo no se usa only(), porque no se sabe
+        qué columnas lee.
+        """
+        modelo = queryset.model
+        cargar = {modelo._meta.pk.name}
+        cargar.update(nombre for nombre in columnas if _campo_modelo(modelo, nombre) is not None)
+        relacionados = []
+        prefetch = []
+        acotar = True
+
+        for campo in self.fields.values():
+            if campo.write_only:
+                continue
+            atributos = campo.source_attrs
+            campo_modelo = _campo_modelo(modelo, atributos[0]) if atributos else None
+            if campo_modelo is None:
+                acotar = False
+            elif campo_modelo.concrete and not campo_modelo.many_to_many:
+                cargar.add(campo_modelo.name)
+                # Una relación incrustada o un atributo de la relacionada necesita el join
+                if campo_modelo.is_relation and (isinstance(campo, serializers.BaseSerializer) or len(atributos) > 1):
+                    relacionados.append(campo_modelo.name)
+            else:
+                prefetch.append(atributos[0])
+
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if relacionados:
+            queryset = queryset.select_related(*relacionados)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        if acotar:
+            queryset = queryset.only(*cargar)
+        return queryset
+
+
+class OptimizarConsultaMixin:
+    """
+    Mixin para vistas genéricas cuyo serializer usa CamposDinamicosMixin: en
+    las lecturas la consulta trae solo lo que la respuesta va a incluir.
+    Actúa en filter_queryset, por donde pasan list() y get_object(), así que
+    también cubre las vistas que redefinen get_queryset.
+    """
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        serializer = self.get_serializer()
+        if not isinstance(serializer, CamposDinamicosMixin):
+            return queryset
+        # La paginación por cursor lee el campo de fecha de cada fila
+        campo_fecha = getattr(self.pagination_class, 'campo_fecha', None)
+        return serializer.optimizar(queryset, [campo_fecha] if campo_fecha else [])
@@ -0,0 +1,53 @@
+import hashlib
+from functools import wraps
+from django.utils import timezone
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+from .versiones import versiones
+
+
+def calcular_etag(request, temas):
+    """
+    ETag fuerte a partir de la ruta, los parámetros, el formato de respuesta,
+    el día actual (para rangos relativos como "últimos 7 días") y la versión
+    de cada tema del que dependen los datos.
+    """
+    formato = getattr(getattr(request, 'accepted_renderer', None), 'format', '')
+    partes = [
+        request.path,
+        '&'.join(sorted(f'{clave}={valor}' for clave, valor in request.GET.items())),
+        formato,
+        timezone.localdate().isoformat(),
+    ]
+    partes.extend(f'{tema}:{version}' for tema, version in zip(temas, versiones(*temas)))
+    return '"%s"' % hashlib.sha1('|'.join(partes).encode()).hexdigest()
+
+
+def condicional(*temas):
+    """
+    Decorador de GET condicional para vistas de DRF. Debe ir debajo de
+    @api_view para que la autenticación y los permisos se evalúen antes.
+    Si el cliente envía un If-None-Match vigente responde 304 sin ejecutar
+    la vista, de modo que ninguna consulta de agregación llega a la base.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return vista(request, *args, **kwargs)
+
+            etag = calcular_etag(request, temas)
+            recibidos = parse_etags(request.headers.get('If-None-Match', ''))
+            if etag in recibidos or '*' in recibidos:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                response = vista(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+
+            response['ETag'] = etag
+            response['Cache-Control'] = 'private, no-cache'
+            return response
+        return envoltura
+    return decorador
@@ -0,0 +1,76 @@
+"""
+Renderer y parser JSON con orjson.
+
+Son opcionales: para usarlos se reemplazan JSONRenderer y JSONParser de DRF
+en REST_FRAMEWORK (DEFAULT_RENDERER_CLASSES y DEFAULT_PARSER_CLASSES, ver el
+ejemplo en settings.py) o en renderer_classes/parser_classes de una vista.
+orjson codifica en C los dicts, listas, fechas, horas y datetimes (con Z para
+UTC, igual que el encoder de DRF); los demás tipos (timedelta, Decimal, UUID,
+cadenas perezosas, arrays de numpy) pasan por el mismo encoder de DRF, así que
+un DurationField crudo sigue saliendo como total de segundos.
+
+El resultado no es idéntico byte a byte al de DRF en dos casos:
+
+- Los floats muy chicos o muy grandes se escriben sin exponente o con otro
+  formato de exponente: orjson escribe 0.00001 y 1e16 donde DRF escribe
+  1e-05 y 1e+16. El valor es el mismo, pero una vista con estas clases y
+  otra con las de DRF (o con json_compacto de robots/flota.py) escriben
+  distinto el mismo campo.
+- NaN e infinitos se escriben como null. JSONRenderer de DRF, con
+  STRICT_JSON (el valor por defecto), lanza ValueError en ese caso.
+
+Si orjson no está instalado, o la respuesta pide sangría (la API navegable),
+o el valor no se puede codificar (por ejemplo un entero de más de 64 bits),
+ambas clases se comportan exactamente como las de DRF.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    OPCIONES = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+    # Tipos que orjson no conoce: mismas conversiones que el encoder de DRF
+    _codificar = JSONEncoder().default
+
+
+def disponible():
+    return orjson is not None
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or not self.compact or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_codificar, option=OPCIONES)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Igual que DRF: \u2028 y \u2029 escapados para que sea JavaScript válido
+        if b'\xe2\x80' in ret:
+            ret = ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+        return ret
+
+
+class JSONRapidoParser(JSONParser):
+    renderer_class = JSONRapidoRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        # orjson solo lee UTF-8 y siempre rechaza NaN e infinitos, como STRICT_JSON
+        if orjson is None or encoding.lower().replace('_', '-') != 'utf-8' or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
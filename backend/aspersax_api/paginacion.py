@@ -0,0 +1,111 @@
+"""
+Paginación por cursor (keyset) sobre (fecha, pk).
+
+A diferencia de PageNumberPagination no ejecuta COUNT(*) ni OFFSET: cada
+página filtra a partir de la última fila entregada, así que el costo es el
+mismo en la primera página que en la número mil, siempre que exista un
+índice compuesto (fecha, pk) en la tabla.
+"""
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, Cursor, PageNumberPagination
+
+
+class PaginacionPorFecha(CursorPagination):
+    """
+    Ordena de más reciente a más antiguo por ``campo_fecha`` y desempata por pk.
+    El cursor guarda ambos valores de la fila límite, por lo que nunca hace
+    falta un desplazamiento dentro de fechas repetidas.
+
+    Si la petición trae ``?page=`` se usa la paginación por número de página
+    (con total de resultados), que es la que necesita la interfaz de
+    administración.
+    """
+    campo_fecha = 'fecha'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    paginas_class = PageNumberPagination
+
+    def __init__(self):
+        self.paginas = None
+
+    def _por_paginas(self, request):
+        return self.paginas_class.page_query_param in request.query_params
+
+    def _orden(self, inverso=False):
+        if inverso:
+            return (self.campo_fecha, 'pk')
+        return (f'-{self.campo_fecha}', '-pk')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self._por_paginas(request):
+            self.paginas = self.paginas_class()
+            return self.paginas.paginate_queryset(queryset.order_by(*self._orden()), request, view)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        inverso = bool(self.cursor and self.cursor.reverse)
+
+        if self.cursor and self.cursor.position:
+            queryset = self._filtrar_cursor(queryset, self.cursor.position, inverso)
+
+        resultados = list(queryset.order_by(*self._orden(inverso))[:self.page_size + 1])
+        self.page = resultados[:self.page_size]
+        hay_mas = len(resultados) > self.page_size
+
+        if inverso:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = hay_mas
+        else:
+            self.has_next = hay_mas
+            self.has_previous = self.cursor is not None
+
+        if self.page:
+            self.next_position = self._posicion(self.page[-1])
+            self.previous_position = self._posicion(self.page[0])
+        else:
+            # Página vacía: los enlaces vuelven al punto de partida del cursor
+            posicion = self.cursor.position if self.cursor else None
+            self.next_position = self.previous_position = posicion
+        return self.page
+
+    def _posicion(self, instancia):
+        if isinstance(instancia, dict):
+            # Fila de values() de aspersax_api.lectura
+            return f"{instancia[self.campo_fecha].isoformat()}|{instancia['pk']}"
+        fecha = getattr(instancia, self.campo_fecha)
+        return f'{fecha.isoformat()}|{instancia.pk}'
+
+    def _filtrar_cursor(self, queryset, posicion, inverso):
+        # (fecha, pk) < (fecha_cursor, pk_cursor), o > al retroceder
+        fecha, _, pk = posicion.rpartition('|')
+        operador = 'gt' if inverso else 'lt'
+        try:
+            return queryset.filter(
+                Q(**{f'{self.campo_fecha}__{operador}': fecha})
+                | Q(**{self.campo_fecha: fecha, f'pk__{operador}': int(pk)})
+            )
+        except (ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self.next_position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self.previous_position))
+
+    def get_paginated_response(self, data):
+        if self.paginas is not None:
+            return self.paginas.get_paginated_response(data)
+        return super().get_paginated_response(data)
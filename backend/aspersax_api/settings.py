@@ -72,6 +72,15 @@ DATABASES = {
     }
 }
 
+# Caché compartida: guarda los contadores de versión usados por los ETags.
+# Con varios procesos debe apuntar a un backend compartido (Redis, Memcached)
+# para que todos vean las mismas versiones.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 CORS_ALLOW_ALL_ORIGINS = True  # Solo para desarrollo
 CORS_ALLOW_CREDENTIALS = True
 
@@ -84,8 +93,35 @@ REST_FRAMEWORK = {
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # JSON con orjson (aspersax_api/json_rapido.py), opcional. Cambia el
+    # formato de algunos floats y escribe NaN como null; ver el módulo.
+    # 'DEFAULT_RENDERER_CLASSES': (
+    #     'aspersax_api.json_rapido.JSONRapidoRenderer',
+    #     'rest_framework.renderers.BrowsableAPIRenderer',
+    # ),
+    # 'DEFAULT_PARSER_CLASSES': (
+    #     'aspersax_api.json_rapido.JSONRapidoParser',
+    #     'rest_framework.parsers.FormParser',
+    #     'rest_framework.parsers.MultiPartParser',
+    # ),
 }
 
+# Hilos para calcular en paralelo las secciones de /api/dashboard/overview/
+DASHBOARD_OVERVIEW_WORKERS = 4
+
+# Publicar en CACHES la instantánea de la flota (robots/flota.py) para que
+# los demás procesos no tengan que reconstruirla desde la base de datos
+FLOTA_INSTANTANEA_COMPARTIDA = True
+
+# Segundos entre volcados del buffer de latidos de robots (robots/latidos.py).
+# Con 0 no se inicia el hilo y hay que llamar a buffer_latidos.vaciar()
+LATIDOS_INTERVALO = 5
+
+# Telemetría de robots: días que se conservan las muestras crudas y los
+# agregados por minuto (los agregados por hora no se depuran)
+TELEMETRIA_RETENCION_DIAS = 7
+TELEMETRIA_RETENCION_MINUTOS_DIAS = 90
+
 # JWT Settings
 from datetime import timedelta
 SIMPLE_JWT = {
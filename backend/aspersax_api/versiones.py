@@ -0,0 +1,83 @@
+"""
+Contadores de versión por tema de datos, guardados en la caché de Django.
+
+Cada escritura confirmada sobre un modelo vigilado incrementa el contador de
+su tema. Las vistas usan estas versiones para construir ETags y los cachés en
+memoria para saber cuándo invalidarse. Las operaciones masivas que no disparan
+señales (bulk_create, update) deben llamar a ``incrementar`` explícitamente.
+"""
+import time
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal
+
+# Tema al que pertenece cada modelo vigilado
+TEMAS = {
+    'robots.Robot': 'robots',
+    'tanques.Tanque': 'tanques',
+    'malezas.Maleza': 'malezas',
+    'reportes.Reporte': 'reportes',
+    'reportes.DetalleMaleza': 'reportes',
+}
+
+# Se envía con ``temas`` cada vez que se incrementa alguna versión
+datos_cambiados = Signal()
+
+
+def _clave(tema):
+    return f'version:{tema}'
+
+
+def _semilla():
+    # Si la caché se vacía o el proceso reinicia, los contadores continúan desde
+    # un valor nuevo para no repetir ETags ya entregados.
+    return int(time.time() * 1000)
+
+
+def versiones(*temas):
+    """
+    Devuelve la versión actual de cada tema, en el mismo orden.
+    """
+    actuales = cache.get_many([_clave(tema) for tema in temas])
+    resultado = []
+    for tema in temas:
+        clave = _clave(tema)
+        if clave not in actuales:
+            cache.add(clave, _semilla(), timeout=None)
+            actuales[clave] = cache.get(clave)
+        resultado.append(actuales[clave])
+    return tuple(resultado)
+
+
+def incrementar(*temas):
+    """
+    Incrementa la versión de los temas indicados y avisa a los interesados.
+    """
+    for tema in temas:
+        clave = _clave(tema)
+        try:
+            cache.incr(clave)
+        except ValueError:
+            cache.add(clave, _semilla(), timeout=None)
+    datos_cambiados.send(sender=None, temas=temas)
+
+
+def incrementar_al_confirmar(*temas):
+    """
+    Incrementa las versiones cuando la transacción actual se confirme, para que
+    nadie asocie una versión nueva a datos que aún no son visibles.
+    """
+    transaction.on_commit(lambda: incrementar(*temas))
+
+
+def _registrar_escritura(sender, raw=False, **kwargs):
+    if raw:
+        return
+    incrementar_al_confirmar(TEMAS[sender._meta.label])
+
+
+def conectar_senales():
+    for modelo in TEMAS:
+        post_save.connect(_registrar_escritura, sender=modelo, dispatch_uid=f'version_save_{modelo}')
+        post_delete.connect(_registrar_escritura, sender=modelo, dispatch_uid=f'version_delete_{modelo}')
@@ -0,0 +1,202 @@
+import json
+import logging
+import threading
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from aspersax_api.versiones import versiones
+from reportes.rollup import a_fecha
+from .kpis import calcular_kpis, estado_robots, estado_tanques
+from .notificador import notificador
+
+logger = logging.getLogger(__name__)
+
+# Segundos sin cambios tras los que se envía un comentario para mantener viva la conexión
+INTERVALO_KEEPALIVE = 15
+
+# Segundos de validez de un ticket para abrir el flujo; cada ticket sirve una sola vez
+VIGENCIA_TICKET = 30
+SAL_TICKET = 'dashboard.stream'
+
+# Temas de los que depende una instantánea del tablero
+TEMAS_TABLERO = ('robots', 'tanques', 'malezas', 'reportes')
+
+# Instantáneas recientes compartidas entre los clientes conectados
+MAX_INSTANTANEAS = 32
+_instantaneas = {}
+_instantaneas_lock = threading.Lock()
+
+
+def _instantanea(temas, start_date=None, end_date=None):
+    """
+    Calcula las secciones del tablero afectadas por los temas indicados.
+    Cualquier cambio puede mover los indicadores, así que siempre se incluyen.
+    """
+    datos = {'kpis': calcular_kpis(start_date, end_date)}
+    if 'robots' in temas:
+        datos['robots'] = {robot['id']: robot for robot in estado_robots()}
+    if 'tanques' in temas:
+        datos['tanques'] = {tanque['id_tanque']: tanque for tanque in estado_tanques()}
+    return datos
+
+
+def _instantanea_compartida(temas, start_date=None, end_date=None):
+    """
+    Igual que _instantanea, pero calculada una sola vez por versión de los
+    datos: cuando un cambio avisa a todos los clientes, los que miran el mismo
+    rango de fechas reciben el mismo resultado sin repetir calcular_kpis.
+    """
+    clave = (frozenset(temas), versiones(*TEMAS_TABLERO), start_date, end_date)
+    with _instantaneas_lock:
+        datos = _instantaneas.get(clave)
+    if datos is None:
+        datos = _instantanea(temas, start_date, end_date)
+        with _instantaneas_lock:
+            if len(_instantaneas) >= MAX_INSTANTANEAS:
+                # Los dicts conservan el orden de inserción: se descarta la más antigua
+                del _instantaneas[next(iter(_instantaneas))]
+            _instantaneas[clave] = datos
+    # Cada flujo modifica su propio estado; las secciones se copian
+    return {seccion: dict(valores) for seccion, valores in datos.items()}
+
+
+def invalidar_instantaneas():
+    with _instantaneas_lock:
+        _instantaneas.clear()
+
+
+def _diferencias(anterior, actual):
+    """
+    Compara dos instantáneas y devuelve solo lo que cambió.
+    """
+    delta = {}
+    kpis = {
+        clave: valor for clave, valor in actual['kpis'].items()
+        if anterior['kpis'].get(clave) != valor
+    }
+    if kpis:
+        delta['kpis'] = kpis
+
+    for seccion in ('robots', 'tanques'):
+        if seccion not in actual:
+            continue
+        previos, nuevos = anterior[seccion], actual[seccion]
+        actualizados = [fila for pk, fila in nuevos.items() if previos.get(pk) != fila]
+        eliminados = [pk for pk in previos if pk not in nuevos]
+        if actualizados or eliminados:
+            delta[seccion] = {'actualizados': actualizados, 'eliminados': eliminados}
+    return delta
+
+
+def _evento(nombre, datos):
+    return f'event: {nombre}\ndata: {json.dumps(datos, cls=DjangoJSONEncoder)}\n\n'
+
+
+async def flujo_eventos(suscripcion, start_date=None, end_date=None, keepalive=INTERVALO_KEEPALIVE):
+    """
+    Genera el flujo SSE: una instantánea completa al conectar y luego solo
+    las diferencias cuando el notificador avisa de cambios.
+    """
+    estado = await sync_to_async(_instantanea_compartida)({'robots', 'tanques'}, start_date, end_date)
+    yield _evento('snapshot', {
+        'kpis': estado['kpis'],
+        'robots': list(estado['robots'].values()),
+        'tanques': list(estado['tanques'].values()),
+    })
+
+    while True:
+        temas = await suscripcion.esperar(keepalive)
+        if not temas:
+            yield ': keepalive\n\n'
+            continue
+
+        nuevo = await sync_to_async(_instantanea_compartida)(temas, start_date, end_date)
+        delta = _diferencias(estado, nuevo)
+        estado.update(nuevo)
+        if delta:
+            yield _evento('delta', delta)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def ticket_stream(request):
+    """
+    Entrega un ticket de corta duración para abrir el flujo de eventos.
+    EventSource no permite enviar encabezados, así que el cliente pasa el
+    ticket en ?ticket= en lugar del JWT: lo que quede en los registros de
+    acceso vence en segundos y no se puede reutilizar.
+    """
+    ticket = signing.TimestampSigner(salt=SAL_TICKET).sign(str(request.user.pk))
+    return Response({'ticket': ticket, 'vigencia': VIGENCIA_TICKET})
+
+
+def _usuario_ticket(ticket):
+    try:
+        pk = signing.TimestampSigner(salt=SAL_TICKET).unsign(ticket, max_age=VIGENCIA_TICKET)
+    except signing.BadSignature:
+        return None
+    # Un ticket se consume al usarlo: cache.add falla si ya estaba registrado
+    if not cache.add(f'ticket_stream:{ticket}', True, timeout=VIGENCIA_TICKET):
+        return None
+    return get_user_model().objects.filter(pk=pk).first()
+
+
+def _autenticar(request):
+    """
+    Autentica con el JWT del encabezado Authorization o con un ticket de
+    ticket_stream en ?ticket=.
+    """
+    autenticacion = JWTAuthentication()
+    header = autenticacion.get_header(request)
+    if header is None:
+        ticket = request.GET.get('ticket')
+        return _usuario_ticket(ticket) if ticket else None
+    crudo = autenticacion.get_raw_token(header)
+    if not crudo:
+        return None
+    try:
+        return autenticacion.get_user(autenticacion.get_validated_token(crudo))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+
+async def stream_eventos(request):
+    """
+    Flujo de eventos del tablero (Server-Sent Events). Debe servirse con un
+    servidor ASGI (aspersax_api.asgi) para mantener la conexión abierta sin
+    ocupar un hilo por cliente.
+    """
+    usuario = await sync_to_async(_autenticar)(request)
+    if usuario is None or not usuario.is_active:
+        return JsonResponse({'detail': 'Las credenciales de autenticación no se proveyeron.'}, status=401)
+
+    start_date = request.GET.get('start_date')
+    end_date = request.GET.get('end_date')
+    try:
+        a_fecha(start_date)
+        a_fecha(end_date)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    async def flujo():
+        suscripcion = notificador.suscribir()
+        logger.info(f'Cliente SSE conectado ({notificador.total_suscriptores} activos)')
+        try:
+            async for evento in flujo_eventos(suscripcion, start_date, end_date):
+                yield evento
+        finally:
+            notificador.cancelar(suscripcion)
+
+    response = StreamingHttpResponse(flujo(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
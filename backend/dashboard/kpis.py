@@ -0,0 +1,277 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import CharField, Count, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Cast, TruncHour, TruncMonth, TruncWeek
+from django.utils import timezone
+from datetime import datetime, time, timedelta
+from robots.flota import flota
+from robots.models import Robot
+from tanques.models import Tanque
+from malezas.models import Maleza
+from reportes.models import Reporte, ReporteDiario, MalezaDiaria
+from reportes.rollup import a_fecha, rango_dia
+
+# Estados de tanque que se consideran "en uso" en el tablero
+ESTADOS_TANQUE_EN_USO = ['Lleno', 'Medio', 'Bajo']
+
+
+def _rama(queryset, clave, total, parcial=None):
+    """
+    Agrega un queryset a una sola fila (clave, total, parcial) sin GROUP BY,
+    lista para combinarse con UNION ALL.
+    """
+    if parcial is None:
+        parcial = Value(0.0, output_field=FloatField())
+    else:
+        parcial = Cast(parcial, FloatField())
+
+    return queryset.order_by().annotate(
+        clave=Value(clave, output_field=CharField())
+    ).values('clave').annotate(
+        total=Cast(total, FloatField()),
+        parcial=parcial,
+    )
+
+
+def calcular_kpis(start_date=None, end_date=None):
+    """
+    Calcula el resumen de indicadores del tablero en una sola consulta.
+
+    Cada tabla se agrega con conteos condicionales (Count con filter) y las
+    filas resultantes se combinan con UNION ALL, de modo que toda la carga
+    se resuelve en un único viaje a la base de datos. Los totales de
+    reportes se leen del resumen diario en lugar de recorrer T005/T006.
+    """
+    resumen = ReporteDiario.objects.all()
+    if start_date and end_date:
+        resumen = resumen.filter(fecha__range=[a_fecha(start_date), a_fecha(end_date)])
+
+    consulta = _rama(
+        Robot.objects.filter(activo=True), 'robots',
+        Count('pk'), Count('pk', filter=Q(estado='Activo')),
+    ).union(
+        _rama(
+            Tanque.objects.filter(activo=True), 'tanques',
+            Count('pk'), Count('pk', filter=Q(estado__in=ESTADOS_TANQUE_EN_USO)),
+        ),
+        _rama(Maleza.objects.filter(activo=True), 'malezas', Count('pk')),
+        _rama(resumen, 'reportes', Sum('area_cubierta'), Sum('herbicida_usado')),
+        _rama(resumen, 'detalles', Sum('malezas')),
+        all=True,
+    )
+
+    filas = {fila['clave']: fila for fila in consulta}
+
+    def valor(clave, campo):
+        fila = filas.get(clave)
+        return (fila[campo] if fila else None) or 0
+
+    return {
+        'total_robots': int(valor('robots', 'total')),
+        'robots_activos': int(valor('robots', 'parcial')),
+        'total_tanques': int(valor('tanques', 'total')),
+        'tanques_en_uso': int(valor('tanques', 'parcial')),
+        'total_malezas': int(valor('malezas', 'total')),
+        'malezas_detectadas': int(valor('detalles', 'total')),
+        'area_cubierta': valor('reportes', 'total'),
+        'herbicida_usado': valor('reportes', 'parcial'),
+    }
+
+
+# Granularidades de la serie de actividad y cuántos intervalos se permiten como máximo
+GRANULARIDADES = ('hour', 'day', 'week', 'month')
+MAX_INTERVALOS = 2000
+
+_TRUNCAR_RESUMEN = {
+    'day': F('fecha'),
+    'week': TruncWeek('fecha'),
+    'month': TruncMonth('fecha'),
+}
+
+
+def _intervalos(inicio, fin, granularidad):
+    """
+    Genera en orden el comienzo de cada intervalo entre dos fechas (inclusive).
+    """
+    if granularidad == 'hour':
+        actual = datetime.combine(inicio, time.min)
+        limite = datetime.combine(fin, time.max)
+        while actual <= limite:
+            yield timezone.make_aware(actual)
+            actual += timedelta(hours=1)
+        return
+
+    if granularidad == 'week':
+        actual = inicio - timedelta(days=inicio.weekday())
+    elif granularidad == 'month':
+        actual = inicio.replace(day=1)
+    else:
+        actual = inicio
+
+    while actual <= fin:
+        yield actual
+        if granularidad == 'day':
+            actual += timedelta(days=1)
+        elif granularidad == 'week':
+            actual += timedelta(weeks=1)
+        else:
+            actual = (actual + timedelta(days=32)).replace(day=1)
+
+
+def _formato_intervalo(inicio, granularidad):
+    return inicio.strftime('%Y-%m-%dT%H:00') if granularidad == 'hour' else inicio.strftime('%Y-%m-%d')
+
+
+def _contar_intervalos(inicio, fin, granularidad):
+    return {
+        'hour': ((fin - inicio).days + 1) * 24,
+        'day': (fin - inicio).days + 1,
+        'week': (fin - inicio).days // 7 + 1,
+        'month': (fin.year - inicio.year) * 12 + fin.month - inicio.month + 1,
+    }[granularidad]
+
+
+def actividad_resumen(start_date=None, end_date=None):
+    """
+    Serie de actividad para el resumen combinado: diaria, o semanal o mensual
+    si el rango tiene más de MAX_INTERVALOS días, para que un rango amplio no
+    haga fallar todo el resumen.
+    """
+    if start_date and end_date:
+        inicio, fin = a_fecha(start_date), a_fecha(end_date)
+        for granularidad in ('day', 'week', 'month'):
+            if _contar_intervalos(inicio, fin, granularidad) <= MAX_INTERVALOS:
+                return serie_actividad(start_date, end_date, granularidad)
+    return serie_actividad(start_date, end_date)
+
+
+def serie_actividad(start_date=None, end_date=None, granularidad='day'):
+    """
+    Serie de robots distintos y malezas detectadas por hora, día, semana o mes.
+    Por defecto cubre los últimos 7 días.
+
+    La agrupación se hace en la base de datos con funciones Trunc (sobre el
+    resumen diario, o sobre T005/T006 para la granularidad por hora) y los
+    intervalos vacíos se rellenan con ceros en una sola pasada sobre las filas.
+    """
+    if granularidad not in GRANULARIDADES:
+        raise ValueError(f"Granularidad inválida. Use: {', '.join(GRANULARIDADES)}")
+
+    if not start_date:
+        end_date = timezone.now()
+        start_date = end_date - timedelta(days=7)
+    if not end_date:
+        end_date = timezone.now()
+    inicio, fin = a_fecha(start_date), a_fecha(end_date)
+
+    if _contar_intervalos(inicio, fin, granularidad) > MAX_INTERVALOS:
+        raise ValueError('El rango de fechas es demasiado amplio para la granularidad pedida')
+
+    if granularidad == 'hour':
+        filas = Reporte.objects.filter(
+            activo=True,
+            fecha__gte=rango_dia(inicio)[0],
+            fecha__lt=rango_dia(fin)[1],
+        ).annotate(intervalo=TruncHour('fecha')).values('intervalo').annotate(
+            robots=Count('robot', distinct=True),
+            malezas=Sum('detallemaleza__cantidad'),
+        )
+    else:
+        filas = ReporteDiario.objects.filter(
+            fecha__range=[inicio, fin]
+        ).annotate(intervalo=_TRUNCAR_RESUMEN[granularidad]).values('intervalo').annotate(
+            robots=Count('robot', distinct=True),
+            malezas=Sum('malezas'),
+        )
+    filas = filas.order_by('intervalo').values_list('intervalo', 'robots', 'malezas').iterator()
+
+    serie = []
+    fila = next(filas, None)
+    for intervalo in _intervalos(inicio, fin, granularidad):
+        if fila is not None and fila[0] == intervalo:
+            _, robots, malezas = fila
+            fila = next(filas, None)
+        else:
+            robots, malezas = 0, 0
+        serie.append({
+            'fecha': _formato_intervalo(intervalo, granularidad),
+            'robots': robots,
+            'malezas': malezas or 0,
+        })
+    return serie
+
+
+def malezas_principales(limite=5):
+    """
+    Especies con más detecciones acumuladas en reportes activos.
+    """
+    return list(MalezaDiaria.objects.values('maleza__nombre').annotate(
+        total=Sum('cantidad')
+    ).order_by('-total')[:limite])
+
+
+def estado_robots():
+    """
+    Estado actual de los robots activos para el tablero, desde la caché de la flota.
+    """
+    return flota.estado()
+
+
+def estado_tanques():
+    """
+    Nivel actual de los tanques activos para el tablero.
+    """
+    return list(Tanque.objects.filter(activo=True).values(
+        'id_tanque', 'nombre', 'capacidad', 'nivel_actual', 'estado'
+    ).order_by('id_tanque'))
+
+
+# Secciones del resumen combinado; cada una recibe el rango de fechas
+SECCIONES = {
+    'stats': calcular_kpis,
+    'activity': actividad_resumen,
+    'robots': lambda start_date, end_date: estado_robots(),
+    'tanks': lambda start_date, end_date: estado_tanques(),
+    'weeds': lambda start_date, end_date: malezas_principales(),
+}
+
+_ejecutor = None
+_ejecutor_lock = threading.Lock()
+
+
+def _obtener_ejecutor():
+    global _ejecutor
+    with _ejecutor_lock:
+        if _ejecutor is None:
+            _ejecutor = ThreadPoolExecutor(
+                max_workers=settings.DASHBOARD_OVERVIEW_WORKERS,
+                thread_name_prefix='dashboard-overview',
+            )
+    return _ejecutor
+
+
+def _ejecutar_seccion(nombre, start_date, end_date):
+    # Cada hilo usa su propia conexión; se cierran las vencidas antes y después
+    close_old_connections()
+    try:
+        return SECCIONES[nombre](start_date, end_date)
+    finally:
+        close_old_connections()
+
+
+def calcular_secciones(nombres, start_date=None, end_date=None):
+    """
+    Calcula las secciones pedidas del tablero. Con más de un hilo configurado
+    las consultas independientes se ejecutan en paralelo en un pool acotado.
+    """
+    if settings.DASHBOARD_OVERVIEW_WORKERS <= 1 or len(nombres) <= 1:
+        return {nombre: SECCIONES[nombre](start_date, end_date) for nombre in nombres}
+
+    ejecutor = _obtener_ejecutor()
+    futuros = {
+        nombre: ejecutor.submit(_ejecutar_seccion, nombre, start_date, end_date)
+        for nombre in nombres
+    }
+    return {nombre: futuro.result() for nombre, futuro in futuros.items()}
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+
+
+class Suscripcion:
+    """
+    Cola de temas pendientes de un cliente. Los avisos repetidos se combinan
+    hasta que el cliente los consume, así una ráfaga de escrituras produce un
+    solo evento.
+    """
+    def __init__(self, loop):
+        self.loop = loop
+        self.pendientes = set()
+        self.aviso = asyncio.Event()
+
+    def _recibir(self, temas):
+        self.pendientes.update(temas)
+        self.aviso.set()
+
+    async def esperar(self, timeout=None):
+        """
+        Espera hasta que llegue algún tema o venza el timeout.
+        Devuelve el conjunto de temas recibidos (vacío si venció el tiempo).
+        """
+        try:
+            await asyncio.wait_for(self.aviso.wait(), timeout)
+        except asyncio.TimeoutError:
+            return set()
+        temas, self.pendientes = self.pendientes, set()
+        self.aviso.clear()
+        return temas
+
+
+class NotificadorCambios:
+    """
+    Difunde dentro del proceso los temas que cambiaron ('robots', 'tanques',
+    'malezas', 'reportes') a los flujos de eventos abiertos. Puede llamarse
+    desde cualquier hilo; la entrega ocurre en el event loop de cada suscriptor.
+    """
+    def __init__(self):
+        self._suscripciones = set()
+        self._lock = threading.Lock()
+
+    def suscribir(self):
+        suscripcion = Suscripcion(asyncio.get_running_loop())
+        with self._lock:
+            self._suscripciones.add(suscripcion)
+        return suscripcion
+
+    def cancelar(self, suscripcion):
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+    def notificar(self, *temas):
+        with self._lock:
+            suscripciones = list(self._suscripciones)
+        for suscripcion in suscripciones:
+            try:
+                suscripcion.loop.call_soon_threadsafe(suscripcion._recibir, temas)
+            except RuntimeError:
+                # El event loop del cliente ya se cerró
+                self.cancelar(suscripcion)
+
+    @property
+    def total_suscriptores(self):
+        return len(self._suscripciones)
+
+
+notificador = NotificadorCambios()
@@ -0,0 +1,12 @@
+from django.dispatch import receiver
+from aspersax_api.versiones import datos_cambiados, conectar_senales
+from .notificador import notificador
+
+# Las escrituras sobre Robot, Tanque, Maleza, Reporte y DetalleMaleza
+# incrementan la versión de su tema al confirmarse
+conectar_senales()
+
+
+@receiver(datos_cambiados)
+def avisar_cambio(sender, temas, **kwargs):
+    notificador.notificar(*temas)
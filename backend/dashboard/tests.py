@@ -0,0 +1,415 @@
+import json
+from datetime import datetime
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from aspersax_api import versiones
+from robots.flota import flota
+from robots.models import Robot
+from tanques.models import Tanque
+from malezas.models import Maleza
+from reportes.models import Reporte, DetalleMaleza
+from rest_framework_simplejwt.tokens import AccessToken
+from .eventos import flujo_eventos, invalidar_instantaneas
+from .kpis import calcular_kpis, serie_actividad
+from .notificador import notificador
+
+User = get_user_model()
+
+class KpiTests(APITestCase):
+    def setUp(self):
+        # TestCase no ejecuta on_commit: la versión de 'robots' no cambia entre pruebas
+        flota.invalidar()
+        # Crear usuario de prueba
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+
+        # Crear flota e inventario de prueba
+        self.robot = Robot.objects.create(nombre='Robot 1', estado='Activo')
+        Robot.objects.create(nombre='Robot 2', estado='Disponible')
+        Robot.objects.create(nombre='Robot 3', estado='Activo', activo=False)
+        self.tanque = Tanque.objects.create(nombre='Tanque 1', capacidad=100, nivel_actual=80, estado='Lleno')
+        Tanque.objects.create(nombre='Tanque 2', capacidad=100, estado='Vacío')
+        self.maleza = Maleza.objects.create(nombre='Maleza 1')
+        Maleza.objects.create(nombre='Maleza 2', activo=False)
+
+        # Crear reportes con detalles de malezas
+        reporte = Reporte.objects.create(robot=self.robot, tanque=self.tanque,
+                                         area_cubierta=10.5, herbicida_usado=2.0)
+        DetalleMaleza.objects.create(reporte=reporte, maleza=self.maleza, cantidad=3)
+        DetalleMaleza.objects.create(reporte=reporte, maleza=self.maleza, cantidad=4)
+        inactivo = Reporte.objects.create(robot=self.robot, area_cubierta=99, activo=False)
+        DetalleMaleza.objects.create(reporte=inactivo, maleza=self.maleza, cantidad=50)
+
+        # Autenticar el cliente
+        self.client.force_authenticate(user=self.user)
+
+    def test_kpis_en_una_consulta(self):
+        """Prueba que el resumen completo se calcula en un solo viaje a la base de datos"""
+        with self.assertNumQueries(1):
+            kpis = calcular_kpis()
+
+        self.assertEqual(kpis, {
+            'total_robots': 2,
+            'robots_activos': 1,
+            'total_tanques': 2,
+            'tanques_en_uso': 1,
+            'total_malezas': 1,
+            'malezas_detectadas': 7,
+            'area_cubierta': 10.5,
+            'herbicida_usado': 2.0,
+        })
+
+    def test_kpis_sin_datos(self):
+        """Prueba que el resumen devuelve ceros cuando no hay registros"""
+        DetalleMaleza.objects.all().delete()
+        Reporte.objects.all().delete()
+        Robot.objects.all().delete()
+        Tanque.objects.all().delete()
+        Maleza.objects.all().delete()
+
+        kpis = calcular_kpis()
+        self.assertTrue(all(valor == 0 for valor in kpis.values()))
+
+    def test_kpis_rango_fechas(self):
+        """Prueba que el rango de fechas excluye reportes fuera del periodo"""
+        kpis = calcular_kpis('2000-01-01', '2000-01-31')
+        self.assertEqual(kpis['malezas_detectadas'], 0)
+        self.assertEqual(kpis['area_cubierta'], 0)
+        self.assertEqual(kpis['total_robots'], 2)
+
+    def test_endpoints_stats(self):
+        """Prueba que dashboard y stats exponen el mismo resumen"""
+        dashboard = self.client.get(reverse('dashboard_stats'))
+        stats = self.client.get(reverse('stats'))
+        self.assertEqual(dashboard.status_code, status.HTTP_200_OK)
+        self.assertEqual(stats.status_code, status.HTTP_200_OK)
+        self.assertEqual(dashboard.data, stats.data)
+        self.assertEqual(dashboard.data['malezas_detectadas'], 7)
+
+    def test_actividad_y_malezas_desde_resumen(self):
+        """Prueba que actividad y malezas principales se leen del resumen diario"""
+        hoy = timezone.localdate().isoformat()
+        response = self.client.get(reverse('dashboard_activity'), {'start_date': hoy, 'end_date': hoy})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{'fecha': hoy, 'robots': 1, 'malezas': 7}])
+
+        response = self.client.get(reverse('dashboard_weeds'))
+        self.assertEqual(response.data, [{'maleza__nombre': 'Maleza 1', 'total': 7}])
+
+    def test_actividad_fecha_invalida(self):
+        """Prueba que una fecha mal formada devuelve 400"""
+        response = self.client.get(reverse('dashboard_activity'), {'start_date': 'ayer'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class EventosTests(APITestCase):
+    def setUp(self):
+        # TestCase no ejecuta on_commit: la versión de 'robots' no cambia entre pruebas
+        flota.invalidar()
+        invalidar_instantaneas()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.robot = Robot.objects.create(nombre='Robot 1', estado='Disponible', bateria=90)
+        self.tanque = Tanque.objects.create(nombre='Tanque 1', capacidad=100, nivel_actual=50, estado='Medio')
+
+    @staticmethod
+    def leer(evento):
+        nombre, datos = evento.strip().split('\n')
+        return nombre.removeprefix('event: '), json.loads(datos.removeprefix('data: '))
+
+    async def test_notificador_combina_avisos(self):
+        """Prueba que varios avisos seguidos se entregan como un solo conjunto de temas"""
+        suscripcion = notificador.suscribir()
+        try:
+            notificador.notificar('robots')
+            notificador.notificar('robots', 'tanques')
+            self.assertEqual(await suscripcion.esperar(1), {'robots', 'tanques'})
+            self.assertEqual(await suscripcion.esperar(0.01), set())
+        finally:
+            notificador.cancelar(suscripcion)
+
+    async def test_flujo_envia_instantanea_y_diferencias(self):
+        """Prueba que el flujo envía la instantánea inicial y luego solo lo que cambió"""
+        suscripcion = notificador.suscribir()
+        flujo = flujo_eventos(suscripcion, keepalive=0.01)
+        try:
+            nombre, datos = self.leer(await anext(flujo))
+            self.assertEqual(nombre, 'snapshot')
+            self.assertEqual([robot['bateria'] for robot in datos['robots']], [90])
+            self.assertEqual(len(datos['tanques']), 1)
+
+            self.assertEqual(await anext(flujo), ': keepalive\n\n')
+
+            # Las escrituras masivas incrementan la versión a mano, lo que también avisa al notificador
+            await sync_to_async(Robot.objects.filter(pk=self.robot.pk).update)(bateria=40)
+            await sync_to_async(versiones.incrementar)('robots')
+            nombre, datos = self.leer(await anext(flujo))
+            self.assertEqual(nombre, 'delta')
+            self.assertEqual(list(datos), ['robots'])
+            self.assertEqual(datos['robots']['actualizados'][0]['bateria'], 40)
+            self.assertEqual(datos['robots']['eliminados'], [])
+        finally:
+            await flujo.aclose()
+            notificador.cancelar(suscripcion)
+
+    def test_senales_notifican_al_confirmar(self):
+        """Prueba que guardar un modelo vigilado avisa al notificador tras el commit"""
+        with mock.patch.object(notificador, 'notificar') as notificar:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.tanque.nivel_actual = 10
+                self.tanque.save()
+        notificar.assert_called_once_with('tanques')
+
+    def test_stream_requiere_autenticacion(self):
+        """Prueba que el flujo rechaza clientes sin token"""
+        response = self.client.get(reverse('dashboard_stream'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_stream_acepta_ticket_de_un_solo_uso(self):
+        """Prueba que el flujo se abre con un ticket en lugar del JWT y que el ticket no se reutiliza"""
+        self.client.force_authenticate(user=self.user)
+        ticket = self.client.post(reverse('dashboard_stream_ticket')).data['ticket']
+        self.client.force_authenticate(user=None)
+
+        response = self.client.get(reverse('dashboard_stream'), {'ticket': ticket})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        response.close()
+
+        response = self.client.get(reverse('dashboard_stream'), {'ticket': ticket})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_stream_rechaza_jwt_en_parametro(self):
+        """Prueba que el JWT ya no se acepta en la URL, donde quedaría en los registros de acceso"""
+        token = AccessToken.for_user(self.user)
+        response = self.client.get(reverse('dashboard_stream'), {'token': str(token)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get(reverse('dashboard_stream'), {'ticket': str(token)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_stream_acepta_jwt_en_encabezado(self):
+        """Prueba que el flujo sigue aceptando el JWT en el encabezado Authorization"""
+        token = AccessToken.for_user(self.user)
+        response = self.client.get(reverse('dashboard_stream'), HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response.close()
+
+    async def test_instantanea_compartida_entre_clientes(self):
+        """Prueba que varios clientes con el mismo rango calculan los indicadores una sola vez por cambio"""
+        suscripciones = [notificador.suscribir() for _ in range(3)]
+        flujos = [flujo_eventos(suscripcion) for suscripcion in suscripciones]
+        try:
+            with mock.patch('dashboard.eventos.calcular_kpis', wraps=calcular_kpis) as kpis:
+                for flujo in flujos:
+                    self.assertEqual(self.leer(await anext(flujo))[0], 'snapshot')
+                self.assertEqual(kpis.call_count, 1)
+
+                await sync_to_async(Robot.objects.filter(pk=self.robot.pk).update)(bateria=40)
+                await sync_to_async(versiones.incrementar)('robots')
+                for flujo in flujos:
+                    nombre, datos = self.leer(await anext(flujo))
+                    self.assertEqual(datos['robots']['actualizados'][0]['bateria'], 40)
+                self.assertEqual(kpis.call_count, 2)
+        finally:
+            for flujo in flujos:
+                await flujo.aclose()
+            for suscripcion in suscripciones:
+                notificador.cancelar(suscripcion)
+
+class CondicionalTests(APITestCase):
+    def setUp(self):
+        # TestCase no ejecuta on_commit: la versión de 'robots' no cambia entre pruebas
+        flota.invalidar()
+        invalidar_instantaneas()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.robot = Robot.objects.create(nombre='Robot 1', estado='Disponible')
+        self.client.force_authenticate(user=self.user)
+
+    def test_etag_y_304_sin_consultas(self):
+        """Prueba que un If-None-Match vigente responde 304 sin tocar la base de datos"""
+        for nombre in ('dashboard_stats', 'dashboard_activity', 'dashboard_robots',
+                       'dashboard_tanks', 'dashboard_weeds', 'stats'):
+            url = reverse(nombre)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            etag = response['ETag']
+
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response['ETag'], etag)
+
+    def test_etag_cambia_con_escrituras(self):
+        """Prueba que guardar un modelo del que depende la vista invalida su ETag"""
+        url = reverse('dashboard_robots')
+        etag_robots = self.client.get(url)['ETag']
+        etag_tanques = self.client.get(reverse('dashboard_tanks'))['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.robot.bateria = 10
+            self.robot.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag_robots)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag_robots)
+        self.assertEqual(response.data[0]['bateria'], 10)
+
+        response = self.client.get(reverse('dashboard_tanks'), HTTP_IF_NONE_MATCH=etag_tanques)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_depende_de_parametros(self):
+        """Prueba que distintos rangos de fechas producen ETags distintos"""
+        url = reverse('dashboard_stats')
+        primero = self.client.get(url, {'start_date': '2024-01-01', 'end_date': '2024-01-31'})
+        segundo = self.client.get(url, {'start_date': '2024-02-01', 'end_date': '2024-02-29'})
+        self.assertNotEqual(primero['ETag'], segundo['ETag'])
+
+    def test_304_requiere_autenticacion(self):
+        """Prueba que la validación condicional no se salta la autenticación"""
+        etag = self.client.get(reverse('dashboard_stats'))['ETag']
+        self.client.force_authenticate(user=None)
+        response = self.client.get(reverse('dashboard_stats'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+@override_settings(DASHBOARD_OVERVIEW_WORKERS=1)
+class OverviewTests(APITestCase):
+    def setUp(self):
+        # TestCase no ejecuta on_commit: la versión de 'robots' no cambia entre pruebas
+        flota.invalidar()
+        invalidar_instantaneas()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        Robot.objects.create(nombre='Robot 1', estado='Disponible')
+        Tanque.objects.create(nombre='Tanque 1', capacidad=100, nivel_actual=50, estado='Medio')
+        self.client.force_authenticate(user=self.user)
+
+    def test_overview_devuelve_todas_las_secciones(self):
+        """Prueba que el resumen combinado coincide con los endpoints individuales"""
+        response = self.client.get(reverse('dashboard_overview'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {'stats', 'activity', 'robots', 'tanks', 'weeds'})
+        self.assertEqual(response.data['stats'], self.client.get(reverse('dashboard_stats')).data)
+        self.assertEqual(response.data['robots'], self.client.get(reverse('dashboard_robots')).data)
+        self.assertEqual(response.data['tanks'], self.client.get(reverse('dashboard_tanks')).data)
+
+    def test_overview_selector_de_secciones(self):
+        """Prueba que sections= limita la respuesta a las secciones pedidas"""
+        response = self.client.get(reverse('dashboard_overview'), {'sections': 'robots,tanks'})
+        self.assertEqual(set(response.data), {'robots', 'tanks'})
+
+        response = self.client.get(reverse('dashboard_overview'), {'sections': 'robots,clima'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_overview_rango_amplio(self):
+        """Prueba que un rango de años agrupa la actividad por semana en lugar de fallar"""
+        rango = {'start_date': '2010-01-01', 'end_date': '2024-12-31'}
+        self.assertEqual(self.client.get(reverse('dashboard_activity'), rango).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse('dashboard_overview'), rango)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        semanal = self.client.get(reverse('dashboard_activity'), {**rango, 'granularity': 'week'})
+        self.assertEqual(response.data['activity'], semanal.data)
+
+        response = self.client.get(reverse('dashboard_overview'), {'start_date': 'ayer'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class OverviewConcurrenteTests(TransactionTestCase):
+    def setUp(self):
+        # TestCase no ejecuta on_commit: la versión de 'robots' no cambia entre pruebas
+        flota.invalidar()
+        invalidar_instantaneas()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        Robot.objects.create(nombre='Robot 1', estado='Disponible')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    @override_settings(DASHBOARD_OVERVIEW_WORKERS=4)
+    def test_overview_en_paralelo(self):
+        """Prueba que las secciones calculadas en el pool de hilos dan el mismo resultado"""
+        response = self.client.get(reverse('dashboard_overview'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stats']['total_robots'], 1)
+        self.assertEqual([robot['nombre'] for robot in response.data['robots']], ['Robot 1'])
+
+class ActividadTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.robot = Robot.objects.create(nombre='Robot 1')
+        self.otro_robot = Robot.objects.create(nombre='Robot 2')
+        self.maleza = Maleza.objects.create(nombre='Maleza 1')
+        self.crear_reporte(self.robot, datetime(2024, 3, 4, 8, 15), 2)
+        self.crear_reporte(self.otro_robot, datetime(2024, 3, 4, 8, 45), 3)
+        self.crear_reporte(self.robot, datetime(2024, 3, 6, 10, 0), 5)
+        self.crear_reporte(self.robot, datetime(2024, 4, 20, 10, 0), 1)
+        self.client.force_authenticate(user=self.user)
+
+    def crear_reporte(self, robot, fecha, cantidad):
+        reporte = Reporte.objects.create(robot=robot, fecha=timezone.make_aware(fecha))
+        DetalleMaleza.objects.create(reporte=reporte, maleza=self.maleza, cantidad=cantidad)
+
+    def test_serie_diaria_rellena_dias_vacios(self):
+        """Prueba que los días sin reportes aparecen con ceros"""
+        serie = serie_actividad('2024-03-04', '2024-03-07')
+        self.assertEqual(serie, [
+            {'fecha': '2024-03-04', 'robots': 2, 'malezas': 5},
+            {'fecha': '2024-03-05', 'robots': 0, 'malezas': 0},
+            {'fecha': '2024-03-06', 'robots': 1, 'malezas': 5},
+            {'fecha': '2024-03-07', 'robots': 0, 'malezas': 0},
+        ])
+
+    def test_serie_por_hora(self):
+        """Prueba la granularidad por hora a partir de los reportes"""
+        serie = serie_actividad('2024-03-04', '2024-03-04', 'hour')
+        self.assertEqual(len(serie), 24)
+        self.assertEqual(serie[8], {'fecha': '2024-03-04T08:00', 'robots': 2, 'malezas': 5})
+        self.assertEqual(sum(punto['malezas'] for punto in serie), 5)
+
+    def test_serie_semanal_y_mensual(self):
+        """Prueba que semanas y meses se agrupan en la base de datos"""
+        semanas = serie_actividad('2024-03-01', '2024-03-17', 'week')
+        self.assertEqual([punto['fecha'] for punto in semanas],
+                         ['2024-02-26', '2024-03-04', '2024-03-11'])
+        self.assertEqual(semanas[1], {'fecha': '2024-03-04', 'robots': 2, 'malezas': 10})
+
+        with self.assertNumQueries(1):
+            meses = serie_actividad('2024-01-01', '2024-12-31', 'month')
+        self.assertEqual(len(meses), 12)
+        self.assertEqual(meses[2], {'fecha': '2024-03-01', 'robots': 2, 'malezas': 10})
+        self.assertEqual(meses[3], {'fecha': '2024-04-01', 'robots': 1, 'malezas': 1})
+
+    def test_granularidad_invalida(self):
+        """Prueba que una granularidad desconocida o un rango excesivo devuelven 400"""
+        url = reverse('dashboard_activity')
+        response = self.client.get(url, {'granularity': 'minute'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(url, {'start_date': '2000-01-01', 'end_date': '2024-01-01',
+                                         'granularity': 'hour'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
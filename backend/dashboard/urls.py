@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, eventos
 
 urlpatterns = [
     path('stats/', views.get_stats, name='dashboard_stats'),
@@ -7,4 +7,7 @@ urlpatterns = [
     path('robots/', views.get_robot_stats, name='dashboard_robots'),
     path('tanks/', views.get_tank_stats, name='dashboard_tanks'),
     path('weeds/', views.get_weed_stats, name='dashboard_weeds'),
+    path('overview/', views.get_overview, name='dashboard_overview'),
+    path('stream/', eventos.stream_eventos, name='dashboard_stream'),
+    path('stream/ticket/', eventos.ticket_stream, name='dashboard_stream_ticket'),
 ] 
\ No newline at end of file
@@ -1,6 +1,7 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from aspersax_api.condicional import condicional
 from django.db.models import Count, Sum
 from django.utils import timezone
 from datetime import timedelta
@@ -8,82 +9,80 @@ from robots.models import Robot
 from tanques.models import Tanque
 from malezas.models import Maleza
 from reportes.models import Reporte, DetalleMaleza
+from .kpis import (
+    SECCIONES, calcular_kpis, calcular_secciones, serie_actividad, malezas_principales,
+    estado_robots, estado_tanques
+)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@condicional('robots', 'tanques', 'malezas', 'reportes')
 def get_stats(request):
     start_date = request.query_params.get('start_date')
     end_date = request.query_params.get('end_date')
 
-    # Filtrar por fechas si se proporcionan
-    reportes = Reporte.objects.filter(activo=True)
-    if start_date and end_date:
-        reportes = reportes.filter(fecha__range=[start_date, end_date])
-
-    stats = {
-        'total_robots': Robot.objects.filter(activo=True).count(),
-        'robots_activos': Robot.objects.filter(activo=True, estado='Activo').count(),
-        'total_tanques': Tanque.objects.filter(activo=True).count(),
-        'tanques_en_uso': Tanque.objects.filter(activo=True, estado__in=['Lleno', 'Medio', 'Bajo']).count(),
-        'total_malezas': Maleza.objects.filter(activo=True).count(),
-        'malezas_detectadas': DetalleMaleza.objects.filter(reporte__in=reportes).aggregate(
-            total=Sum('cantidad')
-        )['total'] or 0,
-        'area_cubierta': reportes.aggregate(total=Sum('area_cubierta'))['total'] or 0,
-        'herbicida_usado': reportes.aggregate(total=Sum('herbicida_usado'))['total'] or 0,
-    }
+    try:
+        stats = calcular_kpis(start_date, end_date)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
 
     return Response(stats)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@condicional('reportes')
 def get_activity_data(request):
     start_date = request.query_params.get('start_date')
     end_date = request.query_params.get('end_date')
 
-    # Si no se proporcionan fechas, usar los últimos 7 días
-    if not start_date:
-        end_date = timezone.now()
-        start_date = end_date - timedelta(days=7)
-
-    reportes = Reporte.objects.filter(
-        fecha__range=[start_date, end_date],
-        activo=True
-    ).values('fecha__date').annotate(
-        robots=Count('robot', distinct=True),
-        malezas=Sum('detallemaleza__cantidad')
-    ).order_by('fecha__date')
-
-    activity_data = []
-    for reporte in reportes:
-        activity_data.append({
-            'fecha': reporte['fecha__date'].strftime('%Y-%m-%d'),
-            'robots': reporte['robots'],
-            'malezas': reporte['malezas'] or 0
-        })
+    try:
+        activity_data = serie_actividad(
+            start_date, end_date, request.query_params.get('granularity', 'day')
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
 
     return Response(activity_data)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@condicional('robots')
 def get_robot_stats(request):
-    robots = Robot.objects.filter(activo=True).values(
-        'id', 'nombre', 'estado', 'bateria', 'ultima_actividad'
-    )
-    return Response(list(robots))
+    robots = estado_robots()
+    return Response(robots)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@condicional('tanques')
 def get_tank_stats(request):
-    tanques = Tanque.objects.filter(activo=True).values(
-        'id_tanque', 'nombre', 'capacidad', 'nivel_actual', 'estado'
-    )
-    return Response(list(tanques))
+    tanques = estado_tanques()
+    return Response(tanques)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@condicional('reportes', 'malezas')
 def get_weed_stats(request):
-    malezas = DetalleMaleza.objects.values('maleza__nombre').annotate(
-        total=Sum('cantidad')
-    ).order_by('-total')[:5]
-    return Response(list(malezas)) 
\ No newline at end of file
+    malezas = malezas_principales()
+    return Response(malezas)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@condicional('robots', 'tanques', 'malezas', 'reportes')
+def get_overview(request):
+    start_date = request.query_params.get('start_date')
+    end_date = request.query_params.get('end_date')
+    sections = request.query_params.get('sections')
+
+    # Por defecto se devuelven todas las secciones
+    nombres = [nombre.strip() for nombre in sections.split(',') if nombre.strip()] if sections else list(SECCIONES)
+    invalidas = [nombre for nombre in nombres if nombre not in SECCIONES]
+    if invalidas:
+        return Response(
+            {'error': f"Secciones inválidas: {', '.join(invalidas)}. Use: {', '.join(SECCIONES)}"},
+            status=400
+        )
+
+    try:
+        return Response(calcular_secciones(nombres, start_date, end_date))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
@@ -0,0 +1,68 @@
+"""
+Calendario de jornadas agregado por día, semana o mes.
+
+Las jornadas se agrupan en la base de datos por periodo y robot con una sola
+consulta (apoyada en el índice T001_fecha_robot_idx) y aquí solo se pliegan
+las filas por periodo. La respuesta tiene una entrada por periodo con
+jornadas, en lugar de cada jornada serializada.
+"""
+from datetime import timedelta
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils.duration import duration_string
+from .models import Jornada
+
+AGRUPACIONES = {
+    'dia': F('fecha'),
+    'semana': TruncWeek('fecha'),
+    'mes': TruncMonth('fecha'),
+}
+
+
+def _totales(jornadas, duracion, area):
+    horas = duracion.total_seconds() / 3600
+    return {
+        'jornadas': jornadas,
+        'duracion_total': duration_string(duracion),
+        'horas': round(horas, 2),
+        'area_tratada': round(area, 2),
+        'area_por_hora': round(area / horas, 2) if horas else None,
+    }
+
+
+def calendario(desde, hasta, agrupar='dia', robot=None):
+    """
+    Cantidad de jornadas, duración total, área tratada y área por hora de
+    cada periodo entre ``desde`` y ``hasta`` (inclusive), con el detalle por
+    robot. Los periodos sin jornadas no se incluyen.
+    """
+    jornadas = Jornada.objects.filter(fecha__range=(desde, hasta))
+    if robot is not None:
+        jornadas = jornadas.filter(robot_id=robot)
+    filas = jornadas.annotate(periodo=AGRUPACIONES[agrupar]).values('periodo', 'robot_id').annotate(
+        cantidad=Count('pk'),
+        duracion=Sum('duracion'),
+        area=Sum('area_tratada'),
+    ).order_by('periodo', 'robot_id').values_list('periodo', 'robot_id', 'cantidad', 'duracion', 'area')
+
+    periodos = []
+    for periodo, robot_id, cantidad, duracion, area in filas:
+        if not periodos or periodos[-1][0] != periodo:
+            periodos.append((periodo, []))
+        periodos[-1][1].append((robot_id, cantidad, duracion, area))
+
+    return [
+        {
+            'inicio': periodo,
+            **_totales(
+                sum(cantidad for _, cantidad, _, _ in robots),
+                sum((duracion for _, _, duracion, _ in robots), timedelta()),
+                sum(area for _, _, _, area in robots),
+            ),
+            'robots': [
+                {'robot': robot_id, **_totales(cantidad, duracion, area)}
+                for robot_id, cantidad, duracion, area in robots
+            ],
+        }
+        for periodo, robots in periodos
+    ]
@@ -0,0 +1,121 @@
+"""
+Detección de jornadas superpuestas.
+
+Dos jornadas chocan si comparten robot o tanque, son del mismo día y sus
+horarios se cruzan (inicio < fin del otro y fin > inicio del otro). Las
+jornadas inactivas no cuentan.
+
+Para una sola jornada la condición va directamente en la consulta, apoyada en
+los índices parciales T001_robot_horario_idx y T001_tanque_horario_idx. Para
+un lote de jornadas propuestas se traen las existentes del rango con una
+consulta y se recorre todo con una línea de barrido por recurso y día.
+
+La verificación y el INSERT deben ir en la misma transacción después de
+bloquear_recursos: así dos altas simultáneas para el mismo robot o tanque se
+ordenan y la segunda ve la jornada de la primera.
+"""
+import heapq
+from collections import defaultdict
+from django.db.models import Q
+from robots.models import Robot
+from tanques.models import Tanque
+from .models import Jornada
+
+RECURSOS = ('robot', 'tanque')
+
+
+def bloquear_recursos(robot_ids, tanque_ids):
+    """
+    Bloquea con select_for_update las filas de los robots y tanques hasta el
+    fin de la transacción. Siempre en el mismo orden (robots y luego tanques,
+    por id) para que dos transacciones no se bloqueen mutuamente.
+    """
+    list(Robot.objects.select_for_update().filter(pk__in=robot_ids).order_by('pk').values_list('pk'))
+    list(Tanque.objects.select_for_update().filter(pk__in=tanque_ids).order_by('pk').values_list('pk'))
+
+
+def superpuestas(fecha, hora_inicio, hora_fin, robot_id, tanque_id, excluir=None):
+    """
+    Jornadas activas que se cruzan con el horario dado en el mismo robot o
+    tanque, sin contar ``excluir`` (la jornada que se está editando).
+    """
+    jornadas = Jornada.objects.filter(
+        Q(robot_id=robot_id) | Q(tanque_id=tanque_id),
+        activo=True, fecha=fecha, hora_inicio__lt=hora_fin, hora_fin__gt=hora_inicio,
+    )
+    if excluir is not None:
+        jornadas = jornadas.exclude(pk=excluir)
+    return jornadas.order_by('hora_inicio')
+
+
+def _barrer(intervalos):
+    """
+    Pares de intervalos que se cruzan, para intervalos de un mismo recurso y
+    día ordenados por inicio. Cada intervalo es (inicio, fin, origen). El
+    montículo guarda los intervalos abiertos por orden de fin: al llegar un
+    intervalo se descartan los que ya terminaron y todos los que quedan se
+    cruzan con él.
+    """
+    abiertos = []
+    for inicio, fin, origen in intervalos:
+        while abiertos and abiertos[0][0] <= inicio:
+            heapq.heappop(abiertos)
+        for fin_abierto, inicio_abierto, otro in abiertos:
+            yield otro, origen, inicio, min(fin, fin_abierto)
+        heapq.heappush(abiertos, (fin, inicio, origen))
+
+
+def conflictos_en_lote(propuestas):
+    """
+    Todos los choques de un lote de jornadas propuestas (dicts con fecha,
+    hora_inicio, hora_fin, robot_id y tanque_id), entre sí y con las jornadas
+    activas ya guardadas. Usa una sola consulta.
+
+    Cada conflicto indica el índice de la propuesta, con qué choca (otro
+    índice o el id de una jornada existente), el recurso compartido y el
+    horario en que se cruzan.
+    """
+    if not propuestas:
+        return []
+
+    existentes = Jornada.objects.filter(
+        Q(robot_id__in={p['robot_id'] for p in propuestas}) | Q(tanque_id__in={p['tanque_id'] for p in propuestas}),
+        activo=True,
+        fecha__range=(min(p['fecha'] for p in propuestas), max(p['fecha'] for p in propuestas)),
+    ).values_list('id_jornada', 'fecha', 'hora_inicio', 'hora_fin', 'robot_id', 'tanque_id')
+
+    # (recurso, id del recurso, fecha) -> intervalos; el origen es
+    # ('indice', i) para una propuesta o ('id_jornada', pk) para una existente
+    grupos = defaultdict(list)
+    for indice, propuesta in enumerate(propuestas):
+        for recurso in RECURSOS:
+            grupos[(recurso, propuesta[f'{recurso}_id'], propuesta['fecha'])].append(
+                (propuesta['hora_inicio'], propuesta['hora_fin'], ('indice', indice))
+            )
+    for id_jornada, fecha, hora_inicio, hora_fin, robot_id, tanque_id in existentes:
+        for recurso, id_recurso in zip(RECURSOS, (robot_id, tanque_id)):
+            clave = (recurso, id_recurso, fecha)
+            # Solo interesan los recursos y días que aparecen en las propuestas
+            if clave in grupos:
+                grupos[clave].append((hora_inicio, hora_fin, ('id_jornada', id_jornada)))
+
+    conflictos = []
+    for (recurso, id_recurso, fecha), intervalos in grupos.items():
+        intervalos.sort(key=lambda intervalo: (intervalo[0], intervalo[1]))
+        for primero, segundo, desde, hasta in _barrer(intervalos):
+            if primero[0] == 'id_jornada' and segundo[0] == 'id_jornada':
+                continue
+            # La propuesta va primero; entre dos propuestas, la de menor índice
+            if primero[0] == 'id_jornada' or (segundo[0] == 'indice' and segundo[1] < primero[1]):
+                primero, segundo = segundo, primero
+            conflictos.append({
+                'indice': primero[1],
+                'con': {segundo[0]: segundo[1]},
+                'recurso': recurso,
+                'id_recurso': id_recurso,
+                'fecha': fecha,
+                'desde': desde,
+                'hasta': hasta,
+            })
+    conflictos.sort(key=lambda conflicto: (conflicto['indice'], conflicto['fecha'], conflicto['desde']))
+    return conflictos
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-17 21:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jornadas', '0001_initial'),
+        ('robots', '0002_remove_robot_modelo_robot_bateria_robot_nombre_and_more'),
+        ('tanques', '0003_remove_tanque_tipo_tanque_nivel_actual_tanque_nombre_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jornada',
+            index=models.Index(fields=['fecha', 'id_jornada'], name='T001_fecha_id_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-17 21:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jornadas', '0002_jornada_t001_fecha_id_idx'),
+        ('robots', '0004_robot_latitud_robot_longitud_robot_nivel_tanque_and_more'),
+        ('tanques', '0004_movimientotanque'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jornada',
+            index=models.Index(fields=['fecha', 'robot'], name='T001_fecha_robot_idx'),
+        ),
+    ]
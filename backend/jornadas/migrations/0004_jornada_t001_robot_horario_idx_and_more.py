@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-17 21:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jornadas', '0003_jornada_t001_fecha_robot_idx'),
+        ('robots', '0004_robot_latitud_robot_longitud_robot_nivel_tanque_and_more'),
+        ('tanques', '0004_movimientotanque'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jornada',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['robot', 'fecha', 'hora_inicio'], name='T001_robot_horario_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jornada',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['tanque', 'fecha', 'hora_inicio'], name='T001_tanque_horario_idx'),
+        ),
+    ]
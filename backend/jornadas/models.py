@@ -19,4 +19,15 @@ class Jornada(models.Model):
     class Meta:
         db_table = 'T001Jornada'
         verbose_name = 'Jornada'
-        verbose_name_plural = 'Jornadas'
\ No newline at end of file
+        verbose_name_plural = 'Jornadas'
+        indexes = [
+            # Soporta la paginación por cursor (fecha, pk) y los filtros por fecha
+            models.Index(fields=['fecha', 'id_jornada'], name='T001_fecha_id_idx'),
+            # Calendario agrupado por fecha y robot, con filtro opcional por robot
+            models.Index(fields=['fecha', 'robot'], name='T001_fecha_robot_idx'),
+            # Detección de superposiciones por robot y por tanque (ver conflictos.py)
+            models.Index(fields=['robot', 'fecha', 'hora_inicio'], name='T001_robot_horario_idx',
+                         condition=models.Q(activo=True)),
+            models.Index(fields=['tanque', 'fecha', 'hora_inicio'], name='T001_tanque_horario_idx',
+                         condition=models.Q(activo=True)),
+        ]
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""
+Generación de jornadas recurrentes.
+
+Una regla (parecida a una RRULE semanal) indica los días de la semana, cada
+cuántas semanas, el horario, el robot, el tanque y el rango de fechas. La
+regla se expande aquí, todas las fechas se verifican contra las jornadas
+existentes con una sola consulta (conflictos.conflictos_en_lote) y las
+jornadas se insertan con un único bulk_create.
+"""
+from datetime import date, datetime, timedelta
+from django.db import transaction
+from .conflictos import bloquear_recursos, conflictos_en_lote
+from .models import Jornada
+
+# Largo máximo del rango de una regla, en días (una temporada)
+MAX_DIAS_RECURRENCIA = 366
+
+
+def expandir(regla):
+    """
+    Fechas de la regla en orden. Las semanas se cuentan desde la semana
+    (de lunes a domingo) que contiene ``desde``.
+    """
+    desde, hasta = regla['desde'], regla['hasta']
+    dias = set(regla['dias'])
+    primer_lunes = desde - timedelta(days=desde.weekday())
+    fecha = desde
+    while fecha <= hasta:
+        semana = (fecha - primer_lunes).days // 7
+        if fecha.weekday() in dias and semana % regla['cada_semanas'] == 0:
+            yield fecha
+        fecha += timedelta(days=1)
+
+
+def generar(regla):
+    """
+    Crea las jornadas de la regla. Si alguna fecha choca con otra jornada del
+    robot o del tanque no se crea ninguna, salvo que la regla pida omitir las
+    fechas en conflicto. Devuelve (jornadas creadas, conflictos).
+    """
+    duracion = (
+        datetime.combine(date.min, regla['hora_fin']) - datetime.combine(date.min, regla['hora_inicio'])
+    )
+    propuestas = [
+        {
+            'fecha': fecha,
+            'hora_inicio': regla['hora_inicio'],
+            'hora_fin': regla['hora_fin'],
+            'robot_id': regla['robot_id'],
+            'tanque_id': regla['tanque_id'],
+        }
+        for fecha in expandir(regla)
+    ]
+
+    with transaction.atomic():
+        bloquear_recursos([regla['robot_id']], [regla['tanque_id']])
+        conflictos = conflictos_en_lote(propuestas)
+        if conflictos and not regla['omitir_conflictos']:
+            return [], conflictos
+        en_conflicto = {conflicto['indice'] for conflicto in conflictos}
+        jornadas = Jornada.objects.bulk_create([
+            Jornada(duracion=duracion, area_tratada=regla['area_tratada'], **propuesta)
+            for indice, propuesta in enumerate(propuestas) if indice not in en_conflicto
+        ])
+    return jornadas, conflictos
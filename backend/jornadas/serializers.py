@@ -1,10 +1,18 @@
+from django.db import transaction
 from rest_framework import serializers
+from aspersax_api.campos import CamposDinamicosMixin
+from aspersax_api.lectura import Columna, LecturaRapida, duracion, iso
+from robots.serializers import RobotSerializer
+from tanques.serializers import TanqueSerializer
+from .conflictos import bloquear_recursos, superpuestas
+from .recurrencia import MAX_DIAS_RECURRENCIA
 from .models import Jornada
 
-class JornadaSerializer(serializers.ModelSerializer):
+class JornadaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Jornada
         fields = '__all__'
+        expandibles = {'robot': RobotSerializer, 'tanque': TanqueSerializer}
 
     def validate(self, data):
         hora_inicio = data.get('hora_inicio')
@@ -14,5 +22,115 @@ class JornadaSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({
                 'hora_fin': 'La hora de fin debe ser posterior a la hora de inicio'
             })
-        
+
+        self.validar_superposicion(data)
+        return data
+
+    def save(self, **kwargs):
+        """
+        Guarda con el robot y el tanque bloqueados y vuelve a verificar la
+        superposición dentro de la misma transacción, para que dos altas
+        simultáneas no reserven el mismo horario.
+        """
+        with transaction.atomic():
+            valores = {**self.validated_data, **kwargs}
+            robot = valores.get('robot', getattr(self.instance, 'robot', None))
+            tanque = valores.get('tanque', getattr(self.instance, 'tanque', None))
+            bloquear_recursos([robot.pk] if robot else [], [tanque.pk] if tanque else [])
+            self.validar_superposicion(valores)
+            return super().save(**kwargs)
+
+    def validar_superposicion(self, data):
+        """
+        Rechaza la jornada si su robot o su tanque ya tiene otra jornada activa
+        que se cruza con su horario ese día. En una actualización parcial los
+        campos que no llegan se toman de la jornada guardada.
+        """
+        instance = self.instance
+        valores = {
+            campo: data[campo] if campo in data else getattr(instance, campo, None)
+            for campo in ('fecha', 'hora_inicio', 'hora_fin', 'robot', 'tanque')
+        }
+        if not data.get('activo', getattr(instance, 'activo', True)) or None in valores.values():
+            return
+
+        errores = {}
+        for otra in superpuestas(
+            valores['fecha'], valores['hora_inicio'], valores['hora_fin'],
+            valores['robot'].pk, valores['tanque'].pk, excluir=instance.pk if instance else None,
+        ):
+            horario = f"{otra.hora_inicio:%H:%M} a {otra.hora_fin:%H:%M}"
+            if otra.robot_id == valores['robot'].pk:
+                errores.setdefault('robot', []).append(
+                    f'El robot ya tiene la jornada {otra.pk} de {horario} ese día'
+                )
+            if otra.tanque_id == valores['tanque'].pk:
+                errores.setdefault('tanque', []).append(
+                    f'El tanque ya está asignado a la jornada {otra.pk} de {horario} ese día'
+                )
+        if errores:
+            raise serializers.ValidationError(errores)
+
+# Mismas columnas y orden que JornadaSerializer, para la lectura rápida
+LECTURA_JORNADA = LecturaRapida((
+    Columna('id_jornada'),
+    Columna('fecha', convertir=iso),
+    Columna('hora_inicio', convertir=iso),
+    Columna('hora_fin', convertir=iso),
+    Columna('duracion', convertir=duracion),
+    Columna('area_tratada'),
+    Columna('activo'),
+    Columna('robot'),
+    Columna('tanque'),
+))
+
+class JornadaPropuestaSerializer(serializers.Serializer):
+    """
+    Jornada propuesta para verificar una planificación. Los IDs se validan
+    contra mapas precargados en la vista, no con una consulta por elemento.
+    """
+    fecha = serializers.DateField()
+    hora_inicio = serializers.TimeField()
+    hora_fin = serializers.TimeField()
+    robot_id = serializers.IntegerField()
+    tanque_id = serializers.IntegerField()
+
+    def validate(self, data):
+        if data['hora_fin'] <= data['hora_inicio']:
+            raise serializers.ValidationError({
+                'hora_fin': 'La hora de fin debe ser posterior a la hora de inicio'
+            })
+        return data
+
+class RecurrenciaJornadaSerializer(serializers.Serializer):
+    """
+    Regla de jornadas recurrentes. ``dias`` son días de la semana, de 0
+    (lunes) a 6 (domingo).
+    """
+    desde = serializers.DateField()
+    hasta = serializers.DateField()
+    dias = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6), allow_empty=False
+    )
+    cada_semanas = serializers.IntegerField(default=1, min_value=1, max_value=52)
+    hora_inicio = serializers.TimeField()
+    hora_fin = serializers.TimeField()
+    robot_id = serializers.IntegerField()
+    tanque_id = serializers.IntegerField()
+    area_tratada = serializers.FloatField(default=0, min_value=0)
+    omitir_conflictos = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if data['hora_fin'] <= data['hora_inicio']:
+            raise serializers.ValidationError({
+                'hora_fin': 'La hora de fin debe ser posterior a la hora de inicio'
+            })
+        if data['hasta'] < data['desde']:
+            raise serializers.ValidationError({
+                'hasta': 'La fecha hasta no puede ser anterior a desde'
+            })
+        if (data['hasta'] - data['desde']).days >= MAX_DIAS_RECURRENCIA:
+            raise serializers.ValidationError({
+                'hasta': f'El rango puede abarcar como máximo {MAX_DIAS_RECURRENCIA} días'
+            })
         return data
@@ -2,8 +2,15 @@ from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 from .models import Jornada
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from .conflictos import conflictos_en_lote
+from .serializers import JornadaSerializer
+import random
 from robots.models import Robot
 from tanques.models import Tanque
 from datetime import datetime, timedelta, date, time
@@ -146,3 +153,461 @@ class JornadaTests(APITestCase):
         }
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class JornadaPaginacionTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        robot = Robot.objects.create(nombre='Robot Test')
+        tanque = Tanque.objects.create(nombre='Tanque Test', capacidad=100)
+        # Varias jornadas por día para que el desempate por pk sea necesario
+        Jornada.objects.bulk_create([
+            Jornada(
+                fecha=date(2024, 5, 1) + timedelta(days=i // 3),
+                hora_inicio=time(8, 0), hora_fin=time(9, 0),
+                duracion=timedelta(hours=1), area_tratada=10,
+                robot=robot, tanque=tanque
+            )
+            for i in range(25)
+        ])
+        self.esperado = list(Jornada.objects.order_by('-fecha', '-id_jornada').values_list('id_jornada', flat=True))
+        self.url = reverse('jornada-list')
+        self.client.force_authenticate(user=self.user)
+
+    def recorrer(self, url, params=None):
+        ids, paginas = [], 0
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids.extend(fila['id_jornada'] for fila in response.data['results'])
+            paginas += 1
+            if not response.data['next']:
+                return ids, paginas, response
+            response = self.client.get(response.data['next'])
+
+    def test_recorrido_por_cursor(self):
+        """Prueba que el cursor recorre todas las jornadas sin repetir ni saltar filas"""
+        ids, paginas, _ = self.recorrer(self.url, {'page_size': 4})
+        self.assertEqual(ids, self.esperado)
+        self.assertEqual(paginas, 7)
+
+    def test_pagina_anterior(self):
+        """Prueba que el enlace previous devuelve la página anterior completa"""
+        primera = self.client.get(self.url, {'page_size': 5})
+        segunda = self.client.get(primera.data['next'])
+        volver = self.client.get(segunda.data['previous'])
+        self.assertEqual(volver.data['results'], primera.data['results'])
+        self.assertIsNone(volver.data['previous'])
+
+    def test_sin_offset_ni_count(self):
+        """Prueba que las páginas profundas usan una sola consulta sin COUNT ni OFFSET"""
+        primera = self.client.get(self.url, {'page_size': 5})
+        with self.assertNumQueries(1) as contexto:
+            self.client.get(primera.data['next'])
+        sql = contexto.captured_queries[0]['sql'].upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_por_fecha_con_cursor(self):
+        """Prueba que la búsqueda por rango también pagina por cursor"""
+        ids, _, _ = self.recorrer(reverse('jornada-por-fecha'),
+                                  {'desde': '2024-05-02', 'hasta': '2024-05-03', 'page_size': 2})
+        self.assertEqual(ids, [pk for pk in self.esperado
+                               if date(2024, 5, 2) <= Jornada.objects.get(pk=pk).fecha <= date(2024, 5, 3)])
+
+    def test_modo_paginas_opcional(self):
+        """Prueba que ?page= mantiene la paginación numerada con total"""
+        response = self.client.get(self.url, {'page': 2})
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual([fila['id_jornada'] for fila in response.data['results']], self.esperado[20:])
+
+    def test_cursor_invalido(self):
+        """Prueba que un cursor manipulado devuelve 404"""
+        response = self.client.get(self.url, {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class JornadaCalendarioTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.robot = Robot.objects.create(nombre='Robot 1')
+        self.otro = Robot.objects.create(nombre='Robot 2')
+        tanque = Tanque.objects.create(nombre='Tanque Test', capacidad=100)
+
+        def jornada(fecha, robot, horas, area):
+            return Jornada(
+                fecha=fecha, hora_inicio=time(8, 0), hora_fin=time(8 + horas, 0),
+                duracion=timedelta(hours=horas), area_tratada=area, robot=robot, tanque=tanque
+            )
+
+        Jornada.objects.bulk_create([
+            jornada(date(2024, 5, 6), self.robot, 2, 100),
+            jornada(date(2024, 5, 6), self.robot, 1, 40),
+            jornada(date(2024, 5, 6), self.otro, 3, 90),
+            jornada(date(2024, 5, 8), self.otro, 1, 10),
+            jornada(date(2024, 5, 20), self.robot, 4, 200),
+            jornada(date(2024, 6, 3), self.robot, 1, 50),
+        ])
+        self.url = reverse('jornada-calendario')
+        self.client.force_authenticate(user=self.user)
+
+    def test_por_dia(self):
+        """Prueba los totales por día con el detalle por robot"""
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'desde': '2024-05-01', 'hasta': '2024-05-31'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        periodos = response.data['periodos']
+        self.assertEqual([p['inicio'] for p in periodos], [date(2024, 5, 6), date(2024, 5, 8), date(2024, 5, 20)])
+
+        dia = periodos[0]
+        self.assertEqual((dia['jornadas'], dia['horas'], dia['area_tratada']), (3, 6, 230))
+        self.assertEqual(dia['duracion_total'], '06:00:00')
+        self.assertAlmostEqual(dia['area_por_hora'], 38.33)
+        self.assertEqual(
+            [(r['robot'], r['jornadas'], r['area_por_hora']) for r in dia['robots']],
+            [(self.robot.id_robot, 2, 46.67), (self.otro.id_robot, 1, 30)]
+        )
+
+    def test_por_semana_y_mes(self):
+        """Prueba la agrupación por semana (desde el lunes) y por mes"""
+        response = self.client.get(self.url, {'desde': '2024-05-01', 'hasta': '2024-06-30', 'agrupar': 'semana'})
+        self.assertEqual(
+            [(p['inicio'], p['jornadas']) for p in response.data['periodos']],
+            [(date(2024, 5, 6), 4), (date(2024, 5, 20), 1), (date(2024, 6, 3), 1)]
+        )
+        response = self.client.get(self.url, {'desde': '2024-05-01', 'hasta': '2024-06-30', 'agrupar': 'mes'})
+        self.assertEqual(
+            [(p['inicio'], p['jornadas'], p['horas']) for p in response.data['periodos']],
+            [(date(2024, 5, 1), 5, 11), (date(2024, 6, 1), 1, 1)]
+        )
+
+    def test_filtro_por_robot_y_mes_por_defecto(self):
+        """Prueba el filtro por robot y que sin hasta se usa el fin del mes de desde"""
+        response = self.client.get(self.url, {'desde': '2024-05-01', 'robot': self.otro.id_robot})
+        self.assertEqual(response.data['hasta'], date(2024, 5, 31))
+        self.assertEqual([p['jornadas'] for p in response.data['periodos']], [1, 1])
+
+    def test_parametros_invalidos(self):
+        """Prueba los parámetros inválidos"""
+        for params in ({'agrupar': 'anio'}, {'desde': '2024-13-01'}, {'robot': 'uno'},
+                       {'desde': 'basura'}, {'hasta': '10/05/2024'},
+                       {'desde': '2024-05-10', 'hasta': '2024-05-01'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class JornadaConflictosTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.robot = Robot.objects.create(nombre='Robot 1')
+        self.otro_robot = Robot.objects.create(nombre='Robot 2')
+        self.tanque = Tanque.objects.create(nombre='Tanque 1', capacidad=100)
+        self.otro_tanque = Tanque.objects.create(nombre='Tanque 2', capacidad=100)
+        self.jornada = Jornada.objects.create(
+            fecha=date(2024, 5, 6), hora_inicio=time(8, 0), hora_fin=time(10, 0),
+            duracion=timedelta(hours=2), area_tratada=100, robot=self.robot, tanque=self.tanque
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def datos(self, inicio, fin, robot=None, tanque=None, fecha='2024-05-06'):
+        return {
+            'fecha': fecha, 'hora_inicio': inicio, 'hora_fin': fin, 'duracion': '02:00:00',
+            'area_tratada': 50, 'robot': (robot or self.robot).id_robot, 'tanque': (tanque or self.tanque).id_tanque,
+        }
+
+    def test_crear_superpuesta(self):
+        """Prueba que no se puede reservar dos veces el mismo robot o tanque"""
+        url = reverse('jornada-crear')
+        response = self.client.post(url, self.datos('09:00', '11:00', tanque=self.otro_tanque), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('robot', response.data)
+        self.assertNotIn('tanque', response.data)
+
+        response = self.client.post(url, self.datos('07:00', '12:00', robot=self.otro_robot), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tanque', response.data)
+
+        # Horarios contiguos, otro día u otra combinación de recursos no chocan
+        for datos in (self.datos('10:00', '12:00'), self.datos('08:00', '10:00', fecha='2024-05-07'),
+                      self.datos('08:00', '10:00', robot=self.otro_robot, tanque=self.otro_tanque)):
+            response = self.client.post(url, datos, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_altas_simultaneas(self):
+        """Prueba que si dos altas pasan la validación a la vez, la segunda se rechaza al guardar"""
+        datos = self.datos('12:00', '14:00')
+        primera, segunda = JornadaSerializer(data=datos), JornadaSerializer(data=datos)
+        self.assertTrue(primera.is_valid())
+        self.assertTrue(segunda.is_valid())
+
+        primera.save()
+        with self.assertRaises(ValidationError) as contexto:
+            segunda.save()
+        self.assertIn('robot', contexto.exception.detail)
+        self.assertEqual(Jornada.objects.filter(hora_inicio=time(12, 0)).count(), 1)
+
+    def test_inactivas_no_bloquean(self):
+        """Prueba que una jornada inactiva no reserva sus recursos"""
+        Jornada.objects.filter(pk=self.jornada.pk).update(activo=False)
+        response = self.client.post(reverse('jornada-crear'), self.datos('09:00', '11:00'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_actualizar(self):
+        """Prueba que una jornada no choca consigo misma y que una edición parcial se verifica"""
+        otra = Jornada.objects.create(
+            fecha=date(2024, 5, 6), hora_inicio=time(12, 0), hora_fin=time(14, 0),
+            duracion=timedelta(hours=2), area_tratada=100, robot=self.robot, tanque=self.otro_tanque
+        )
+        url = reverse('jornada-update', args=[self.jornada.id_jornada])
+        response = self.client.put(url, self.datos('08:30', '10:30'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        url = reverse('jornada-update', args=[otra.id_jornada])
+        response = self.client.patch(url, {'hora_inicio': '10:00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f'jornada {self.jornada.id_jornada}', response.data['robot'][0])
+
+    def test_verificar_planificacion(self):
+        """Prueba que la verificación informa los choques entre propuestas y con jornadas guardadas"""
+        propuesta = {'fecha': '2024-05-06', 'robot_id': self.otro_robot.id_robot, 'tanque_id': self.otro_tanque.id_tanque}
+        datos = [
+            {**propuesta, 'hora_inicio': '07:00', 'hora_fin': '09:00', 'robot_id': self.robot.id_robot},
+            {**propuesta, 'hora_inicio': '08:30', 'hora_fin': '09:30'},
+            {**propuesta, 'hora_inicio': '09:30', 'hora_fin': '11:00'},
+            {**propuesta, 'hora_inicio': '08:00', 'hora_fin': '10:00', 'fecha': '2024-05-07'},
+        ]
+        with self.assertNumQueries(3):
+            response = self.client.post(reverse('jornada-verificar'), datos, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['valida'])
+        self.assertEqual(
+            [(c['indice'], c['con'], c['recurso'], c['desde'], c['hasta']) for c in response.data['conflictos']],
+            [
+                (0, {'id_jornada': self.jornada.id_jornada}, 'robot', time(8, 0), time(9, 0)),
+                (0, {'indice': 1}, 'tanque', time(8, 30), time(9, 0)),
+            ]
+        )
+
+        response = self.client.post(reverse('jornada-verificar'), datos[2:], format='json')
+        self.assertEqual(response.data, {'valida': True, 'conflictos': []})
+
+    def test_verificar_invalida(self):
+        """Prueba los errores por índice de la verificación"""
+        datos = [
+            {'fecha': '2024-05-06', 'hora_inicio': '08:00', 'hora_fin': '07:00', 'robot_id': 1, 'tanque_id': 1},
+            {'fecha': '2024-05-06', 'hora_inicio': '08:00', 'hora_fin': '09:00',
+             'robot_id': 999, 'tanque_id': self.tanque.id_tanque},
+        ]
+        response = self.client.post(reverse('jornada-verificar'), datos, format='json')
+        self.assertEqual([error['indice'] for error in response.data['errores']], [0])
+        response = self.client.post(reverse('jornada-verificar'), datos[1:], format='json')
+        self.assertEqual(response.data['errores'], [{'indice': 0, 'errores': {'robot_id': ['El robot 999 no existe']}}])
+
+    def test_barrido_equivale_a_comparar_pares(self):
+        """Prueba la línea de barrido contra la comparación de todos los pares"""
+        azar = random.Random(7)
+        propuestas = []
+        for _ in range(120):
+            inicio = azar.randrange(6, 18)
+            propuestas.append({
+                'fecha': date(2024, 5, 6) + timedelta(days=azar.randrange(3)),
+                'hora_inicio': time(inicio, 0), 'hora_fin': time(inicio + azar.randrange(1, 5), 0),
+                'robot_id': azar.choice([self.robot.id_robot, self.otro_robot.id_robot]),
+                'tanque_id': azar.choice([self.tanque.id_tanque, self.otro_tanque.id_tanque]),
+            })
+        esperado = set()
+        for i, a in enumerate(propuestas):
+            for j, b in enumerate(propuestas[i + 1:], start=i + 1):
+                if a['fecha'] == b['fecha'] and a['hora_inicio'] < b['hora_fin'] and b['hora_inicio'] < a['hora_fin']:
+                    for recurso in ('robot', 'tanque'):
+                        if a[f'{recurso}_id'] == b[f'{recurso}_id']:
+                            esperado.add((i, j, recurso))
+            if (a['fecha'] == self.jornada.fecha and a['hora_inicio'] < self.jornada.hora_fin
+                    and self.jornada.hora_inicio < a['hora_fin']):
+                for recurso, id_recurso in (('robot', self.robot.id_robot), ('tanque', self.tanque.id_tanque)):
+                    if a[f'{recurso}_id'] == id_recurso:
+                        esperado.add((i, ('id_jornada', self.jornada.id_jornada), recurso))
+
+        obtenido = set()
+        for conflicto in conflictos_en_lote(propuestas):
+            (origen, valor), = conflicto['con'].items()
+            otro = valor if origen == 'indice' else (origen, valor)
+            obtenido.add((conflicto['indice'], otro, conflicto['recurso']))
+        self.assertEqual(obtenido, esperado)
+
+
+class JornadaRecurrenteTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.robot = Robot.objects.create(nombre='Robot 1')
+        self.tanque = Tanque.objects.create(nombre='Tanque 1', capacidad=100)
+        self.url = reverse('jornada-recurrentes')
+        self.client.force_authenticate(user=self.user)
+
+    def regla(self, **kwargs):
+        datos = {
+            # 2024-05-06 es lunes
+            'desde': '2024-05-06', 'hasta': '2024-06-02', 'dias': [0, 2, 4],
+            'hora_inicio': '08:00', 'hora_fin': '11:30', 'area_tratada': 25,
+            'robot_id': self.robot.id_robot, 'tanque_id': self.tanque.id_tanque,
+        }
+        datos.update(kwargs)
+        return datos
+
+    def test_generar_temporada(self):
+        """Prueba que la regla se expande y se inserta con consultas fijas"""
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.post(self.url, self.regla(), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # robots y tanques (validación y bloqueo), jornadas existentes e INSERT, sin contar los savepoints
+        consultas = [q['sql'] for q in contexto.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(len(consultas), 6)
+        self.assertTrue(consultas[-1].startswith('INSERT'))
+        self.assertEqual(response.data['creadas'], 12)
+        jornadas = Jornada.objects.order_by('fecha')
+        self.assertEqual(sorted(response.data['ids']), sorted(j.id_jornada for j in jornadas))
+        self.assertEqual({j.fecha.weekday() for j in jornadas}, {0, 2, 4})
+        self.assertEqual(jornadas[0].duracion, timedelta(hours=3, minutes=30))
+
+    def test_cada_dos_semanas(self):
+        """Prueba la recurrencia cada N semanas contada desde la semana de inicio"""
+        response = self.client.post(self.url, self.regla(desde='2024-05-08', dias=[0, 3], cada_semanas=2), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(Jornada.objects.order_by('fecha').values_list('fecha', flat=True)),
+            [date(2024, 5, 9), date(2024, 5, 20), date(2024, 5, 23)]
+        )
+
+    def test_conflictos(self):
+        """Prueba que un choque cancela toda la regla salvo que se pidan omitir las fechas en conflicto"""
+        existente = Jornada.objects.create(
+            fecha=date(2024, 5, 8), hora_inicio=time(11, 0), hora_fin=time(12, 0),
+            duracion=timedelta(hours=1), area_tratada=10, robot=self.robot, tanque=self.tanque
+        )
+        response = self.client.post(self.url, self.regla(), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual({c['con']['id_jornada'] for c in response.data['conflictos']}, {existente.id_jornada})
+        self.assertEqual(Jornada.objects.count(), 1)
+
+        response = self.client.post(self.url, self.regla(omitir_conflictos=True), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['creadas'], 11)
+        self.assertEqual({c['fecha'] for c in response.data['omitidas']}, {date(2024, 5, 8)})
+        self.assertFalse(Jornada.objects.filter(fecha=date(2024, 5, 8)).exclude(pk=existente.pk).exists())
+
+    def test_regla_invalida(self):
+        """Prueba las reglas inválidas"""
+        for datos in (self.regla(dias=[]), self.regla(dias=[7]), self.regla(hora_fin='07:00'),
+                      self.regla(hasta='2024-05-01'), self.regla(hasta='2025-06-01'),
+                      self.regla(robot_id=999)):
+            response = self.client.post(self.url, datos, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Jornada.objects.exists())
+
+class JornadaCamposTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.robot = Robot.objects.create(nombre='Robot Test')
+        self.tanque = Tanque.objects.create(nombre='Tanque Test', capacidad=100)
+        Jornada.objects.bulk_create([
+            Jornada(
+                fecha=date(2024, 5, 1) + timedelta(days=i),
+                hora_inicio=time(8, 0), hora_fin=time(9, 0),
+                duracion=timedelta(hours=1), area_tratada=10,
+                robot=self.robot, tanque=self.tanque
+            )
+            for i in range(10)
+        ])
+        self.url = reverse('jornada-list')
+        self.client.force_authenticate(user=self.user)
+
+    def test_campos_y_columnas(self):
+        """Prueba que ?fields limita la respuesta y las columnas leídas, conservando el cursor"""
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.url, {'fields': 'id_jornada,area_tratada', 'page_size': 4})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(consultas), 1)
+        self.assertNotIn('T001HoraInicio', consultas[0]['sql'])
+        self.assertEqual(response.data['results'][0], {'id_jornada': Jornada.objects.latest('fecha').pk, 'area_tratada': 10})
+
+        # La fecha del cursor sigue disponible aunque no se pida
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 4)
+
+    def test_expandir_relaciones(self):
+        """Prueba que ?expand incrusta robot y tanque con un join en lugar de una consulta por jornada"""
+        fila = self.client.get(self.url).data['results'][0]
+        self.assertEqual(fila['robot'], self.robot.id_robot)
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.url, {'expand': 'robot,tanque'})
+        self.assertEqual(len(consultas), 1)
+        fila = response.data['results'][0]
+        self.assertEqual(fila['robot']['nombre'], 'Robot Test')
+        self.assertEqual(fila['tanque']['nombre'], 'Tanque Test')
+
+        jornada = Jornada.objects.first()
+        response = self.client.get(reverse('jornada-detail', args=[jornada.pk]), {'fields': 'fecha,robot', 'expand': 'robot'})
+        self.assertEqual(response.data, {'fecha': jornada.fecha.isoformat(), 'robot': fila['robot']})
+
+class JornadaLecturaRapidaTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        robot = Robot.objects.create(nombre='Robot Test')
+        tanque = Tanque.objects.create(nombre='Tanque Test', capacidad=100)
+        Jornada.objects.bulk_create([
+            Jornada(
+                fecha=date(2024, 5, 1) + timedelta(days=i // 2),
+                hora_inicio=time(8, i, 30), hora_fin=time(17, 45),
+                duracion=timedelta(hours=9, seconds=i), area_tratada=10.5 * i,
+                robot=robot, tanque=tanque, activo=bool(i % 4)
+            )
+            for i in range(9)
+        ])
+        self.url = reverse('jornada-list')
+        self.client.force_authenticate(user=self.user)
+
+    def test_misma_salida_que_el_serializer(self):
+        """Prueba que el listado rápido devuelve los mismos bytes que JornadaSerializer, página a página"""
+        response = self.client.get(self.url, {'page_size': 5})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids = [fila['id_jornada'] for fila in response.json()['results']]
+            jornadas = sorted(Jornada.objects.filter(pk__in=ids), key=lambda jornada: ids.index(jornada.pk))
+            esperado = JSONRenderer().render(JornadaSerializer(jornadas, many=True).data)
+            self.assertIn(esperado[1:-1], response.content)
+            if not response.json()['next']:
+                break
+            response = self.client.get(response.json()['next'])
+
+    def test_paginas_numeradas(self):
+        """Prueba que ?page= también usa la lectura rápida con el total de resultados"""
+        response = self.client.get(self.url, {'page': 1})
+        self.assertEqual(response.json()['count'], 9)
+        esperado = JornadaSerializer(Jornada.objects.order_by('-fecha', '-id_jornada'), many=True).data
+        self.assertIn(JSONRenderer().render(esperado)[1:-1], response.content)
@@ -2,24 +2,41 @@ from django.shortcuts import get_object_or_404
 from rest_framework.response import Response
 from rest_framework import generics, status
 from django.db.models import Q
+from django.utils import timezone
+from datetime import timedelta
 from rest_framework.exceptions import NotFound, ValidationError
+from django.utils.dateparse import parse_date
+from aspersax_api.campos import OptimizarConsultaMixin
+from aspersax_api.lectura import ListaRapidaMixin
+from aspersax_api.paginacion import PaginacionPorFecha
+from robots.models import Robot
+from tanques.models import Tanque
+from .calendario import AGRUPACIONES, calendario
+from .conflictos import conflictos_en_lote
 from .models import Jornada
-from .serializers import JornadaSerializer
+from .recurrencia import generar
+from .serializers import LECTURA_JORNADA, JornadaSerializer, JornadaPropuestaSerializer, RecurrenciaJornadaSerializer
 
-class JornadaList(generics.ListAPIView):
+# Máximo de jornadas propuestas por verificación
+MAX_JORNADAS_LOTE = 1000
+
+class JornadaList(ListaRapidaMixin, OptimizarConsultaMixin, generics.ListAPIView):
     queryset = Jornada.objects.all()
     serializer_class = JornadaSerializer
+    lectura_rapida = LECTURA_JORNADA
+    pagination_class = PaginacionPorFecha
 
 class CrearJornada(generics.CreateAPIView):
     queryset = Jornada.objects.all()
     serializer_class = JornadaSerializer
 
-class JornadaDetail(generics.RetrieveUpdateDestroyAPIView):
+class JornadaDetail(OptimizarConsultaMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Jornada.objects.all()
     serializer_class = JornadaSerializer
 
-class JornadaPorFecha(generics.ListAPIView):
+class JornadaPorFecha(OptimizarConsultaMixin, generics.ListAPIView):
     serializer_class = JornadaSerializer
+    pagination_class = PaginacionPorFecha
 
     def get_queryset(self):
         fecha = self.request.query_params.get('fecha', None)
@@ -33,6 +50,143 @@ class JornadaPorFecha(generics.ListAPIView):
         else:
             raise ValidationError("Debe proporcionar una fecha exacta o un rango de fechas (desde, hasta).")
 
+def _fecha_parametro(valor):
+    """
+    Fecha de un parámetro AAAA-MM-DD, o None si no se envió. Lanza
+    ValueError si el valor no es una fecha válida.
+    """
+    if not valor:
+        return None
+    fecha = parse_date(valor)
+    if fecha is None:
+        raise ValueError('Formato de fecha inválido')
+    return fecha
+
+class JornadaCalendario(generics.GenericAPIView):
+    """
+    Jornadas agregadas por día, semana o mes entre desde y hasta (por defecto
+    el mes en curso), opcionalmente de un solo robot.
+    """
+    def get(self, request, *args, **kwargs):
+        agrupar = request.query_params.get('agrupar', 'dia')
+        if agrupar not in AGRUPACIONES:
+            return Response(
+                {'error': f"Agrupación inválida. Use: {', '.join(AGRUPACIONES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        hoy = timezone.localdate()
+        try:
+            desde = _fecha_parametro(request.query_params.get('desde')) or hoy.replace(day=1)
+            hasta = _fecha_parametro(request.query_params.get('hasta'))
+            robot = request.query_params.get('robot')
+            robot = int(robot) if robot else None
+        except ValueError:
+            return Response(
+                {'error': 'Las fechas deben tener formato AAAA-MM-DD y el robot debe ser un número'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if hasta is None:
+            # Último día del mes de desde
+            hasta = (desde.replace(day=1) + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        if desde > hasta:
+            return Response(
+                {'error': 'La fecha desde no puede ser posterior a hasta'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({
+            'desde': desde,
+            'hasta': hasta,
+            'agrupar': agrupar,
+            'periodos': calendario(desde, hasta, agrupar, robot),
+        })
+
+class VerificarJornadas(generics.GenericAPIView):
+    """
+    Verifica una planificación (lista de jornadas propuestas) sin guardarla y
+    devuelve todos sus choques, entre sí y con las jornadas existentes.
+    """
+    serializer_class = JornadaPropuestaSerializer
+
+    def post(self, request, *args, **kwargs):
+        datos = request.data
+        if not isinstance(datos, list):
+            return Response(
+                {'error': 'Se esperaba una lista de jornadas'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(datos) > MAX_JORNADAS_LOTE:
+            return Response(
+                {'error': f'Se aceptan como máximo {MAX_JORNADAS_LOTE} jornadas por verificación'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = self.get_serializer(data=datos, many=True)
+        if not serializer.is_valid():
+            errores = [
+                {'indice': indice, 'errores': error}
+                for indice, error in enumerate(serializer.errors) if error
+            ]
+            return Response({'errores': errores}, status=status.HTTP_400_BAD_REQUEST)
+        propuestas = serializer.validated_data
+
+        errores = referencias_inexistentes(propuestas)
+        if errores:
+            return Response({'errores': errores}, status=status.HTTP_400_BAD_REQUEST)
+
+        conflictos = conflictos_en_lote(propuestas)
+        return Response({'valida': not conflictos, 'conflictos': conflictos})
+
+class CrearJornadasRecurrentes(generics.GenericAPIView):
+    """
+    Crea de una vez todas las jornadas de una regla recurrente (días de la
+    semana, horario, robot, tanque y rango de fechas). Si alguna fecha choca
+    con otra jornada no se crea ninguna, salvo con omitir_conflictos.
+    """
+    serializer_class = RecurrenciaJornadaSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        regla = serializer.validated_data
+
+        errores = referencias_inexistentes([regla])
+        if errores:
+            return Response(errores[0]['errores'], status=status.HTTP_400_BAD_REQUEST)
+
+        jornadas, conflictos = generar(regla)
+        if conflictos and not regla['omitir_conflictos']:
+            return Response({'conflictos': conflictos}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'creadas': len(jornadas),
+            'ids': [jornada.id_jornada for jornada in jornadas],
+            'omitidas': conflictos,
+        }, status=status.HTTP_201_CREATED)
+
+def referencias_inexistentes(propuestas):
+    """
+    Errores por índice de las propuestas con robot o tanque inexistente,
+    validados con una consulta por tabla.
+    """
+    robots = set(Robot.objects.filter(
+        pk__in={p['robot_id'] for p in propuestas}
+    ).values_list('pk', flat=True))
+    tanques = set(Tanque.objects.filter(
+        pk__in={p['tanque_id'] for p in propuestas}
+    ).values_list('pk', flat=True))
+
+    errores = []
+    for indice, propuesta in enumerate(propuestas):
+        error = {}
+        if propuesta['robot_id'] not in robots:
+            error['robot_id'] = [f'El robot {propuesta["robot_id"]} no existe']
+        if propuesta['tanque_id'] not in tanques:
+            error['tanque_id'] = [f'El tanque {propuesta["tanque_id"]} no existe']
+        if error:
+            errores.append({'indice': indice, 'errores': error})
+    return errores
+
 class JornadaUpdateView(generics.UpdateAPIView):
     queryset = Jornada.objects.all()
     serializer_class = JornadaSerializer
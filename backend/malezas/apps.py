@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MalezasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'malezas'
+
+    def ready(self):
+        from . import signals  # noqa: F401
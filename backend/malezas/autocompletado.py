@@ -0,0 +1,116 @@
+"""
+Autocompletado de nombres de malezas desde un trie en memoria.
+
+El trie contiene cada palabra del nombre y del nombre científico de las
+malezas activas, normalizada sin tildes ni mayúsculas. Se reconstruye cuando
+cambia la versión del tema 'malezas' (aspersax_api.versiones), igual que la
+instantánea de robots.flota.
+"""
+import threading
+import unicodedata
+from aspersax_api.versiones import versiones
+from .models import Maleza
+
+LIMITE_POR_DEFECTO = 10
+
+
+def normalizar(texto):
+    descompuesto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(letra for letra in descompuesto if not unicodedata.combining(letra))
+
+
+class Trie:
+    def __init__(self):
+        # Cada nodo es un dict de letra -> nodo; la clave None guarda los ids
+        # de las malezas cuya palabra termina en ese nodo.
+        self._raiz = {}
+
+    def agregar(self, palabra, id_maleza):
+        nodo = self._raiz
+        for letra in palabra:
+            nodo = nodo.setdefault(letra, {})
+        nodo.setdefault(None, []).append(id_maleza)
+
+    def buscar(self, prefijo, limite=None):
+        """
+        Ids de las malezas con alguna palabra que empieza por ``prefijo``, en
+        orden alfabético de la palabra y sin repetir. Sin ``limite`` devuelve
+        todos.
+        """
+        nodo = self._raiz
+        for letra in prefijo:
+            nodo = nodo.get(letra)
+            if nodo is None:
+                return []
+
+        encontrados = {}
+        pendientes = [nodo]
+        while pendientes and (limite is None or len(encontrados) < limite):
+            nodo = pendientes.pop()
+            for id_maleza in nodo.get(None, ()):
+                encontrados.setdefault(id_maleza, None)
+            # Al revés para que la pila saque primero la letra menor
+            letras = sorted((clave for clave in nodo if clave is not None), reverse=True)
+            pendientes.extend(nodo[letra] for letra in letras)
+        return list(encontrados)[:limite]
+
+
+class AutocompletadoMalezas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (versión, (trie, malezas y palabras por id)) en una sola tupla para leer ambos de forma atómica
+        self._actual = (None, None)
+
+    def _construir(self):
+        trie = Trie()
+        malezas = {}
+        palabras = {}
+        for id_maleza, nombre, nombre_cientifico in Maleza.objects.filter(activo=True).values_list(
+            'id_maleza', 'nombre', 'nombre_cientifico'
+        ):
+            malezas[id_maleza] = {'id_maleza': id_maleza, 'nombre': nombre, 'nombre_cientifico': nombre_cientifico}
+            palabras[id_maleza] = normalizar(f'{nombre} {nombre_cientifico or ""}').split()
+            for palabra in palabras[id_maleza]:
+                trie.agregar(palabra, id_maleza)
+        return trie, malezas, palabras
+
+    def _vigente(self):
+        version = versiones('malezas')[0]
+        vigente, datos = self._actual
+        if datos is not None and vigente == version:
+            return datos
+
+        with self._lock:
+            vigente, datos = self._actual
+            if datos is None or vigente != version:
+                datos = self._construir()
+                self._actual = (version, datos)
+        return datos
+
+    def invalidar(self):
+        with self._lock:
+            self._actual = (None, None)
+
+    def sugerir(self, texto, limite=LIMITE_POR_DEFECTO):
+        """
+        Malezas con una palabra del nombre o del nombre científico que empieza
+        por cada palabra de ``texto``. El trie resuelve la última palabra, que
+        es la que se está escribiendo; las anteriores filtran los candidatos.
+        """
+        *completas, prefijo = normalizar(texto).split() or ['']
+        if not prefijo:
+            return []
+        trie, malezas, palabras = self._vigente()
+        if not completas:
+            return [dict(malezas[id_maleza]) for id_maleza in trie.buscar(prefijo, limite)]
+
+        sugerencias = []
+        for id_maleza in trie.buscar(prefijo):
+            if all(any(palabra.startswith(termino) for palabra in palabras[id_maleza]) for termino in completas):
+                sugerencias.append(dict(malezas[id_maleza]))
+                if len(sugerencias) == limite:
+                    break
+        return sugerencias
+
+
+autocompletado = AutocompletadoMalezas()
@@ -0,0 +1,134 @@
+"""
+Búsqueda de texto completo en el catálogo de malezas.
+
+En SQLite se usa una tabla virtual FTS5 (T004MalezaBusqueda) con el nombre,
+el nombre científico, el tipo y la descripción de cada maleza, mantenida al
+día por las señales de malezas/signals.py. En PostgreSQL se usan índices GIN
+sobre el tsvector de las mismas columnas y trigramas sobre el nombre (ver la
+migración 0005), sin tabla auxiliar. Cualquier otra base recurre a icontains.
+
+Los términos se buscan por prefijo y sin distinguir tildes, y los resultados
+se ordenan por relevancia, con más peso para el nombre que para la descripción.
+"""
+import re
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+TABLA_SQLITE = 'T004MalezaBusqueda'
+
+# Peso de cada columna en el ranking: nombre, nombre científico, tipo, descripción
+PESOS = (10.0, 5.0, 2.0, 1.0)
+
+COLUMNAS = ('nombre', 'nombre_cientifico', 'tipo', 'descripcion')
+
+DOCUMENTO_PG = (
+    "setweight(to_tsvector('spanish', coalesce(\"T004Nombre\", '')), 'A') || "
+    "setweight(to_tsvector('spanish', coalesce(\"T004NombreCientifico\", '')), 'B') || "
+    "setweight(to_tsvector('spanish', coalesce(\"T004Tipo\", '')), 'C') || "
+    "setweight(to_tsvector('spanish', coalesce(\"T004Descripcion\", '')), 'D')"
+)
+
+
+def terminos(texto):
+    """
+    Palabras de la búsqueda, sin signos que el motor interpretaría como
+    operadores.
+    """
+    return re.findall(r'\w+', texto.lower())
+
+
+def _buscar_sqlite(queryset, palabras):
+    consulta = ' '.join(f'"{palabra}"*' for palabra in palabras)
+    pesos = ', '.join(str(peso) for peso in PESOS)
+    nombre = connection.ops.quote_name
+    tabla = nombre(TABLA_SQLITE)
+    opciones = queryset.model._meta
+    pk = f'{nombre(opciones.db_table)}.{nombre(opciones.pk.column)}'
+    return queryset.filter(
+        pk__in=RawSQL(f'SELECT rowid FROM {tabla} WHERE {tabla} MATCH %s', (consulta,))
+    ).annotate(
+        # bm25 es negativo: cuanto menor, más relevante
+        relevancia=RawSQL(
+            f'SELECT -bm25({tabla}, {pesos}) FROM {tabla} WHERE {tabla} MATCH %s AND rowid = {pk}',
+            (consulta,), output_field=FloatField(),
+        )
+    ).order_by('-relevancia', 'pk')
+
+
+def _buscar_postgresql(queryset, palabras):
+    consulta = ' & '.join(f'{palabra}:*' for palabra in palabras)
+    texto = ' '.join(palabras)
+    # El operador % de pg_trgm admite nombres con errores de tipeo
+    # (similitud mayor que pg_trgm.similarity_threshold, 0.3 por defecto)
+    return queryset.annotate(
+        coincide=RawSQL(
+            f"({DOCUMENTO_PG}) @@ to_tsquery('spanish', %s) OR \"T004Nombre\" %% %s",
+            (consulta, texto), output_field=BooleanField(),
+        ),
+        relevancia=RawSQL(
+            f"ts_rank({DOCUMENTO_PG}, to_tsquery('spanish', %s)) + similarity(\"T004Nombre\", %s)",
+            (consulta, texto), output_field=FloatField(),
+        ),
+    ).filter(coincide=True).order_by('-relevancia', 'pk')
+
+
+def _buscar_generico(queryset, palabras):
+    condicion = Q()
+    for palabra in palabras:
+        condicion &= Q(*[Q(**{f'{columna}__icontains': palabra}) for columna in COLUMNAS], _connector=Q.OR)
+    return queryset.filter(condicion).order_by('nombre', 'pk')
+
+
+def buscar_malezas(queryset, texto):
+    """
+    Filtra ``queryset`` con las malezas que contienen todas las palabras de
+    ``texto`` y las ordena por relevancia.
+    """
+    palabras = terminos(texto)
+    if connection.vendor == 'sqlite':
+        return _buscar_sqlite(queryset, palabras)
+    if connection.vendor == 'postgresql':
+        return _buscar_postgresql(queryset, palabras)
+    return _buscar_generico(queryset, palabras)
+
+
+def indexar(malezas):
+    """
+    Reemplaza las filas de búsqueda de las malezas indicadas. Solo aplica a
+    SQLite; en PostgreSQL los índices se mantienen solos.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    tabla = connection.ops.quote_name(TABLA_SQLITE)
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {tabla} WHERE rowid = %s', [(maleza.pk,) for maleza in malezas])
+        cursor.executemany(
+            f'INSERT INTO {tabla} (rowid, nombre, nombre_cientifico, tipo, descripcion) VALUES (%s, %s, %s, %s, %s)',
+            [(maleza.pk, *(getattr(maleza, columna) or '' for columna in COLUMNAS)) for maleza in malezas],
+        )
+
+
+def desindexar(ids):
+    if connection.vendor != 'sqlite':
+        return
+    tabla = connection.ops.quote_name(TABLA_SQLITE)
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {tabla} WHERE rowid = %s', [(pk,) for pk in ids])
+
+
+def reindexar():
+    """
+    Reconstruye toda la tabla de búsqueda. Necesario después de cargas con
+    bulk_create o update(), que no disparan señales.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    tabla = connection.ops.quote_name(TABLA_SQLITE)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {tabla}')
+        cursor.execute(
+            f'INSERT INTO {tabla} (rowid, nombre, nombre_cientifico, tipo, descripcion) '
+            'SELECT "T004IdMaleza", coalesce("T004Nombre", \'\'), coalesce("T004NombreCientifico", \'\'), '
+            'coalesce("T004Tipo", \'\'), coalesce("T004Descripcion", \'\') FROM "T004Maleza"'
+        )
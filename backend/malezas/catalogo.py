@@ -0,0 +1,114 @@
+"""
+Catálogo de malezas en memoria del proceso.
+
+T004Maleza es una tabla de referencia pequeña que casi no cambia, pero se lee
+en cada listado, en cada validación de maleza_id y en cada detalle anidado de
+un reporte. Cada proceso guarda una instantánea del catálogo (instancias y
+filas ya serializadas con MalezaSerializer) y la reutiliza mientras la versión
+del tema 'malezas' (aspersax_api.versiones) no cambie, igual que robots.flota.
+"""
+import copy
+import threading
+from aspersax_api.versiones import versiones
+from .models import Maleza
+
+
+def _normalizar(nombre):
+    return ' '.join(nombre.split()).casefold()
+
+
+class CacheCatalogo:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (versión, datos) en una sola tupla para leer ambos de forma atómica
+        self._actual = (None, None)
+
+    def _construir(self):
+        # Import local: serializers usa el catálogo para sus campos
+        from .serializers import MalezaSerializer
+        malezas = list(Maleza.objects.order_by('id_maleza'))
+        serializadas = MalezaSerializer(malezas, many=True).data
+        return {
+            'instancias': {maleza.pk: maleza for maleza in malezas},
+            'serializadas': {maleza.pk: dict(fila) for maleza, fila in zip(malezas, serializadas)},
+            'activas': [maleza.pk for maleza in malezas if maleza.activo],
+            # Nombre normalizado -> id; ante nombres repetidos gana la maleza activa
+            'nombres': {
+                _normalizar(maleza.nombre): maleza.pk
+                for maleza in sorted(malezas, key=lambda maleza: maleza.activo)
+            },
+        }
+
+    def _vigentes(self):
+        # La versión se lee antes que los datos, como en robots.flota
+        version = versiones('malezas')[0]
+        vigente, datos = self._actual
+        if datos is not None and vigente == version:
+            return datos
+
+        with self._lock:
+            vigente, datos = self._actual
+            if datos is None or vigente != version:
+                datos = self._construir()
+                self._actual = (version, datos)
+        return datos
+
+    def invalidar(self):
+        with self._lock:
+            self._actual = (None, None)
+
+    def obtener(self, id_maleza):
+        """
+        Maleza con ese id, o None si no existe. Devuelve una copia para que
+        quien la reciba pueda modificarla sin alterar el catálogo. Una maleza
+        creada en la transacción en curso aún no está en la instantánea y se
+        busca en la base de datos.
+        """
+        maleza = self._vigentes()['instancias'].get(id_maleza)
+        if maleza is None:
+            return Maleza.objects.filter(pk=id_maleza).first()
+        return copy.copy(maleza)
+
+    def existentes(self, ids):
+        """
+        Subconjunto de ``ids`` que corresponde a malezas existentes.
+        """
+        instancias = self._vigentes()['instancias']
+        encontrados = {pk for pk in ids if pk in instancias}
+        faltantes = set(ids) - encontrados
+        if faltantes:
+            encontrados.update(Maleza.objects.filter(pk__in=faltantes).values_list('pk', flat=True))
+        return encontrados
+
+    def id_por_nombre(self, nombre):
+        """
+        Id de la maleza con ese nombre (sin distinguir mayúsculas ni espacios
+        repetidos), o None si no existe.
+        """
+        id_maleza = self._vigentes()['nombres'].get(_normalizar(nombre))
+        if id_maleza is None:
+            id_maleza = Maleza.objects.filter(nombre__iexact=nombre.strip()).order_by('-activo').values_list(
+                'pk', flat=True
+            ).first()
+        return id_maleza
+
+    def serializada(self, id_maleza):
+        """
+        Maleza con ese id ya serializada con MalezaSerializer.
+        """
+        fila = self._vigentes()['serializadas'].get(id_maleza)
+        if fila is None:
+            from .serializers import MalezaSerializer
+            maleza = Maleza.objects.filter(pk=id_maleza).first()
+            return MalezaSerializer(maleza).data if maleza else None
+        return dict(fila)
+
+    def activas(self):
+        """
+        Malezas activas serializadas, en orden de id.
+        """
+        datos = self._vigentes()
+        return [dict(datos['serializadas'][pk]) for pk in datos['activas']]
+
+
+catalogo = CacheCatalogo()
@@ -0,0 +1,174 @@
+"""
+Importación masiva de detecciones de malezas (T005MalezaDetectada).
+
+Los robots suben su registro de detecciones como NDJSON (un objeto por línea)
+o CSV, opcionalmente comprimido con gzip. El cuerpo se lee línea a línea a
+medida que se procesa, sin cargarlo completo en memoria, y las detecciones se
+insertan con bulk_create en lotes de TAMANO_LOTE, en una transacción por
+tramo de filas consecutivas de la misma jornada.
+
+Cada jornada importada queda registrada en ImportacionDeteccion con la clave
+de idempotencia de la carga y la última línea guardada, en la misma
+transacción que sus detecciones. Una jornada puede aparecer en varios tramos
+no consecutivos: cada tramo se agrega al mismo registro. Si la carga se corta
+y se reintenta con la misma clave (el mismo archivo), las líneas ya guardadas
+de cada jornada se omiten y el resto se importa.
+"""
+import csv
+import gzip
+import itertools
+import json
+from django.db import transaction
+from jornadas.models import Jornada
+from .catalogo import catalogo
+from .models import ImportacionDeteccion, MalezaDetectada
+from .serializers import DeteccionImportadaSerializer
+
+TAMANO_LOTE = 1000
+
+# Errores devueltos en la respuesta; el resto solo se cuenta
+MAX_ERRORES = 100
+
+
+def abrir(stream, comprimido=False):
+    """
+    Líneas en bytes del cuerpo, descomprimidas a medida que se leen.
+    """
+    return gzip.GzipFile(fileobj=stream, mode='rb') if comprimido else stream
+
+
+def leer_ndjson(lineas):
+    """
+    (número de línea, fila) por cada línea no vacía. La fila es None si la
+    línea no es un objeto JSON.
+    """
+    for numero, linea in enumerate(lineas, start=1):
+        if not linea.strip():
+            continue
+        try:
+            fila = json.loads(linea)
+        except ValueError:
+            fila = None
+        yield numero, fila if isinstance(fila, dict) else None
+
+
+def leer_csv(lineas):
+    """
+    (número de línea, fila) por cada registro de un CSV con encabezado.
+    """
+    lector = csv.DictReader(linea.decode('utf-8-sig') for linea in lineas)
+    for fila in lector:
+        yield lector.line_num, fila
+
+
+def _id_jornada(fila):
+    try:
+        return int(fila['jornada'])
+    except (TypeError, KeyError, ValueError):
+        return None
+
+
+class ImportacionDetecciones:
+    def __init__(self, clave):
+        self.clave = clave
+        self.resultado = {'creadas': 0, 'omitidas': 0, 'jornadas': 0, 'total_errores': 0, 'errores': []}
+        # Valor recibido en "maleza" (id o nombre) -> id, para resolver cada valor una vez
+        self._malezas = {}
+
+    def importar(self, filas):
+        """
+        Importa las filas (pares de número de línea y dict) y devuelve el
+        resumen. Las filas inválidas se omiten y se informan por línea.
+        """
+        jornadas = set()
+        for id_jornada, grupo in itertools.groupby(filas, key=lambda item: _id_jornada(item[1] or {})):
+            with transaction.atomic():
+                # Bloquear la jornada ordena las cargas concurrentes con la misma clave
+                existe = id_jornada is not None and Jornada.objects.select_for_update().filter(pk=id_jornada).exists()
+                if existe:
+                    creadas, omitidas = self._importar_tramo(id_jornada, grupo)
+            if not existe:
+                for numero, fila in grupo:
+                    if self._validar(numero, fila) is not None:
+                        self._error(numero, {'jornada': [f'La jornada {id_jornada} no existe']})
+                continue
+
+            self.resultado['creadas'] += creadas
+            self.resultado['omitidas'] += omitidas
+            if creadas:
+                jornadas.add(id_jornada)
+            self.resultado['jornadas'] = len(jornadas)
+        return self.resultado
+
+    def _importar_tramo(self, id_jornada, grupo):
+        """
+        Inserta las líneas del tramo posteriores a la última ya guardada para
+        esta clave y jornada. Devuelve (creadas, omitidas).
+        """
+        registro, _ = ImportacionDeteccion.objects.get_or_create(clave=self.clave, jornada_id=id_jornada)
+        omitidas = 0
+        ultima = registro.ultima_linea
+
+        def nuevas():
+            nonlocal omitidas, ultima
+            for numero, fila in grupo:
+                if numero <= registro.ultima_linea:
+                    omitidas += 1
+                    continue
+                ultima = numero
+                yield numero, fila
+
+        creadas = self._insertar(id_jornada, nuevas())
+        if ultima != registro.ultima_linea:
+            registro.filas += creadas
+            registro.ultima_linea = ultima
+            registro.save(update_fields=['filas', 'ultima_linea'])
+        return creadas, omitidas
+
+    def _insertar(self, id_jornada, grupo):
+        creadas = 0
+        lote = []
+        for numero, fila in grupo:
+            deteccion = self._validar(numero, fila)
+            if deteccion is None:
+                continue
+            lote.append(MalezaDetectada(jornada_id=id_jornada, **deteccion))
+            if len(lote) == TAMANO_LOTE:
+                MalezaDetectada.objects.bulk_create(lote)
+                creadas += len(lote)
+                lote = []
+        MalezaDetectada.objects.bulk_create(lote)
+        return creadas + len(lote)
+
+    def _validar(self, numero, fila):
+        """
+        Campos de la detección listos para MalezaDetectada, o None si la fila
+        es inválida (el error queda registrado).
+        """
+        if fila is None:
+            self._error(numero, {'fila': ['No es un objeto JSON válido']})
+            return None
+        serializer = DeteccionImportadaSerializer(data=fila)
+        if not serializer.is_valid():
+            self._error(numero, serializer.errors)
+            return None
+
+        datos = serializer.validated_data
+        id_maleza = self._resolver_maleza(datos['maleza'])
+        if id_maleza is None:
+            self._error(numero, {'maleza': [f'La maleza {datos["maleza"]} no existe']})
+            return None
+        return {'maleza_id': id_maleza, 'ubicacion': datos['ubicacion'], 'densidad': datos['densidad']}
+
+    def _resolver_maleza(self, valor):
+        if valor not in self._malezas:
+            if valor.isdigit():
+                self._malezas[valor] = int(valor) if catalogo.existentes({int(valor)}) else None
+            else:
+                self._malezas[valor] = catalogo.id_por_nombre(valor)
+        return self._malezas[valor]
+
+    def _error(self, numero, errores):
+        self.resultado['total_errores'] += 1
+        if len(self.resultado['errores']) < MAX_ERRORES:
+            self.resultado['errores'].append({'linea': numero, 'errores': errores})
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('malezas', '0003_remove_maleza_nombre_comun_maleza_nombre_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='maleza',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['tipo'], name='T004_activo_tipo_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations
+
+SQLITE_CREAR = [
+    'CREATE VIRTUAL TABLE "T004MalezaBusqueda" USING fts5('
+    "nombre, nombre_cientifico, tipo, descripcion, "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    'INSERT INTO "T004MalezaBusqueda" (rowid, nombre, nombre_cientifico, tipo, descripcion) '
+    'SELECT "T004IdMaleza", coalesce("T004Nombre", \'\'), coalesce("T004NombreCientifico", \'\'), '
+    'coalesce("T004Tipo", \'\'), coalesce("T004Descripcion", \'\') FROM "T004Maleza"',
+]
+SQLITE_ELIMINAR = ['DROP TABLE IF EXISTS "T004MalezaBusqueda"']
+
+# La expresión debe coincidir con malezas.busqueda.DOCUMENTO_PG para que se use el índice
+POSTGRESQL_CREAR = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX "T004_busqueda_idx" ON "T004Maleza" USING gin (('
+    "setweight(to_tsvector('spanish', coalesce(\"T004Nombre\", '')), 'A') || "
+    "setweight(to_tsvector('spanish', coalesce(\"T004NombreCientifico\", '')), 'B') || "
+    "setweight(to_tsvector('spanish', coalesce(\"T004Tipo\", '')), 'C') || "
+    "setweight(to_tsvector('spanish', coalesce(\"T004Descripcion\", '')), 'D')))",
+    'CREATE INDEX "T004_nombre_trgm_idx" ON "T004Maleza" USING gin ("T004Nombre" gin_trgm_ops)',
+]
+POSTGRESQL_ELIMINAR = [
+    'DROP INDEX IF EXISTS "T004_busqueda_idx"',
+    'DROP INDEX IF EXISTS "T004_nombre_trgm_idx"',
+]
+
+
+def _ejecutar(sentencias):
+    def operacion(apps, schema_editor):
+        for sentencia in sentencias.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sentencia)
+    return operacion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('malezas', '0004_maleza_t004_activo_tipo_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _ejecutar({'sqlite': SQLITE_CREAR, 'postgresql': POSTGRESQL_CREAR}),
+            _ejecutar({'sqlite': SQLITE_ELIMINAR, 'postgresql': POSTGRESQL_ELIMINAR}),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-17 21:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jornadas', '0002_jornada_t001_fecha_id_idx'),
+        ('malezas', '0005_busqueda_texto_completo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportacionDeteccion',
+            fields=[
+                ('id_importacion', models.BigAutoField(db_column='T012IdImportacion', editable=False, primary_key=True, serialize=False)),
+                ('clave', models.CharField(db_column='T012Clave', max_length=100)),
+                ('filas', models.PositiveIntegerField(db_column='T012Filas', default=0)),
+                ('fecha', models.DateTimeField(auto_now_add=True, db_column='T012Fecha')),
+                ('jornada', models.ForeignKey(db_column='T012IdJornada', on_delete=django.db.models.deletion.CASCADE, related_name='importaciones', to='jornadas.jornada')),
+            ],
+            options={
+                'verbose_name': 'Importación de Detecciones',
+                'verbose_name_plural': 'Importaciones de Detecciones',
+                'db_table': 'T012ImportacionDeteccion',
+                'unique_together': {('clave', 'jornada')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+# Los registros anteriores cubren la jornada completa: se omiten todas sus líneas
+LINEA_MAXIMA = 2147483647
+
+
+def marcar_completas(apps, schema_editor):
+    ImportacionDeteccion = apps.get_model('malezas', 'ImportacionDeteccion')
+    ImportacionDeteccion.objects.update(ultima_linea=LINEA_MAXIMA)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('malezas', '0006_importaciondeteccion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importaciondeteccion',
+            name='ultima_linea',
+            field=models.PositiveIntegerField(db_column='T012UltimaLinea', default=0),
+        ),
+        migrations.RunPython(marcar_completas, migrations.RunPython.noop),
+    ]
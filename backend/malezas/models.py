@@ -26,6 +26,9 @@ class Maleza(models.Model):
         db_table = 'T004Maleza'
         verbose_name = 'Maleza'
         verbose_name_plural = 'Malezas'
+        indexes = [
+            models.Index(fields=['tipo'], name='T004_activo_tipo_idx', condition=models.Q(activo=True)),
+        ]
 
 class MalezaDetectada(models.Model):
     id = models.AutoField(primary_key=True, editable=False, db_column='T005IdMalezaDetectada')
@@ -43,4 +46,27 @@ class MalezaDetectada(models.Model):
     class Meta:
         db_table = 'T005MalezaDetectada'
         verbose_name = 'Maleza Detectada'
-        verbose_name_plural = 'Malezas Detectadas'
\ No newline at end of file
+        verbose_name_plural = 'Malezas Detectadas'
+
+class ImportacionDeteccion(models.Model):
+    """
+    Jornadas ya importadas con cada clave de idempotencia y la última línea
+    del archivo guardada para cada una. Se escribe en la misma transacción
+    que las detecciones de la jornada, así que reintentar una carga con la
+    misma clave omite exactamente lo que ya se guardó.
+    """
+    id_importacion = models.BigAutoField(primary_key=True, editable=False, db_column='T012IdImportacion')
+    clave = models.CharField(max_length=100, db_column='T012Clave')
+    jornada = models.ForeignKey(Jornada, on_delete=models.CASCADE, related_name='importaciones', db_column='T012IdJornada')
+    filas = models.PositiveIntegerField(default=0, db_column='T012Filas')
+    ultima_linea = models.PositiveIntegerField(default=0, db_column='T012UltimaLinea')
+    fecha = models.DateTimeField(auto_now_add=True, db_column='T012Fecha')
+
+    def __str__(self):
+        return f"Importación {self.clave} - Jornada {self.jornada_id}"
+
+    class Meta:
+        db_table = 'T012ImportacionDeteccion'
+        verbose_name = 'Importación de Detecciones'
+        verbose_name_plural = 'Importaciones de Detecciones'
+        unique_together = ('clave', 'jornada')
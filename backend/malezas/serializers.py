@@ -1,14 +1,76 @@
 from rest_framework import serializers
+from aspersax_api.campos import CamposDinamicosMixin
+from aspersax_api.lectura import Columna, LecturaRapida
+from .catalogo import catalogo
 from .models import Maleza, MalezaDetectada
 
-class MalezaSerializer(serializers.ModelSerializer):
+class MalezaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Maleza
         fields = ['id_maleza', 'nombre', 'nombre_cientifico', 'tipo',
                  'descripcion', 'temporada', 'resistencia_herbicida', 'activo']
         read_only_fields = ['id_maleza']
 
-class MalezaDetectadaSerializer(serializers.ModelSerializer):
+class MalezaCatalogoField(serializers.PrimaryKeyRelatedField):
+    """
+    Clave de una maleza resuelta contra el catálogo en memoria en lugar de
+    una consulta por valor.
+    """
+    def __init__(self, **kwargs):
+        kwargs.setdefault('queryset', Maleza.objects.all())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            id_maleza = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        maleza = catalogo.obtener(id_maleza)
+        if maleza is None:
+            self.fail('does_not_exist', pk_value=data)
+        return maleza
+
+class MalezaAnidadaField(serializers.Field):
+    """
+    Maleza anidada de solo lectura, tomada ya serializada del catálogo. Solo
+    lee el id de la relación, así que no hace falta cargar la maleza.
+    """
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return getattr(instance, f'{self.source}_id')
+
+    def to_representation(self, value):
+        return catalogo.serializada(value)
+
+class MalezaDetectadaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    maleza = MalezaCatalogoField()
+
     class Meta:
         model = MalezaDetectada
-        fields = '__all__'  
\ No newline at end of file
+        fields = '__all__'
+        expandibles = {'maleza': MalezaAnidadaField}
+
+# Mismas columnas y orden que MalezaDetectadaSerializer, para la lectura rápida
+LECTURA_DETECCION = LecturaRapida((
+    Columna('id'),
+    Columna('maleza'),
+    Columna('ubicacion'),
+    Columna('densidad'),
+    Columna('activo'),
+    Columna('jornada'),
+))
+
+class DeteccionImportadaSerializer(serializers.Serializer):
+    """
+    Fila de una importación de detecciones. ``maleza`` acepta el id o el
+    nombre; ambos se resuelven contra el catálogo en la importación.
+    """
+    jornada = serializers.IntegerField()
+    maleza = serializers.CharField(max_length=100)
+    ubicacion = serializers.CharField(max_length=200)
+    densidad = serializers.CharField(max_length=50)
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .busqueda import indexar, desindexar
+from .models import Maleza
+
+
+@receiver(post_save, sender=Maleza)
+def indexar_maleza(sender, instance, raw=False, **kwargs):
+    # Mantener la tabla de búsqueda de texto completo al día
+    if raw:
+        return
+    indexar([instance])
+
+
+@receiver(post_delete, sender=Maleza)
+def desindexar_maleza(sender, instance, **kwargs):
+    desindexar([instance.pk])
@@ -2,13 +2,21 @@ from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from django.contrib.auth import get_user_model
-from .models import Maleza, MalezaDetectada
+from .models import Maleza, MalezaDetectada, ImportacionDeteccion
+from .autocompletado import autocompletado
+from .catalogo import catalogo
+from rest_framework.renderers import JSONRenderer
+from .serializers import LECTURA_DETECCION, MalezaDetectadaSerializer
 from jornadas.models import Jornada
 from robots.models import Robot
 from tanques.models import Tanque
 from datetime import datetime, timedelta, date, time
 from decimal import Decimal
+from unittest import mock
+import gzip
+import json
 
 User = get_user_model()
 
@@ -199,3 +207,346 @@ class MalezaDetectadaTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['ubicacion'], 'Sector A')
+
+
+class MalezaBusquedaTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.bledo = Maleza.objects.create(
+            nombre='Bledo', nombre_cientifico='Amaranthus hybridus', tipo='Hoja Ancha',
+            descripcion='Planta anual de crecimiento rápido'
+        )
+        self.pasto = Maleza.objects.create(
+            nombre='Pasto amargo', nombre_cientifico='Digitaria insularis', tipo='Gramínea',
+            descripcion='Perenne, se confunde con el bledo en etapas tempranas'
+        )
+        self.yuyo = Maleza.objects.create(
+            nombre='Yuyo colorado', nombre_cientifico='Amaranthus quitensis', tipo='Hoja Ancha'
+        )
+        # Las versiones solo cambian al confirmar; cada prueba parte sin trie armado
+        autocompletado.invalidar()
+        self.client.force_authenticate(user=self.user)
+
+    def buscar(self, q, **params):
+        response = self.client.get(reverse('maleza-buscar'), {'q': q, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [maleza['nombre'] for maleza in response.data['results']]
+
+    def test_ordena_por_relevancia(self):
+        """Prueba que una coincidencia en el nombre pesa más que una en la descripción"""
+        self.assertEqual(self.buscar('bledo'), ['Bledo', 'Pasto amargo'])
+
+    def test_prefijo_sin_tildes_y_varias_palabras(self):
+        """Prueba la búsqueda por prefijo, sin distinguir tildes y con todas las palabras"""
+        self.assertEqual(self.buscar('graminea'), ['Pasto amargo'])
+        self.assertEqual(set(self.buscar('amaran')), {'Bledo', 'Yuyo colorado'})
+        self.assertEqual(self.buscar('amaranthus quit'), ['Yuyo colorado'])
+        # Los signos del usuario no se interpretan como operadores
+        self.assertEqual(self.buscar('"bledo"* -'), ['Bledo', 'Pasto amargo'])
+
+    def test_paginacion_y_termino_invalido(self):
+        """Prueba que los resultados se paginan y que un término vacío se rechaza"""
+        self.assertEqual(len(self.buscar('hoja', page_size=1)), 1)
+        response = self.client.get(reverse('maleza-buscar'), {'q': 'hoja'})
+        self.assertEqual(response.data['count'], 2)
+        for q in ('', '  ', '**'):
+            response = self.client.get(reverse('maleza-buscar'), {'q': q})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_indice_sigue_los_cambios(self):
+        """Prueba que renombrar, desactivar o borrar una maleza se refleja en la búsqueda"""
+        self.yuyo.nombre = 'Ataco'
+        self.yuyo.save()
+        self.assertEqual(self.buscar('yuyo'), [])
+        self.assertEqual(self.buscar('ataco'), ['Ataco'])
+
+        self.pasto.activo = False
+        self.pasto.save()
+        self.assertEqual(self.buscar('bledo'), ['Bledo'])
+
+        self.bledo.delete()
+        self.assertEqual(self.buscar('bledo'), [])
+
+    def test_autocompletar(self):
+        """Prueba las sugerencias por prefijo de nombre y nombre científico"""
+        url = reverse('maleza-autocompletar')
+        response = self.client.get(url, {'q': 'ama'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # En orden alfabético de la palabra: amaranthus < amargo
+        self.assertEqual([m['nombre'] for m in response.data], ['Bledo', 'Yuyo colorado', 'Pasto amargo'])
+
+        response = self.client.get(url, {'q': 'ama', 'limite': 1})
+        self.assertEqual([m['nombre'] for m in response.data], ['Bledo'])
+        response = self.client.get(url, {'q': 'amaranthus QUÍ'})
+        self.assertEqual([m['nombre'] for m in response.data], ['Yuyo colorado'])
+        response = self.client.get(url, {'q': 'ama', 'limite': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_autocompletar_desde_memoria(self):
+        """Prueba que el trie se reutiliza y se reconstruye al cambiar el catálogo"""
+        autocompletado.sugerir('bl')
+        with self.assertNumQueries(0):
+            self.assertEqual(len(autocompletado.sugerir('bl')), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Maleza.objects.create(nombre='Blanquilla')
+        self.assertEqual([m['nombre'] for m in autocompletado.sugerir('bl')], ['Blanquilla', 'Bledo'])
+
+
+class MalezaCatalogoTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.bledo = Maleza.objects.create(nombre='Bledo', tipo='Hoja Ancha')
+        self.inactiva = Maleza.objects.create(nombre='Sorgo de Alepo', activo=False)
+        # Las versiones solo cambian al confirmar; cada prueba parte sin catálogo cargado
+        catalogo.invalidar()
+        self.client.force_authenticate(user=self.user)
+
+    def test_listado_desde_memoria_con_etag(self):
+        """Prueba que el listado sale del catálogo y responde 304 mientras no cambie"""
+        url = reverse('maleza-list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([m['nombre'] for m in response.data['results']], ['Bledo'])
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.data['count'], 1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Maleza.objects.create(nombre='Yuyo colorado')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([m['nombre'] for m in response.data['results']], ['Bledo', 'Yuyo colorado'])
+
+    def test_resuelve_claves_desde_memoria(self):
+        """Prueba que validar maleza_id no consulta la base y devuelve una copia"""
+        catalogo.activas()
+        campo = MalezaDetectadaSerializer().fields['maleza']
+        with self.assertNumQueries(0):
+            maleza = campo.to_internal_value(str(self.inactiva.id_maleza))
+            self.assertEqual(catalogo.existentes({self.bledo.id_maleza}), {self.bledo.id_maleza})
+        self.assertEqual(catalogo.existentes({self.bledo.id_maleza, 999}), {self.bledo.id_maleza})
+        self.assertEqual(maleza.nombre, 'Sorgo de Alepo')
+        maleza.nombre = 'Cambiado'
+        self.assertEqual(catalogo.obtener(self.inactiva.id_maleza).nombre, 'Sorgo de Alepo')
+
+        with self.assertRaises(ValidationError):
+            campo.run_validation(999)
+
+    def test_campos_y_expansion(self):
+        """Prueba ?fields en el listado del catálogo y la maleza expandida de una detección"""
+        response = self.client.get(reverse('maleza-list'), {'fields': 'id_maleza,nombre'})
+        self.assertEqual(response.data['results'], [{'id_maleza': self.bledo.pk, 'nombre': 'Bledo'}])
+
+        robot = Robot.objects.create(nombre='Robot Test')
+        tanque = Tanque.objects.create(nombre='Tanque Test', capacidad=100)
+        jornada = Jornada.objects.create(
+            fecha=date(2024, 5, 1), hora_inicio=time(8, 0), hora_fin=time(9, 0),
+            duracion=timedelta(hours=1), area_tratada=10, robot=robot, tanque=tanque
+        )
+        deteccion = MalezaDetectada.objects.create(jornada=jornada, maleza=self.bledo, ubicacion='A1', densidad='Alta')
+        catalogo.activas()
+        with self.assertNumQueries(0):
+            datos = MalezaDetectadaSerializer(deteccion, campos=['maleza', 'densidad'], expandir=['maleza']).data
+        self.assertEqual(datos, {'maleza': catalogo.serializada(self.bledo.pk), 'densidad': 'Alta'})
+        self.assertEqual(MalezaDetectadaSerializer(deteccion).data['maleza'], self.bledo.pk)
+
+    def test_lectura_rapida_detecciones(self):
+        """Prueba que la lectura rápida de detecciones produce los mismos bytes que el serializer"""
+        robot = Robot.objects.create(nombre='Robot Test')
+        tanque = Tanque.objects.create(nombre='Tanque Test', capacidad=100)
+        jornada = Jornada.objects.create(
+            fecha=date(2024, 5, 1), hora_inicio=time(8, 0), hora_fin=time(9, 0),
+            duracion=timedelta(hours=1), area_tratada=10, robot=robot, tanque=tanque
+        )
+        for i in range(4):
+            MalezaDetectada.objects.create(
+                jornada=jornada, maleza=self.bledo, ubicacion=f'Sector {i}', densidad='Media', activo=bool(i % 2)
+            )
+        detecciones = MalezaDetectada.objects.order_by('pk')
+        self.assertEqual(
+            JSONRenderer().render(LECTURA_DETECCION.filas(LECTURA_DETECCION.consulta(detecciones))),
+            JSONRenderer().render(MalezaDetectadaSerializer(detecciones, many=True).data)
+        )
+
+    def test_maleza_nueva_antes_de_confirmar(self):
+        """Prueba que una maleza aún no incluida en el catálogo se busca en la base"""
+        catalogo.activas()
+        nueva = Maleza.objects.create(nombre='Nueva')
+        self.assertEqual(catalogo.obtener(nueva.id_maleza).nombre, 'Nueva')
+        self.assertEqual(catalogo.serializada(nueva.id_maleza)['nombre'], 'Nueva')
+        self.assertEqual(catalogo.existentes({nueva.id_maleza}), {nueva.id_maleza})
+
+
+class ImportarDeteccionesTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.bledo = Maleza.objects.create(nombre='Bledo')
+        self.yuyo = Maleza.objects.create(nombre='Yuyo colorado')
+        catalogo.invalidar()
+        robot = Robot.objects.create(nombre='Robot Test')
+        tanque = Tanque.objects.create(nombre='Tanque Test', capacidad=100)
+        self.jornadas = [
+            Jornada.objects.create(
+                robot=robot, tanque=tanque, fecha=date.today(), hora_inicio=time(8, 0),
+                hora_fin=time(10, 0), duracion=timedelta(hours=2), area_tratada=100.0
+            )
+            for _ in range(2)
+        ]
+        self.url = reverse('maleza-detecciones-importar')
+        self.client.force_authenticate(user=self.user)
+
+    def filas(self):
+        primera, segunda = (jornada.id_jornada for jornada in self.jornadas)
+        return [
+            {'jornada': primera, 'maleza': self.bledo.id_maleza, 'ubicacion': 'Sector A', 'densidad': 'Alta'},
+            {'jornada': primera, 'maleza': 'yuyo  COLORADO', 'ubicacion': 'Sector B', 'densidad': 'Baja'},
+            {'jornada': segunda, 'maleza': 'Bledo', 'ubicacion': 'Sector C', 'densidad': 'Media'},
+        ]
+
+    def ndjson(self, filas):
+        return ''.join(json.dumps(fila) + '\n' for fila in filas).encode()
+
+    def subir(self, cuerpo, clave='carga-1', content_type='application/x-ndjson', **extra):
+        if clave:
+            extra['HTTP_IDEMPOTENCY_KEY'] = clave
+        return self.client.generic('POST', self.url, cuerpo, content_type=content_type, **extra)
+
+    def test_importar_ndjson(self):
+        """Prueba que se importan las detecciones resolviendo la maleza por id o por nombre"""
+        response = self.subir(self.ndjson(self.filas()))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['creadas'], response.data['jornadas'], response.data['errores']), (3, 2, []))
+        self.assertEqual(
+            list(MalezaDetectada.objects.order_by('id').values_list('maleza__nombre', 'ubicacion')),
+            [('Bledo', 'Sector A'), ('Yuyo colorado', 'Sector B'), ('Bledo', 'Sector C')]
+        )
+
+    def test_importar_csv_comprimido(self):
+        """Prueba un CSV con BOM comprimido con gzip, insertado en lotes"""
+        csv = '\ufeffjornada,maleza,ubicacion,densidad\n' + ''.join(
+            f'{fila["jornada"]},{fila["maleza"]},"{fila["ubicacion"]}, norte",{fila["densidad"]}\n'
+            for fila in self.filas()
+        )
+        with mock.patch('malezas.importacion.TAMANO_LOTE', 1):
+            response = self.subir(gzip.compress(csv.encode()), content_type='text/csv', HTTP_CONTENT_ENCODING='gzip')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['creadas'], 3)
+        self.assertEqual(MalezaDetectada.objects.filter(ubicacion='Sector A, norte').count(), 1)
+
+    def test_reintento_no_duplica(self):
+        """Prueba que reintentar con la misma clave omite las jornadas ya importadas"""
+        cuerpo = self.ndjson(self.filas())
+        self.subir(cuerpo)
+        response = self.subir(cuerpo)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['creadas'], response.data['omitidas']), (0, 3))
+        self.assertEqual(MalezaDetectada.objects.count(), 3)
+
+        # Otra clave es otra carga
+        self.assertEqual(self.subir(cuerpo, clave='carga-2').data['creadas'], 3)
+        self.assertEqual(ImportacionDeteccion.objects.count(), 4)
+
+    def test_archivo_cortado_y_reintento(self):
+        """Prueba que una carga cortada guarda las jornadas completas y el reintento importa el resto"""
+        filas = [
+            {'jornada': jornada.id_jornada, 'maleza': 'Bledo', 'ubicacion': f'Punto {i}', 'densidad': 'Alta'}
+            for jornada in self.jornadas for i in range(500)
+        ]
+        comprimido = gzip.compress(self.ndjson(filas))
+        response = self.subir(comprimido[:-10], HTTP_CONTENT_ENCODING='gzip')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # La segunda jornada estaba incompleta y se revirtió
+        self.assertEqual(response.data['creadas'], 500)
+        self.assertEqual(MalezaDetectada.objects.count(), 500)
+
+        response = self.subir(comprimido, HTTP_CONTENT_ENCODING='gzip')
+        self.assertEqual((response.data['creadas'], response.data['omitidas']), (500, 500))
+        self.assertEqual(MalezaDetectada.objects.filter(jornada=self.jornadas[1]).count(), 500)
+
+    def test_archivo_gzip_corrupto(self):
+        """Prueba que un cuerpo gzip con datos corruptos responde 400 en lugar de un error del servidor"""
+        comprimido = gzip.compress(self.ndjson(self.filas()))
+        # Cabecera gzip válida seguida de un bloque deflate inválido
+        response = self.subir(comprimido[:10] + b'\xff' * 32, HTTP_CONTENT_ENCODING='gzip')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], 'No se pudo leer el archivo')
+        self.assertEqual(response.data['creadas'], 0)
+        self.assertFalse(MalezaDetectada.objects.exists())
+
+    def test_jornadas_intercaladas(self):
+        """Prueba que una jornada que reaparece tras otra se agrega a su registro y el reintento no duplica"""
+        primera, segunda = (jornada.id_jornada for jornada in self.jornadas)
+        filas = [
+            {'jornada': id_jornada, 'maleza': 'Bledo', 'ubicacion': f'Punto {i}', 'densidad': 'Alta'}
+            for i, id_jornada in enumerate([primera, segunda, primera, primera])
+        ]
+        cuerpo = self.ndjson(filas)
+        response = self.subir(cuerpo)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            (response.data['creadas'], response.data['omitidas'], response.data['jornadas']), (4, 0, 2)
+        )
+        self.assertEqual(MalezaDetectada.objects.count(), 4)
+        registro = ImportacionDeteccion.objects.get(jornada=self.jornadas[0])
+        self.assertEqual((registro.filas, registro.ultima_linea), (3, 4))
+
+        response = self.subir(cuerpo)
+        self.assertEqual((response.data['creadas'], response.data['omitidas']), (0, 4))
+        self.assertEqual(MalezaDetectada.objects.count(), 4)
+
+    def test_jornadas_intercaladas_cortadas(self):
+        """Prueba que si se corta un tramo posterior de una jornada el reintento importa solo lo que falta"""
+        primera, segunda = (jornada.id_jornada for jornada in self.jornadas)
+        filas = [
+            {'jornada': id_jornada, 'maleza': 'Bledo', 'ubicacion': f'Punto {i}', 'densidad': 'Alta'}
+            for i, id_jornada in enumerate([primera] * 100 + [segunda] * 100 + [primera] * 500)
+        ]
+        comprimido = gzip.compress(self.ndjson(filas))
+        response = self.subir(comprimido[:-10], HTTP_CONTENT_ENCODING='gzip')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['creadas'], 200)
+
+        response = self.subir(comprimido, HTTP_CONTENT_ENCODING='gzip')
+        self.assertEqual((response.data['creadas'], response.data['omitidas']), (500, 200))
+        self.assertEqual(MalezaDetectada.objects.filter(jornada=self.jornadas[0]).count(), 600)
+
+    def test_filas_invalidas(self):
+        """Prueba que las filas inválidas se informan por línea y el resto se importa"""
+        filas = self.filas()
+        filas[1]['maleza'] = 'Inexistente'
+        filas.append({'jornada': 9999, 'maleza': 'Bledo', 'ubicacion': 'X', 'densidad': 'Alta'})
+        cuerpo = self.ndjson(filas[:2]) + b'{no es json\n' + self.ndjson(filas[2:])
+        response = self.subir(cuerpo)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['creadas'], 2)
+        errores = {error['linea']: error['errores'] for error in response.data['errores']}
+        self.assertEqual(list(errores), [2, 3, 5])
+        self.assertIn('maleza', errores[2])
+        self.assertIn('fila', errores[3])
+        self.assertIn('jornada', errores[5])
+
+    def test_encabezados_requeridos(self):
+        """Prueba que se exige la clave de idempotencia y un formato soportado"""
+        cuerpo = self.ndjson(self.filas())
+        self.assertEqual(self.subir(cuerpo, clave=None).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.subir(cuerpo, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        self.assertFalse(MalezaDetectada.objects.exists())
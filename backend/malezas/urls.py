@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import MalezaViewSet
+from .views import MalezaViewSet, ImportarDetecciones
 
 router = DefaultRouter()
 router.register(r'malezas', MalezaViewSet)
 
 urlpatterns = [
+    path('detecciones/importar/', ImportarDetecciones.as_view(), name='maleza-detecciones-importar'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,15 +1,42 @@
+import csv
+import zlib
 from django.shortcuts import get_object_or_404
 from rest_framework.response import Response
 from rest_framework import generics, status, viewsets
 from rest_framework.decorators import action
-from django.db.models import Q
+from rest_framework.pagination import PageNumberPagination
+from django.db.models import F, Q
 from rest_framework.exceptions import NotFound, ValidationError
+from django.utils.decorators import method_decorator
+from aspersax_api.campos import OptimizarConsultaMixin, campos_solicitados
+from aspersax_api.condicional import condicional
+from aspersax_api.lectura import ListaRapidaMixin
+from aspersax_api.paginacion import PaginacionPorFecha
+from .autocompletado import autocompletado, LIMITE_POR_DEFECTO
+from .busqueda import buscar_malezas, terminos
+from .catalogo import catalogo
+from .importacion import ImportacionDetecciones, abrir, leer_csv, leer_ndjson
 from .models import Maleza, MalezaDetectada
-from .serializers import MalezaSerializer, MalezaDetectadaSerializer
+from .serializers import LECTURA_DETECCION, MalezaSerializer, MalezaDetectadaSerializer, DeteccionImportadaSerializer
 from rest_framework.permissions import IsAuthenticated
 
+# Máximo de sugerencias por pedido de autocompletado
+MAX_SUGERENCIAS = 50
 
-class MalezaList(generics.ListCreateAPIView):
+# Formatos aceptados por la importación de detecciones, según el Content-Type
+LECTORES_DETECCIONES = {
+    'application/x-ndjson': leer_ndjson,
+    'text/csv': leer_csv,
+}
+
+
+class PaginacionBusqueda(PageNumberPagination):
+    # Los resultados van por relevancia, así que se paginan por número de página
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class MalezaList(OptimizarConsultaMixin, generics.ListCreateAPIView):
     queryset = Maleza.objects.all()
     serializer_class = MalezaSerializer
 
@@ -31,7 +58,7 @@ class MalezaByNombre(generics.ListAPIView):
             return Maleza.objects.filter(nombre_comun__icontains=nombre)
         raise NotFound("Debe proporcionar un nombre válido")
 
-class MalezaDetail(generics.RetrieveUpdateDestroyAPIView):
+class MalezaDetail(OptimizarConsultaMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Maleza.objects.all()
     serializer_class = MalezaSerializer
     lookup_field = 'id_maleza'
@@ -49,9 +76,12 @@ class EliminarMaleza(generics.DestroyAPIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class MalezaDetectadaList(generics.ListCreateAPIView):
-    queryset = MalezaDetectada.objects.all()
+class MalezaDetectadaList(ListaRapidaMixin, OptimizarConsultaMixin, generics.ListCreateAPIView):
+    # La detección no tiene fecha propia: se pagina por la fecha de su jornada
+    queryset = MalezaDetectada.objects.annotate(fecha=F('jornada__fecha'))
     serializer_class = MalezaDetectadaSerializer
+    lectura_rapida = LECTURA_DETECCION
+    pagination_class = PaginacionPorFecha
 
 class CrearMalezaDetectada(generics.CreateAPIView):
     queryset = MalezaDetectada.objects.all()
@@ -62,7 +92,7 @@ class ActualizarMalezaDetectada(generics.UpdateAPIView):
     serializer_class = MalezaDetectadaSerializer
     lookup_field = 'id'
 
-class MalezaDetectadaByJornada(generics.ListAPIView):
+class MalezaDetectadaByJornada(OptimizarConsultaMixin, generics.ListAPIView):
     serializer_class = MalezaDetectadaSerializer
     
     def get_queryset(self):
@@ -71,7 +101,47 @@ class MalezaDetectadaByJornada(generics.ListAPIView):
             return MalezaDetectada.objects.filter(jornada__id_jornada=jornada_id)
         raise NotFound("Debe proporcionar un ID de jornada válido")
 
-class MalezaDetectadaDetail(generics.RetrieveUpdateDestroyAPIView):
+class ImportarDetecciones(generics.GenericAPIView):
+    """
+    Importa el registro de detecciones de un robot como NDJSON o CSV
+    (Content-Type application/x-ndjson o text/csv), comprimido con gzip si
+    se envía Content-Encoding: gzip. Requiere un encabezado Idempotency-Key:
+    reintentar con la misma clave no duplica las detecciones ya importadas.
+    """
+    serializer_class = DeteccionImportadaSerializer
+
+    def post(self, request, *args, **kwargs):
+        clave = request.headers.get('Idempotency-Key', '').strip()
+        if not clave or len(clave) > 100:
+            return Response(
+                {'error': 'Se requiere un encabezado Idempotency-Key de hasta 100 caracteres'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        lector = LECTORES_DETECCIONES.get(request.content_type.split(';')[0].strip().lower())
+        if lector is None:
+            return Response(
+                {'error': f'Formato no soportado. Use: {", ".join(LECTORES_DETECCIONES)}'},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+        if request.stream is None:
+            return Response({'error': 'El archivo está vacío'}, status=status.HTTP_400_BAD_REQUEST)
+
+        comprimido = request.headers.get('Content-Encoding', '').lower() == 'gzip'
+        importacion = ImportacionDetecciones(clave)
+        try:
+            # Se lee directamente del cuerpo, sin pasar por request.data
+            resultado = importacion.importar(lector(abrir(request.stream, comprimido)))
+        except (OSError, EOFError, zlib.error, UnicodeDecodeError, csv.Error):
+            # Las jornadas anteriores al error quedan guardadas; un reintento con
+            # la misma clave las omite
+            return Response(
+                {'error': 'No se pudo leer el archivo', **importacion.resultado},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        codigo = status.HTTP_201_CREATED if resultado['creadas'] else status.HTTP_200_OK
+        return Response(resultado, status=codigo)
+
+class MalezaDetectadaDetail(OptimizarConsultaMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = MalezaDetectada.objects.all()
     serializer_class = MalezaDetectadaSerializer
     lookup_field = 'id'
@@ -81,7 +151,7 @@ class EliminarMalezaDetectada(generics.DestroyAPIView):
     serializer_class = MalezaDetectadaSerializer
     lookup_field = 'id'
 
-class MalezaViewSet(viewsets.ModelViewSet):
+class MalezaViewSet(OptimizarConsultaMixin, viewsets.ModelViewSet):
     queryset = Maleza.objects.filter(activo=True)
     serializer_class = MalezaSerializer
     permission_classes = [IsAuthenticated]
@@ -90,24 +160,56 @@ class MalezaViewSet(viewsets.ModelViewSet):
         instance.activo = False
         instance.save()
 
+    @method_decorator(condicional('malezas'))
+    def list(self, request, *args, **kwargs):
+        # El catálogo activo sale de memoria ya serializado; con el ETag el
+        # cliente revalida sin volver a descargarlo
+        malezas = catalogo.activas()
+        campos = campos_solicitados(request)
+        if campos is not None:
+            malezas = [{campo: valor for campo, valor in maleza.items() if campo in campos} for maleza in malezas]
+        pagina = self.paginate_queryset(malezas)
+        if pagina is not None:
+            return self.get_paginated_response(pagina)
+        return Response(malezas)
+
     @action(detail=False, methods=['get'])
     def buscar(self, request):
+        """
+        Búsqueda de texto completo por nombre, nombre científico, tipo y
+        descripción, ordenada por relevancia y paginada.
+        """
         query = request.query_params.get('q', '')
-        if not query:
+        if not terminos(query):
             return Response(
                 {'error': 'Se requiere un término de búsqueda'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        malezas = self.queryset.filter(
-            Q(nombre__icontains=query) |
-            Q(nombre_cientifico__icontains=query) |
-            Q(tipo__icontains=query) |
-            Q(descripcion__icontains=query)
-        )
-        
-        serializer = self.get_serializer(malezas, many=True)
-        return Response(serializer.data)
+
+        malezas = buscar_malezas(self.get_queryset(), query)
+        paginador = PaginacionBusqueda()
+        pagina = paginador.paginate_queryset(malezas, request, view=self)
+        serializer = self.get_serializer(pagina, many=True)
+        return paginador.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def autocompletar(self, request):
+        """
+        Sugerencias por prefijo para el campo de búsqueda, servidas desde memoria.
+        """
+        try:
+            limite = min(int(request.query_params.get('limite', LIMITE_POR_DEFECTO)), MAX_SUGERENCIAS)
+        except ValueError:
+            return Response(
+                {'error': 'El límite debe ser un número entero'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if limite <= 0:
+            return Response(
+                {'error': 'El límite debe ser mayor que 0'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(autocompletado.sugerir(request.query_params.get('q', ''), limite))
 
     @action(detail=False, methods=['get'])
     def por_tipo(self, request):
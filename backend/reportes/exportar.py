@@ -0,0 +1,149 @@
+"""
+Exportación de reportes en CSV y XLSX generada por partes, para que la
+memoria usada no dependa de la cantidad de filas.
+"""
+import csv
+import zipfile
+from xml.sax.saxutils import escape
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+
+# Filas que se leen de la base de datos por cada viaje del cursor
+TAMANO_BLOQUE = 2000
+
+COLUMNAS = [
+    ('id_reporte', 'ID'),
+    ('fecha', 'Fecha'),
+    ('tipo', 'Tipo'),
+    ('robot__nombre', 'Robot'),
+    ('tanque__nombre', 'Tanque'),
+    ('area_cubierta', 'Área cubierta (m²)'),
+    ('herbicida_usado', 'Herbicida usado (L)'),
+    ('duracion', 'Duración'),
+    ('total_malezas', 'Malezas detectadas'),
+    ('observaciones', 'Observaciones'),
+]
+
+
+def filas_reportes(reportes):
+    """
+    Recorre los reportes como tuplas planas en el orden de COLUMNAS.
+    """
+    return reportes.annotate(
+        total_malezas=Coalesce(Sum('detallemaleza__cantidad'), 0)
+    ).order_by('fecha', 'id_reporte').values_list(
+        *[campo for campo, _ in COLUMNAS]
+    ).iterator(chunk_size=TAMANO_BLOQUE)
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    return str(valor)
+
+
+class _Eco:
+    """
+    Objeto tipo archivo que devuelve lo escrito en lugar de guardarlo.
+    """
+    def write(self, valor):
+        return valor
+
+
+def generar_csv(filas):
+    # El BOM inicial permite que Excel detecte UTF-8 al abrir el archivo
+    escritor = csv.writer(_Eco())
+    yield '\ufeff' + escritor.writerow([titulo for _, titulo in COLUMNAS])
+    for fila in filas:
+        yield escritor.writerow([_texto(valor) for valor in fila])
+
+
+class _Buffer:
+    """
+    Destino no posicionable para ZipFile: acumula bytes hasta que se vacía.
+    """
+    def __init__(self):
+        self.partes = []
+
+    def write(self, datos):
+        self.partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b''.join(self.partes)
+        self.partes = []
+        return datos
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Reportes" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _celda(valor):
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return f'<c><v>{valor}</v></c>'
+    return f'<c t="inlineStr"><is><t>{escape(_texto(valor))}</t></is></c>'
+
+
+def generar_xlsx(filas):
+    """
+    Escribe un libro XLSX mínimo (una hoja, celdas con texto en línea) sobre
+    un ZIP en modo flujo, devolviendo los bytes a medida que se comprimen.
+    """
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as libro:
+        libro.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        libro.writestr('_rels/.rels', _RELS)
+        libro.writestr('xl/workbook.xml', _WORKBOOK)
+        libro.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        yield buffer.vaciar()
+
+        with libro.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as hoja:
+            hoja.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                '<row>' + ''.join(_celda(titulo) for _, titulo in COLUMNAS) + '</row>'
+            ).encode())
+            for numero, fila in enumerate(filas, start=1):
+                hoja.write(('<row>' + ''.join(_celda(valor) for valor in fila) + '</row>').encode())
+                if numero % TAMANO_BLOQUE == 0:
+                    yield buffer.vaciar()
+            hoja.write(b'</sheetData></worksheet>')
+    yield buffer.vaciar()
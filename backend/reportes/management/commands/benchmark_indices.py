@@ -0,0 +1,150 @@
+import random
+import statistics
+import time
+from datetime import date, time as hora, timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+from jornadas.models import Jornada
+from malezas.models import Maleza
+from reportes.models import Reporte
+from robots.models import Robot
+from tanques.models import Tanque
+
+TAMANO_LOTE = 5000
+DIAS = 730
+
+
+class _Revertir(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Siembra reportes de prueba y compara planes de ejecución (EXPLAIN) y tiempos '
+        'de los filtros más usados sin y con los índices de T001-T006. '
+        'Todo se ejecuta en una transacción que se revierte al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reportes', type=int, default=1_000_000, help='Reportes a sembrar')
+        parser.add_argument('--robots', type=int, default=50, help='Robots a sembrar')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Ejecuciones por consulta')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla del generador aleatorio')
+
+    def handle(self, *args, **options):
+        self.repeticiones = options['repeticiones']
+        self.azar = random.Random(options['semilla'])
+        self.stdout.write(f'Base de datos: {connection.vendor}')
+
+        try:
+            with transaction.atomic():
+                inicio = time.perf_counter()
+                self.sembrar(options['reportes'], options['robots'])
+                self.stdout.write(f'Datos sembrados en {time.perf_counter() - inicio:.1f}s')
+
+                consultas = self.consultas()
+                self.cambiar_indices(crear=False)
+                self.medir('Sin índices', consultas)
+                self.cambiar_indices(crear=True)
+                self.medir('Con índices', consultas)
+                raise _Revertir
+        except _Revertir:
+            self.stdout.write(self.style.SUCCESS('Datos de prueba revertidos'))
+
+    def sembrar(self, total_reportes, total_robots):
+        robots = Robot.objects.bulk_create([
+            Robot(nombre=f'Robot {i}', estado=self.azar.choice(Robot.ESTADOS)[0])
+            for i in range(total_robots)
+        ])
+        tanque = Tanque.objects.create(nombre='Tanque benchmark', capacidad=100)
+        Maleza.objects.bulk_create([
+            Maleza(nombre=f'Maleza {i}', tipo=self.azar.choice(Maleza.TIPOS)[0], activo=i % 10 != 0)
+            for i in range(500)
+        ])
+        self.insertar(Jornada, (
+            Jornada(
+                fecha=date.today() - timedelta(days=self.azar.randrange(DIAS)),
+                hora_inicio=hora(8, 0), hora_fin=hora(12, 0), duracion=timedelta(hours=4),
+                area_tratada=100, robot=self.azar.choice(robots), tanque=tanque
+            )
+            for _ in range(max(total_reportes // 10, 1))
+        ))
+
+        ahora = timezone.now()
+        tipos = [tipo for tipo, _ in Reporte.TIPOS]
+        self.insertar(Reporte, (
+            Reporte(
+                fecha=ahora - timedelta(seconds=self.azar.randrange(DIAS * 86400)),
+                tipo=self.azar.choice(tipos),
+                robot=self.azar.choice(robots),
+                area_cubierta=self.azar.uniform(0, 500),
+                herbicida_usado=self.azar.uniform(0, 20),
+                # Una parte de los reportes dados de baja, como en producción
+                activo=self.azar.random() > 0.1,
+            )
+            for _ in range(total_reportes)
+        ))
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.robot = robots[0]
+
+    def insertar(self, modelo, objetos):
+        lote = []
+        for objeto in objetos:
+            lote.append(objeto)
+            if len(lote) == TAMANO_LOTE:
+                modelo.objects.bulk_create(lote)
+                lote = []
+        modelo.objects.bulk_create(lote)
+
+    def consultas(self):
+        """
+        Las mismas consultas que generan las vistas con filtros frecuentes.
+        """
+        hoy = timezone.now()
+        semana = (hoy - timedelta(days=7), hoy)
+        dia = timezone.localdate() - timedelta(days=3)
+        return [
+            ('ReporteViewSet (página)', lambda: Reporte.objects.filter(activo=True)
+                .order_by('-fecha', '-id_reporte')[:20]),
+            ('Reportes por rango', lambda: Reporte.objects.filter(activo=True, fecha__range=semana)),
+            ('ReporteViewSet.por_robot', lambda: Reporte.objects.filter(activo=True, robot=self.robot)
+                .order_by('-fecha')[:100]),
+            ('ReporteViewSet.por_tipo', lambda: Reporte.objects.filter(activo=True, tipo='Incidente')
+                .order_by('-fecha')[:100]),
+            ('JornadaPorFecha', lambda: Jornada.objects.filter(fecha=dia)),
+            ('JornadaCalendario (robot)', lambda: Jornada.objects.filter(
+                fecha__range=(dia - timedelta(days=30), dia), robot=self.robot
+            ).values('fecha').annotate(jornadas=Count('pk'), area=Sum('area_tratada')).order_by('fecha')),
+            ('RobotsByEstado', lambda: Robot.objects.filter(estado='Disponible')),
+            ('MalezaViewSet.por_tipo', lambda: Maleza.objects.filter(activo=True, tipo='Gramínea')),
+        ]
+
+    def cambiar_indices(self, crear):
+        # Sentencias directas en lugar de entrar al schema editor, que en SQLite
+        # no puede usarse dentro de una transacción abierta.
+        editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for modelo in (Reporte, Jornada, Robot, Maleza):
+                for indice in modelo._meta.indexes:
+                    if crear:
+                        cursor.execute(str(indice.create_sql(modelo, editor)))
+                    else:
+                        cursor.execute(f'DROP INDEX {connection.ops.quote_name(indice.name)}')
+            cursor.execute('ANALYZE')
+
+    def medir(self, titulo, consultas):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {titulo} =='))
+        for nombre, construir in consultas:
+            tiempos = []
+            for _ in range(self.repeticiones):
+                inicio = time.perf_counter()
+                list(construir())
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            self.stdout.write(self.style.MIGRATE_LABEL(
+                f'{nombre}: mediana {statistics.median(tiempos):.2f} ms, mínimo {min(tiempos):.2f} ms'
+            ))
+            self.stdout.write(construir().explain())
@@ -0,0 +1,124 @@
+import io
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from aspersax_api import json_rapido
+from aspersax_api.json_rapido import JSONRapidoParser, JSONRapidoRenderer
+from malezas.catalogo import catalogo
+from malezas.models import Maleza
+from reportes.models import Reporte, DetalleMaleza
+from reportes.serializers import LECTURA_REPORTE
+from robots.models import Robot
+from tanques.models import Tanque
+
+TAMANO_LOTE = 5000
+
+
+class _Revertir(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Siembra reportes de prueba y compara tiempo y memoria pico de JSONRenderer/JSONParser '
+        'de DRF contra JSONRapidoRenderer/JSONRapidoParser (orjson) sobre páginas grandes de '
+        'ReporteViewSet. Todo se revierte al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--paginas', type=int, nargs='+', default=[100, 1000, 5000],
+                            help='Tamaños de página a medir')
+        parser.add_argument('--detalles', type=int, default=3, help='Detalles de malezas por reporte')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Ejecuciones por medición')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla del generador aleatorio')
+
+    def handle(self, *args, **options):
+        self.repeticiones = options['repeticiones']
+        self.azar = random.Random(options['semilla'])
+        self.stdout.write(f'Base de datos: {connection.vendor}')
+        if not json_rapido.disponible():
+            self.stdout.write(self.style.WARNING('orjson no está instalado: JSONRapido usa el camino de DRF'))
+
+        try:
+            with transaction.atomic():
+                self.sembrar(max(options['paginas']), options['detalles'])
+                catalogo.invalidar()
+                catalogo.activas()
+                for tamano in options['paginas']:
+                    self.comparar(tamano)
+                raise _Revertir
+        except _Revertir:
+            self.stdout.write(self.style.SUCCESS('Datos de prueba revertidos'))
+
+    def sembrar(self, total, detalles):
+        robots = Robot.objects.bulk_create([Robot(nombre=f'Robot {i}') for i in range(20)])
+        tanque = Tanque.objects.create(nombre='Tanque benchmark', capacidad=100)
+        malezas = Maleza.objects.bulk_create([Maleza(nombre=f'Maleza {i}') for i in range(50)])
+        ahora = timezone.now()
+        reportes = Reporte.objects.bulk_create([
+            Reporte(
+                fecha=ahora - timedelta(seconds=self.azar.randrange(86400 * 365)),
+                robot=self.azar.choice(robots), tanque=tanque,
+                area_cubierta=self.azar.uniform(0, 500), herbicida_usado=self.azar.uniform(0, 20),
+                duracion=timedelta(minutes=self.azar.randrange(240)), observaciones='Sin novedad',
+            )
+            for _ in range(total)
+        ], batch_size=TAMANO_LOTE)
+        DetalleMaleza.objects.bulk_create([
+            DetalleMaleza(reporte=reporte, maleza=self.azar.choice(malezas), cantidad=self.azar.randrange(1, 20))
+            for reporte in reportes for _ in range(detalles)
+        ], batch_size=TAMANO_LOTE)
+
+    def pagina(self, tamano):
+        """
+        Cuerpo de una página de ReporteViewSet.list, armado como en la vista.
+        """
+        reportes = Reporte.objects.filter(activo=True).order_by('-fecha', '-pk')[:tamano]
+        return {
+            'next': 'http://testserver/api/reportes/reportes/?cursor=cD0yMDI0',
+            'previous': None,
+            'results': LECTURA_REPORTE.filas(LECTURA_REPORTE.consulta(reportes)),
+        }
+
+    def medir(self, funcion):
+        tiempos = []
+        for _ in range(self.repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        tracemalloc.start()
+        funcion()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return statistics.median(tiempos), pico / 1024 / 1024
+
+    def comparar(self, tamano):
+        datos = self.pagina(tamano)
+        drf = JSONRenderer().render(datos)
+        rapido = JSONRapidoRenderer().render(datos)
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'\n== Página de {len(datos["results"])} reportes ({len(drf) / 1024:.0f} KiB) =='
+        ))
+        if rapido == drf:
+            self.stdout.write('Mismos bytes con ambos renderers')
+        else:
+            self.stdout.write(self.style.WARNING('Los bytes difieren (formato de números); el contenido es el mismo'))
+
+        mediciones = [
+            ('Render DRF', lambda: JSONRenderer().render(datos)),
+            ('Render orjson', lambda: JSONRapidoRenderer().render(datos)),
+            ('Parse DRF', lambda: JSONParser().parse(io.BytesIO(drf))),
+            ('Parse orjson', lambda: JSONRapidoParser().parse(io.BytesIO(drf))),
+        ]
+        for titulo, funcion in mediciones:
+            mediana, pico = self.medir(funcion)
+            self.stdout.write(self.style.MIGRATE_LABEL(
+                f'{titulo}: mediana {mediana:.2f} ms, memoria pico {pico:.2f} MiB'
+            ))
@@ -0,0 +1,138 @@
+import random
+import statistics
+import time
+from datetime import date, time as hora, timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from jornadas.models import Jornada
+from jornadas.serializers import LECTURA_JORNADA, JornadaSerializer
+from malezas.catalogo import catalogo
+from malezas.models import Maleza, MalezaDetectada
+from malezas.serializers import LECTURA_DETECCION, MalezaDetectadaSerializer
+from reportes.models import Reporte, DetalleMaleza
+from reportes.serializers import LECTURA_REPORTE, ReporteSerializer
+from robots.models import Robot
+from robots.serializers import LECTURA_ROBOT, RobotSerializer
+from tanques.models import Tanque
+
+TAMANO_LOTE = 5000
+
+
+class _Revertir(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Siembra datos de prueba y compara, por listado, el tiempo de ModelSerializer '
+        'contra la lectura rápida con values() (aspersax_api.lectura), verificando que '
+        'ambos producen los mismos bytes JSON. Todo se revierte al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=1000, help='Filas por listado (tamaño de página)')
+        parser.add_argument('--detalles', type=int, default=3, help='Detalles de malezas por reporte')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Ejecuciones por camino')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla del generador aleatorio')
+
+    def handle(self, *args, **options):
+        self.repeticiones = options['repeticiones']
+        self.azar = random.Random(options['semilla'])
+        self.stdout.write(f'Base de datos: {connection.vendor}')
+
+        try:
+            with transaction.atomic():
+                self.sembrar(options['filas'], options['detalles'])
+                catalogo.invalidar()
+                catalogo.activas()
+                for nombre, serializer, lectura in self.listados(options['filas']):
+                    self.comparar(nombre, serializer, lectura)
+                raise _Revertir
+        except _Revertir:
+            self.stdout.write(self.style.SUCCESS('Datos de prueba revertidos'))
+
+    def sembrar(self, filas, detalles):
+        robots = Robot.objects.bulk_create([
+            Robot(nombre=f'Robot {i}', estado=self.azar.choice(Robot.ESTADOS)[0], latitud=self.azar.uniform(-35, -30))
+            for i in range(filas)
+        ])
+        tanque = Tanque.objects.create(nombre='Tanque benchmark', capacidad=100)
+        malezas = Maleza.objects.bulk_create([Maleza(nombre=f'Maleza {i}') for i in range(50)])
+        jornadas = Jornada.objects.bulk_create([
+            Jornada(
+                fecha=date.today() - timedelta(days=self.azar.randrange(365)),
+                hora_inicio=hora(8, 0), hora_fin=hora(12, 0), duracion=timedelta(hours=4),
+                area_tratada=self.azar.uniform(0, 500), robot=self.azar.choice(robots), tanque=tanque
+            )
+            for _ in range(filas)
+        ], batch_size=TAMANO_LOTE)
+        MalezaDetectada.objects.bulk_create([
+            MalezaDetectada(jornada=jornada, maleza=self.azar.choice(malezas), ubicacion='Sector A', densidad='Media')
+            for jornada in jornadas
+        ], batch_size=TAMANO_LOTE)
+
+        ahora = timezone.now()
+        reportes = Reporte.objects.bulk_create([
+            Reporte(
+                fecha=ahora - timedelta(seconds=self.azar.randrange(86400 * 365)),
+                robot=self.azar.choice(robots), tanque=tanque,
+                area_cubierta=self.azar.uniform(0, 500), herbicida_usado=self.azar.uniform(0, 20),
+                duracion=timedelta(minutes=self.azar.randrange(240)),
+            )
+            for _ in range(filas)
+        ], batch_size=TAMANO_LOTE)
+        DetalleMaleza.objects.bulk_create([
+            DetalleMaleza(reporte=reporte, maleza=self.azar.choice(malezas), cantidad=self.azar.randrange(1, 20))
+            for reporte in reportes for _ in range(detalles)
+        ], batch_size=TAMANO_LOTE)
+
+    def listados(self, filas):
+        """
+        El queryset de cada listado tal como lo carga la vista con el
+        serializer, y el mismo listado con la lectura rápida.
+        """
+        # Funciones que arman un queryset nuevo en cada ejecución, para no
+        # reutilizar la caché de resultados de la anterior
+        reportes = lambda: Reporte.objects.filter(activo=True).order_by('-fecha', '-pk')[:filas]
+        jornadas = lambda: Jornada.objects.order_by('-fecha', '-pk')[:filas]
+        detecciones = lambda: MalezaDetectada.objects.annotate(fecha=F('jornada__fecha')).order_by('-fecha', '-pk')[:filas]
+        robots = lambda: Robot.objects.order_by('id_robot')[:filas]
+        return [
+            ('ReporteViewSet.list',
+                lambda: ReporteSerializer(
+                    reportes().select_related('robot', 'tanque').prefetch_related('detallemaleza_set'), many=True
+                ).data,
+                lambda: LECTURA_REPORTE.filas(LECTURA_REPORTE.consulta(reportes()))),
+            ('JornadaList',
+                lambda: JornadaSerializer(jornadas(), many=True).data,
+                lambda: LECTURA_JORNADA.filas(LECTURA_JORNADA.consulta(jornadas()))),
+            ('MalezaDetectadaList',
+                lambda: MalezaDetectadaSerializer(detecciones(), many=True).data,
+                lambda: LECTURA_DETECCION.filas(LECTURA_DETECCION.consulta(detecciones()))),
+            ('RobotList (instantánea de la flota)',
+                lambda: RobotSerializer(robots(), many=True).data,
+                lambda: LECTURA_ROBOT.filas(LECTURA_ROBOT.consulta(robots()))),
+        ]
+
+    def comparar(self, nombre, serializer, lectura):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {nombre} =='))
+        renderer = JSONRenderer()
+        esperado = renderer.render(serializer())
+        obtenido = renderer.render(lectura())
+        if obtenido != esperado:
+            self.stdout.write(self.style.ERROR('La lectura rápida no produce los mismos bytes que el serializer'))
+            return
+
+        for titulo, construir in (('ModelSerializer', serializer), ('Lectura rápida', lectura)):
+            tiempos = []
+            for _ in range(self.repeticiones):
+                inicio = time.perf_counter()
+                renderer.render(construir())
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            self.stdout.write(self.style.MIGRATE_LABEL(
+                f'{titulo}: mediana {statistics.median(tiempos):.2f} ms, mínimo {min(tiempos):.2f} ms'
+            ))
+        self.stdout.write(f'{len(esperado)} bytes, idénticos en ambos caminos')
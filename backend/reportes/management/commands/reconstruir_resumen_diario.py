@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from reportes.rollup import reconstruir
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los resúmenes diarios de reportes y malezas a partir de los datos originales'
+
+    def handle(self, *args, **options):
+        resumenes, malezas = reconstruir()
+        self.stdout.write(self.style.SUCCESS(
+            f'Resúmenes reconstruidos: {resumenes} diarios, {malezas} por maleza'
+        ))
@@ -0,0 +1,52 @@
+# Generated by Django 5.2 on 2026-10-17 20:59
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('malezas', '0003_remove_maleza_nombre_comun_maleza_nombre_and_more'),
+        ('reportes', '0002_remove_reporte_fecha_creacion_remove_reporte_jornada_and_more'),
+        ('robots', '0002_remove_robot_modelo_robot_bateria_robot_nombre_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MalezaDiaria',
+            fields=[
+                ('id_resumen', models.AutoField(db_column='T008IdResumen', editable=False, primary_key=True, serialize=False)),
+                ('fecha', models.DateField(db_column='T008Fecha')),
+                ('cantidad', models.IntegerField(db_column='T008Cantidad', default=0)),
+                ('maleza', models.ForeignKey(db_column='T008IdMaleza', on_delete=django.db.models.deletion.CASCADE, to='malezas.maleza')),
+            ],
+            options={
+                'verbose_name': 'Maleza Diaria',
+                'verbose_name_plural': 'Malezas Diarias',
+                'db_table': 'T008MalezaDiaria',
+                'unique_together': {('fecha', 'maleza')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ReporteDiario',
+            fields=[
+                ('id_resumen', models.AutoField(db_column='T007IdResumen', editable=False, primary_key=True, serialize=False)),
+                ('fecha', models.DateField(db_column='T007Fecha')),
+                ('tipo', models.CharField(choices=[('Jornada', 'Jornada'), ('Mantenimiento', 'Mantenimiento'), ('Incidente', 'Incidente'), ('Recarga', 'Recarga')], db_column='T007Tipo', max_length=50)),
+                ('reportes', models.IntegerField(db_column='T007Reportes', default=0)),
+                ('area_cubierta', models.FloatField(db_column='T007AreaCubierta', default=0)),
+                ('herbicida_usado', models.FloatField(db_column='T007HerbicidaUsado', default=0)),
+                ('duracion', models.DurationField(db_column='T007Duracion', default=datetime.timedelta(0))),
+                ('malezas', models.IntegerField(db_column='T007Malezas', default=0)),
+                ('robot', models.ForeignKey(db_column='T007IdRobot', null=True, on_delete=django.db.models.deletion.CASCADE, to='robots.robot')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario',
+                'verbose_name_plural': 'Resúmenes Diarios',
+                'db_table': 'T007ReporteDiario',
+                'unique_together': {('fecha', 'robot', 'tipo')},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-17 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('malezas', '0004_maleza_t004_activo_tipo_idx'),
+        ('reportes', '0004_reporte_t005_fecha_id_idx'),
+        ('robots', '0003_robot_t002_estado_idx'),
+        ('tanques', '0003_remove_tanque_tipo_tanque_nivel_actual_tanque_nombre_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='reporte',
+            name='T005_fecha_id_idx',
+        ),
+        migrations.AddIndex(
+            model_name='reporte',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['fecha', 'id_reporte'], name='T005_activo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reporte',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['robot', 'fecha'], name='T005_activo_robot_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reporte',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['tipo', 'fecha'], name='T005_activo_tipo_idx'),
+        ),
+    ]
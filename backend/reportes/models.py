@@ -32,6 +32,18 @@ class Reporte(models.Model):
         db_table = 'T005Reporte'
         verbose_name = 'Reporte'
         verbose_name_plural = 'Reportes'
+        # Todas las consultas de la API filtran activo=True, así que los índices
+        # son parciales: más pequeños y sin las filas dadas de baja.
+        indexes = [
+            # Rangos de fechas y paginación por cursor (fecha, pk)
+            models.Index(fields=['fecha', 'id_reporte'], name='T005_activo_fecha_idx',
+                         condition=models.Q(activo=True)),
+            # por_robot y por_tipo, ordenados por fecha
+            models.Index(fields=['robot', 'fecha'], name='T005_activo_robot_idx',
+                         condition=models.Q(activo=True)),
+            models.Index(fields=['tipo', 'fecha'], name='T005_activo_tipo_idx',
+                         condition=models.Q(activo=True)),
+        ]
 
 class DetalleMaleza(models.Model):
     id_detalle = models.AutoField(primary_key=True, editable=False, db_column='T006IdDetalle')
@@ -48,4 +60,46 @@ class DetalleMaleza(models.Model):
     class Meta:
         db_table = 'T006DetalleMaleza'
         verbose_name = 'Detalle de Maleza'
-        verbose_name_plural = 'Detalles de Malezas'
\ No newline at end of file
+        verbose_name_plural = 'Detalles de Malezas'
+
+class ReporteDiario(models.Model):
+    """
+    Resumen diario de reportes activos por robot y tipo.
+    Se mantiene desde las señales de Reporte y DetalleMaleza (ver rollup.py).
+    """
+    id_resumen = models.AutoField(primary_key=True, editable=False, db_column='T007IdResumen')
+    fecha = models.DateField(db_column='T007Fecha')
+    robot = models.ForeignKey(Robot, on_delete=models.CASCADE, null=True, db_column='T007IdRobot')
+    tipo = models.CharField(max_length=50, choices=Reporte.TIPOS, db_column='T007Tipo')
+    reportes = models.IntegerField(default=0, db_column='T007Reportes')
+    area_cubierta = models.FloatField(default=0, db_column='T007AreaCubierta')  # en metros cuadrados
+    herbicida_usado = models.FloatField(default=0, db_column='T007HerbicidaUsado')  # en litros
+    duracion = models.DurationField(default=timedelta(minutes=0), db_column='T007Duracion')
+    malezas = models.IntegerField(default=0, db_column='T007Malezas')
+
+    def __str__(self):
+        return f"Resumen {self.fecha} - {self.tipo} - Robot {self.robot_id}"
+
+    class Meta:
+        db_table = 'T007ReporteDiario'
+        verbose_name = 'Resumen Diario'
+        verbose_name_plural = 'Resúmenes Diarios'
+        unique_together = ('fecha', 'robot', 'tipo')
+
+class MalezaDiaria(models.Model):
+    """
+    Total diario de malezas detectadas por especie en reportes activos.
+    """
+    id_resumen = models.AutoField(primary_key=True, editable=False, db_column='T008IdResumen')
+    fecha = models.DateField(db_column='T008Fecha')
+    maleza = models.ForeignKey(Maleza, on_delete=models.CASCADE, db_column='T008IdMaleza')
+    cantidad = models.IntegerField(default=0, db_column='T008Cantidad')
+
+    def __str__(self):
+        return f"{self.maleza_id} - {self.fecha}: {self.cantidad}"
+
+    class Meta:
+        db_table = 'T008MalezaDiaria'
+        verbose_name = 'Maleza Diaria'
+        verbose_name_plural = 'Malezas Diarias'
+        unique_together = ('fecha', 'maleza')
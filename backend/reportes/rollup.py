@@ -0,0 +1,161 @@
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from .models import Reporte, DetalleMaleza, ReporteDiario, MalezaDiaria
+
+TAMANO_LOTE = 1000
+
+
+def a_fecha(valor):
+    """
+    Convierte una fecha, fecha-hora o cadena ISO a un objeto date local.
+    """
+    if valor is None or (isinstance(valor, date) and not isinstance(valor, datetime)):
+        return valor
+    if isinstance(valor, str):
+        fecha = parse_date(valor)
+        if fecha:
+            return fecha
+        valor = parse_datetime(valor)
+        if valor is None:
+            raise ValueError('Formato de fecha inválido')
+    if timezone.is_aware(valor):
+        return timezone.localdate(valor)
+    return valor.date()
+
+
+def rango_dia(fecha):
+    """
+    Devuelve el intervalo [inicio, fin) de un día en la zona horaria local.
+    """
+    inicio = timezone.make_aware(datetime.combine(fecha, time.min))
+    return inicio, inicio + timedelta(days=1)
+
+
+def clave_reporte(reporte):
+    """
+    Clave (fecha, robot, tipo) del resumen al que aporta un reporte, o None si está inactivo.
+    """
+    if not reporte.activo:
+        return None
+    return (a_fecha(reporte.fecha), reporte.robot_id, reporte.tipo)
+
+
+def recalcular_resumen(claves):
+    """
+    Recalcula los resúmenes diarios de las claves (fecha, robot, tipo) indicadas.
+    """
+    for fecha, robot_id, tipo in set(filter(None, claves)):
+        inicio, fin = rango_dia(fecha)
+        reportes = Reporte.objects.filter(
+            activo=True, fecha__gte=inicio, fecha__lt=fin, robot_id=robot_id, tipo=tipo
+        )
+        totales = reportes.aggregate(
+            reportes=Count('pk'),
+            area_cubierta=Sum('area_cubierta'),
+            herbicida_usado=Sum('herbicida_usado'),
+            duracion=Sum('duracion'),
+        )
+
+        if not totales['reportes']:
+            ReporteDiario.objects.filter(fecha=fecha, robot_id=robot_id, tipo=tipo).delete()
+            continue
+
+        malezas = DetalleMaleza.objects.filter(reporte__in=reportes).aggregate(
+            total=Sum('cantidad')
+        )['total']
+        ReporteDiario.objects.update_or_create(
+            fecha=fecha, robot_id=robot_id, tipo=tipo,
+            defaults={
+                'reportes': totales['reportes'],
+                'area_cubierta': totales['area_cubierta'] or 0,
+                'herbicida_usado': totales['herbicida_usado'] or 0,
+                'duracion': totales['duracion'] or timedelta(0),
+                'malezas': malezas or 0,
+            }
+        )
+
+
+def recalcular_malezas(claves):
+    """
+    Recalcula los totales diarios de las claves (fecha, maleza) indicadas.
+    """
+    for fecha, maleza_id in set(filter(None, claves)):
+        inicio, fin = rango_dia(fecha)
+        total = DetalleMaleza.objects.filter(
+            maleza_id=maleza_id,
+            reporte__activo=True,
+            reporte__fecha__gte=inicio,
+            reporte__fecha__lt=fin,
+        ).aggregate(total=Sum('cantidad'))['total']
+
+        if total is None:
+            MalezaDiaria.objects.filter(fecha=fecha, maleza_id=maleza_id).delete()
+        else:
+            MalezaDiaria.objects.update_or_create(
+                fecha=fecha, maleza_id=maleza_id, defaults={'cantidad': total}
+            )
+
+
+def _insertar_por_lotes(modelo, objetos):
+    total = 0
+    while True:
+        lote = list(islice(objetos, TAMANO_LOTE))
+        if not lote:
+            return total
+        modelo.objects.bulk_create(lote)
+        total += len(lote)
+
+
+@transaction.atomic
+def reconstruir():
+    """
+    Reconstruye por completo los resúmenes diarios con consultas agrupadas.
+    Devuelve la cantidad de filas creadas en cada tabla.
+    """
+    ReporteDiario.objects.all().delete()
+    MalezaDiaria.objects.all().delete()
+
+    detalles = DetalleMaleza.objects.filter(reporte__activo=True).order_by()
+    malezas_por_clave = {
+        (dia, robot_id, tipo): total
+        for dia, robot_id, tipo, total in detalles.annotate(
+            dia=TruncDate('reporte__fecha')
+        ).values('dia', 'reporte__robot', 'reporte__tipo').annotate(
+            total=Sum('cantidad')
+        ).values_list('dia', 'reporte__robot', 'reporte__tipo', 'total')
+    }
+
+    resumenes = (
+        ReporteDiario(
+            fecha=dia, robot_id=robot_id, tipo=tipo, reportes=reportes,
+            area_cubierta=area or 0, herbicida_usado=herbicida or 0,
+            duracion=duracion or timedelta(0),
+            malezas=malezas_por_clave.get((dia, robot_id, tipo)) or 0,
+        )
+        for dia, robot_id, tipo, reportes, area, herbicida, duracion in Reporte.objects.filter(
+            activo=True
+        ).order_by().annotate(
+            dia=TruncDate('fecha')
+        ).values('dia', 'robot', 'tipo').annotate(
+            reportes=Count('pk'),
+            area=Sum('area_cubierta'),
+            herbicida=Sum('herbicida_usado'),
+            total_duracion=Sum('duracion'),
+        ).values_list('dia', 'robot', 'tipo', 'reportes', 'area', 'herbicida', 'total_duracion').iterator()
+    )
+
+    malezas = (
+        MalezaDiaria(fecha=dia, maleza_id=maleza_id, cantidad=total or 0)
+        for dia, maleza_id, total in detalles.annotate(
+            dia=TruncDate('reporte__fecha')
+        ).values('dia', 'maleza').annotate(
+            total=Sum('cantidad')
+        ).values_list('dia', 'maleza', 'total').iterator()
+    )
+
+    return _insertar_por_lotes(ReporteDiario, resumenes), _insertar_por_lotes(MalezaDiaria, malezas)
@@ -1,17 +1,19 @@
+from collections import defaultdict
 from rest_framework import serializers
+from aspersax_api.campos import CamposDinamicosMixin
+from aspersax_api.lectura import Columna, LecturaRapida, Lista, Objeto, duracion, fecha_hora
 from .models import Reporte, DetalleMaleza
 from robots.models import Robot
 from tanques.models import Tanque
-from malezas.models import Maleza
-from robots.serializers import RobotSerializer
-from tanques.serializers import TanqueSerializer
-from malezas.serializers import MalezaSerializer
-
-class DetalleMalezaSerializer(serializers.ModelSerializer):
-    maleza = MalezaSerializer(read_only=True)
-    maleza_id = serializers.PrimaryKeyRelatedField(
+from robots.serializers import COLUMNAS_ROBOT, RobotSerializer
+from tanques.serializers import COLUMNAS_TANQUE, TanqueSerializer
+from malezas.catalogo import catalogo
+from malezas.serializers import MalezaAnidadaField, MalezaCatalogoField
+
+class DetalleMalezaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    maleza = MalezaAnidadaField()
+    maleza_id = MalezaCatalogoField(
         source='maleza',
-        queryset=Maleza.objects.all(),
         write_only=True
     )
 
@@ -20,8 +22,9 @@ class DetalleMalezaSerializer(serializers.ModelSerializer):
         fields = ['id_detalle', 'maleza', 'maleza_id', 'cantidad', 
                  'ubicacion', 'herbicida_aplicado', 'efectividad']
         read_only_fields = ['id_detalle']
+        expandibles = {'maleza': MalezaAnidadaField}
 
-class ReporteSerializer(serializers.ModelSerializer):
+class ReporteSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     robot = RobotSerializer(read_only=True)
     robot_id = serializers.PrimaryKeyRelatedField(
         source='robot',
@@ -47,6 +50,7 @@ class ReporteSerializer(serializers.ModelSerializer):
                  'tanque', 'tanque_id', 'malezas_detectadas', 'area_cubierta',
                  'herbicida_usado', 'duracion', 'observaciones', 'activo']
         read_only_fields = ['id_reporte', 'fecha']
+        expandibles = {'robot': RobotSerializer, 'tanque': TanqueSerializer}
 
     def validate_jornada(self, value):
         # Obtener la instancia actual si estamos actualizando
@@ -59,4 +63,61 @@ class ReporteSerializer(serializers.ModelSerializer):
         # Si es una nueva jornada, verificar que no tenga reporte
         if Reporte.objects.filter(jornada=value).exists():
             raise serializers.ValidationError("Ya existe un reporte para esta jornada")
-        return value  
\ No newline at end of file
+        return value  
+
+# Mismas columnas y orden que DetalleMalezaSerializer; la maleza sale del catálogo
+LECTURA_DETALLE = LecturaRapida((
+    Columna('id_detalle'),
+    Columna('maleza', convertir=catalogo.serializada),
+    Columna('cantidad'),
+    Columna('ubicacion'),
+    Columna('herbicida_aplicado'),
+    Columna('efectividad'),
+))
+
+def detalles_por_reporte(ids):
+    detalles = defaultdict(list)
+    for valores in LECTURA_DETALLE.consulta(DetalleMaleza.objects.filter(reporte_id__in=ids).order_by('pk'), 'reporte'):
+        detalles[valores['reporte']].append(LECTURA_DETALLE.fila(valores))
+    return detalles
+
+# Mismas columnas y orden que ReporteSerializer, con robot y tanque por join
+LECTURA_REPORTE = LecturaRapida((
+    Columna('id_reporte'),
+    Columna('fecha', convertir=fecha_hora),
+    Columna('tipo'),
+    Objeto('robot', COLUMNAS_ROBOT),
+    Objeto('tanque', COLUMNAS_TANQUE),
+    Lista('malezas_detectadas', detalles_por_reporte),
+    Columna('area_cubierta'),
+    Columna('herbicida_usado'),
+    Columna('duracion', convertir=duracion),
+    Columna('observaciones'),
+    Columna('activo'),
+))
+
+class DetalleMalezaMasivoSerializer(serializers.Serializer):
+    """
+    Detalle de maleza dentro de una carga masiva. Los IDs se validan contra
+    un mapa precargado en la vista, no con una consulta por elemento.
+    """
+    maleza_id = serializers.IntegerField()
+    cantidad = serializers.IntegerField(default=1, min_value=0)
+    ubicacion = serializers.CharField(max_length=200, required=False, allow_blank=True, allow_null=True)
+    herbicida_aplicado = serializers.FloatField(default=0)
+    efectividad = serializers.IntegerField(default=0, min_value=0, max_value=100)
+
+class ReporteMasivoSerializer(serializers.Serializer):
+    """
+    Reporte dentro de una carga masiva. A diferencia de ReporteSerializer
+    acepta la fecha, ya que los robots sincronizan reportes atrasados.
+    """
+    fecha = serializers.DateTimeField(required=False)
+    tipo = serializers.ChoiceField(choices=Reporte.TIPOS, default='Jornada')
+    robot_id = serializers.IntegerField()
+    tanque_id = serializers.IntegerField(required=False, allow_null=True)
+    area_cubierta = serializers.FloatField(default=0)
+    herbicida_usado = serializers.FloatField(default=0)
+    duracion = serializers.DurationField(required=False)
+    observaciones = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    malezas_detectadas = DetalleMalezaMasivoSerializer(many=True, required=False)
@@ -0,0 +1,80 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Reporte, DetalleMaleza
+from .rollup import clave_reporte, recalcular_resumen, recalcular_malezas
+
+
+@receiver(pre_save, sender=Reporte)
+def guardar_estado_reporte(sender, instance, raw=False, **kwargs):
+    # Recordar la clave anterior para poder descontar el reporte si cambió de día, robot o tipo
+    instance._clave_anterior = None
+    if instance.pk and not raw:
+        anterior = Reporte.objects.filter(pk=instance.pk).only('fecha', 'robot', 'tipo', 'activo').first()
+        if anterior:
+            instance._clave_anterior = clave_reporte(anterior)
+
+
+@receiver(post_save, sender=Reporte)
+def actualizar_resumen_reporte(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = getattr(instance, '_clave_anterior', None)
+    actual = clave_reporte(instance)
+    recalcular_resumen([anterior, actual])
+
+    # Los totales por especie solo cambian si el reporte cambió de día o de estado
+    fecha_anterior = anterior[0] if anterior else None
+    fecha_actual = actual[0] if actual else None
+    if kwargs.get('created') or fecha_anterior == fecha_actual:
+        return
+    malezas = set(instance.detallemaleza_set.values_list('maleza_id', flat=True))
+    recalcular_malezas([
+        (fecha, maleza_id)
+        for fecha in (fecha_anterior, fecha_actual) if fecha
+        for maleza_id in malezas
+    ])
+
+
+@receiver(post_delete, sender=Reporte)
+def descontar_reporte(sender, instance, **kwargs):
+    recalcular_resumen([clave_reporte(instance)])
+
+
+@receiver(pre_save, sender=DetalleMaleza)
+def guardar_estado_detalle(sender, instance, raw=False, **kwargs):
+    instance._detalle_anterior = None
+    if instance.pk and not raw:
+        instance._detalle_anterior = DetalleMaleza.objects.filter(pk=instance.pk).values_list(
+            'reporte_id', 'maleza_id'
+        ).first()
+
+
+def _actualizar_por_detalles(detalles):
+    reportes = {}
+    claves_malezas = set()
+    for reporte_id, maleza_id in detalles:
+        if reporte_id not in reportes:
+            reporte = Reporte.objects.filter(pk=reporte_id).first()
+            reportes[reporte_id] = clave_reporte(reporte) if reporte else None
+        clave = reportes[reporte_id]
+        if clave:
+            claves_malezas.add((clave[0], maleza_id))
+
+    recalcular_resumen(reportes.values())
+    recalcular_malezas(claves_malezas)
+
+
+@receiver(post_save, sender=DetalleMaleza)
+def actualizar_resumen_detalle(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    detalles = {(instance.reporte_id, instance.maleza_id)}
+    anterior = getattr(instance, '_detalle_anterior', None)
+    if anterior:
+        detalles.add(anterior)
+    _actualizar_por_detalles(detalles)
+
+
+@receiver(post_delete, sender=DetalleMaleza)
+def descontar_detalle(sender, instance, **kwargs):
+    _actualizar_por_detalles({(instance.reporte_id, instance.maleza_id)})
@@ -2,12 +2,32 @@ from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework.pagination import Cursor
+from aspersax_api.paginacion import PaginacionPorFecha
 from django.contrib.auth import get_user_model
-from .models import Reporte
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+import csv
+import json
+import zipfile
+from io import BytesIO, StringIO
+from xml.etree import ElementTree
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from aspersax_api import json_rapido
+from aspersax_api.json_rapido import JSONRapidoParser, JSONRapidoRenderer
+from .models import Reporte, DetalleMaleza, ReporteDiario, MalezaDiaria
+from .serializers import LECTURA_REPORTE, ReporteSerializer
+from .views import ReporteViewSet, XLSXRenderer
+from malezas.catalogo import catalogo
+from malezas.models import Maleza
 from jornadas.models import Jornada
 from robots.models import Robot
 from tanques.models import Tanque
-from datetime import datetime, timedelta, date, time
+from datetime import datetime, timedelta, date, time, timezone as dt_timezone
+from unittest import mock
 from decimal import Decimal
 
 User = get_user_model()
@@ -132,3 +152,561 @@ class ReporteTests(APITestCase):
         }
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class ReporteDiarioTests(APITestCase):
+    def setUp(self):
+        self.robot = Robot.objects.create(nombre='Robot Test', estado='Disponible')
+        self.otro_robot = Robot.objects.create(nombre='Robot Dos', estado='Disponible')
+        self.maleza = Maleza.objects.create(nombre='Maleza Test')
+        self.fecha = timezone.make_aware(datetime(2024, 5, 10, 9, 30))
+
+    def crear_reporte(self, **kwargs):
+        datos = {
+            'robot': self.robot,
+            'fecha': self.fecha,
+            'area_cubierta': 10.0,
+            'herbicida_usado': 1.5,
+            'duracion': timedelta(minutes=30),
+        }
+        datos.update(kwargs)
+        return Reporte.objects.create(**datos)
+
+    def test_resumen_se_actualiza_con_reportes_y_detalles(self):
+        """Prueba que crear reportes y detalles mantiene el resumen diario"""
+        reporte = self.crear_reporte()
+        self.crear_reporte(area_cubierta=5.0)
+        DetalleMaleza.objects.create(reporte=reporte, maleza=self.maleza, cantidad=4)
+
+        resumen = ReporteDiario.objects.get(fecha=date(2024, 5, 10), robot=self.robot, tipo='Jornada')
+        self.assertEqual(resumen.reportes, 2)
+        self.assertEqual(resumen.area_cubierta, 15.0)
+        self.assertEqual(resumen.herbicida_usado, 3.0)
+        self.assertEqual(resumen.duracion, timedelta(hours=1))
+        self.assertEqual(resumen.malezas, 4)
+        self.assertEqual(MalezaDiaria.objects.get(fecha=date(2024, 5, 10), maleza=self.maleza).cantidad, 4)
+
+    def test_resumen_mueve_reporte_editado(self):
+        """Prueba que cambiar fecha o robot de un reporte mueve sus totales"""
+        reporte = self.crear_reporte()
+        DetalleMaleza.objects.create(reporte=reporte, maleza=self.maleza, cantidad=2)
+
+        reporte.fecha = self.fecha + timedelta(days=1)
+        reporte.robot = self.otro_robot
+        reporte.save()
+
+        self.assertFalse(ReporteDiario.objects.filter(fecha=date(2024, 5, 10)).exists())
+        resumen = ReporteDiario.objects.get(fecha=date(2024, 5, 11))
+        self.assertEqual(resumen.robot, self.otro_robot)
+        self.assertEqual(resumen.malezas, 2)
+        self.assertFalse(MalezaDiaria.objects.filter(fecha=date(2024, 5, 10)).exists())
+        self.assertEqual(MalezaDiaria.objects.get(fecha=date(2024, 5, 11)).cantidad, 2)
+
+    def test_resumen_descuenta_inactivos_y_eliminados(self):
+        """Prueba que desactivar o eliminar reportes los descuenta del resumen"""
+        reporte = self.crear_reporte()
+        eliminado = self.crear_reporte()
+        DetalleMaleza.objects.create(reporte=eliminado, maleza=self.maleza, cantidad=3)
+
+        eliminado.delete()
+        self.assertEqual(ReporteDiario.objects.get().reportes, 1)
+        self.assertFalse(MalezaDiaria.objects.exists())
+
+        reporte.activo = False
+        reporte.save()
+        self.assertFalse(ReporteDiario.objects.exists())
+
+    def test_reconstruir_resumen(self):
+        """Prueba que el comando reconstruye el resumen a partir de los reportes"""
+        reporte = self.crear_reporte()
+        self.crear_reporte(robot=self.otro_robot, tipo='Incidente')
+        DetalleMaleza.objects.create(reporte=reporte, maleza=self.maleza, cantidad=6)
+        esperado = sorted(ReporteDiario.objects.values_list(
+            'fecha', 'robot', 'tipo', 'reportes', 'area_cubierta', 'herbicida_usado', 'duracion', 'malezas'
+        ))
+        ReporteDiario.objects.all().delete()
+        MalezaDiaria.objects.all().delete()
+
+        call_command('reconstruir_resumen_diario', stdout=StringIO())
+
+        self.assertEqual(sorted(ReporteDiario.objects.values_list(
+            'fecha', 'robot', 'tipo', 'reportes', 'area_cubierta', 'herbicida_usado', 'duracion', 'malezas'
+        )), esperado)
+        self.assertEqual(MalezaDiaria.objects.get().cantidad, 6)
+
+class ReporteConsultasTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.robot = Robot.objects.create(nombre='Robot Test')
+        self.tanque = Tanque.objects.create(nombre='Tanque Test', capacidad=100)
+        self.malezas = [Maleza.objects.create(nombre=f'Maleza {i}') for i in range(3)]
+        # El catálogo de malezas se carga una vez por versión, fuera de las consultas medidas
+        catalogo.invalidar()
+        catalogo.activas()
+        self.client.force_authenticate(user=self.user)
+
+    def crear_reportes(self, cantidad):
+        for _ in range(cantidad):
+            reporte = Reporte.objects.create(robot=self.robot, tanque=self.tanque, tipo='Jornada')
+            for maleza in self.malezas:
+                DetalleMaleza.objects.create(reporte=reporte, maleza=maleza, cantidad=2)
+
+    def test_listado_con_consultas_constantes(self):
+        """Prueba que una página de reportes cuesta las mismas consultas sin importar su tamaño"""
+        url = reverse('reporte-list')
+        self.crear_reportes(2)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results'][0]['malezas_detectadas']), 3)
+
+        self.crear_reportes(20)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(response.data['results'][0]['robot']['nombre'], 'Robot Test')
+        self.assertEqual(response.data['results'][0]['malezas_detectadas'][0]['maleza']['nombre'], 'Maleza 0')
+
+    def test_acciones_con_consultas_constantes(self):
+        """Prueba que por_periodo, por_robot y por_tipo no repiten consultas por reporte"""
+        self.crear_reportes(10)
+        consultas = [
+            (reverse('reporte-por-periodo'), {'periodo': 'semana'}),
+            (reverse('reporte-por-robot'), {'robot_id': self.robot.id_robot}),
+            (reverse('reporte-por-tipo'), {'tipo': 'Jornada'}),
+        ]
+        for url, params in consultas:
+            with self.assertNumQueries(2):
+                response = self.client.get(url, params)
+            self.assertEqual(len(response.data), 10)
+
+class ReporteMasivoTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.robot = Robot.objects.create(nombre='Robot Test')
+        self.tanque = Tanque.objects.create(nombre='Tanque Test', capacidad=100)
+        self.maleza = Maleza.objects.create(nombre='Maleza Test')
+        catalogo.invalidar()
+        catalogo.activas()
+        self.url = reverse('reporte-bulk')
+        self.client.force_authenticate(user=self.user)
+
+    def reporte(self, **kwargs):
+        datos = {
+            'fecha': '2024-05-10T08:00:00Z',
+            'robot_id': self.robot.id_robot,
+            'tanque_id': self.tanque.id_tanque,
+            'area_cubierta': 20.0,
+            'herbicida_usado': 1.0,
+            'malezas_detectadas': [
+                {'maleza_id': self.maleza.id_maleza, 'cantidad': 3},
+                {'maleza_id': self.maleza.id_maleza, 'cantidad': 2, 'ubicacion': 'Sector B'},
+            ],
+        }
+        datos.update(kwargs)
+        return datos
+
+    def test_carga_masiva(self):
+        """Prueba que una carga masiva crea reportes y detalles con consultas en lote"""
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.post(self.url, [self.reporte(fecha='2024-05-09T08:00:00Z') for _ in range(5)], format='json')
+
+        # El número de consultas no depende de cuántos reportes trae la carga
+        with self.assertNumQueries(len(consultas)):
+            response = self.client.post(self.url, [self.reporte() for _ in range(50)], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['creados'], 50)
+        self.assertEqual(Reporte.objects.count(), 55)
+        self.assertEqual(DetalleMaleza.objects.count(), 110)
+        self.assertEqual(len(set(response.data['ids'])), 50)
+
+        # Los resúmenes diarios reflejan la carga aunque bulk_create no dispare señales
+        resumen = ReporteDiario.objects.get(fecha=date(2024, 5, 10))
+        self.assertEqual(resumen.reportes, 50)
+        self.assertEqual(resumen.malezas, 250)
+        self.assertEqual(MalezaDiaria.objects.get(fecha=date(2024, 5, 10)).cantidad, 250)
+
+    def test_errores_por_indice(self):
+        """Prueba que los errores se devuelven por índice y no se guarda nada"""
+        datos = [
+            self.reporte(),
+            self.reporte(robot_id=9999),
+            self.reporte(tipo='Desconocido'),
+            self.reporte(malezas_detectadas=[{'maleza_id': 9999}]),
+        ]
+        response = self.client.post(self.url, datos, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['indice'] for error in response.data['errores']], [2])
+
+        del datos[2]
+        response = self.client.post(self.url, datos, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errores = {error['indice']: error['errores'] for error in response.data['errores']}
+        self.assertEqual(list(errores), [1, 2])
+        self.assertIn('robot_id', errores[1])
+        self.assertIn(0, errores[2]['malezas_detectadas'])
+        self.assertEqual(Reporte.objects.count(), 0)
+
+    def test_carga_masiva_requiere_lista(self):
+        """Prueba que el cuerpo debe ser una lista de reportes"""
+        response = self.client.post(self.url, self.reporte(), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class ReporteExportacionTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.robot = Robot.objects.create(nombre='Robot Test')
+        self.otro_robot = Robot.objects.create(nombre='Robot Dos')
+        self.maleza = Maleza.objects.create(nombre='Maleza Test')
+        reporte = Reporte.objects.create(
+            robot=self.robot, fecha=timezone.make_aware(datetime(2024, 5, 10, 8, 0)),
+            area_cubierta=12.5, observaciones='Campo "norte" & <sur>'
+        )
+        DetalleMaleza.objects.create(reporte=reporte, maleza=self.maleza, cantidad=4)
+        DetalleMaleza.objects.create(reporte=reporte, maleza=self.maleza, cantidad=1)
+        Reporte.objects.create(robot=self.otro_robot, tipo='Incidente',
+                               fecha=timezone.make_aware(datetime(2024, 5, 12, 8, 0)))
+        Reporte.objects.create(robot=self.robot, activo=False,
+                               fecha=timezone.make_aware(datetime(2024, 5, 10, 9, 0)))
+        self.url = reverse('reporte-export')
+        self.client.force_authenticate(user=self.user)
+
+    def leer_csv(self, response):
+        contenido = b''.join(response.streaming_content).decode('utf-8-sig')
+        return list(csv.reader(StringIO(contenido)))
+
+    def test_exportar_csv(self):
+        """Prueba que la exportación CSV se genera en flujo con los reportes activos"""
+        response = self.client.get(self.url, {'format': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertIn('reportes.csv', response['Content-Disposition'])
+
+        filas = self.leer_csv(response)
+        self.assertEqual(filas[0][0], 'ID')
+        self.assertEqual(len(filas), 3)
+        self.assertEqual(filas[1][3], 'Robot Test')
+        self.assertEqual(filas[1][8], '5')
+        self.assertEqual(filas[1][9], 'Campo "norte" & <sur>')
+
+    def test_exportar_filtros(self):
+        """Prueba que la exportación respeta desde/hasta, robot y tipo"""
+        filas = self.leer_csv(self.client.get(self.url, {'desde': '2024-05-11', 'hasta': '2024-05-12'}))
+        self.assertEqual([fila[3] for fila in filas[1:]], ['Robot Dos'])
+
+        filas = self.leer_csv(self.client.get(self.url, {'robot_id': self.robot.id_robot}))
+        self.assertEqual(len(filas), 2)
+
+        filas = self.leer_csv(self.client.get(self.url, {'tipo': 'Incidente'}))
+        self.assertEqual([fila[2] for fila in filas[1:]], ['Incidente'])
+
+    def test_exportar_xlsx(self):
+        """Prueba que la exportación XLSX produce un libro válido"""
+        response = self.client.get(self.url, {'format': 'xlsx'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        libro = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertIn('xl/workbook.xml', libro.namelist())
+
+        # El formato también se puede pedir con el encabezado Accept
+        response = self.client.get(self.url, HTTP_ACCEPT=XLSXRenderer.media_type)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('reportes.xlsx', response['Content-Disposition'])
+        b''.join(response.streaming_content)
+
+        hoja = ElementTree.fromstring(libro.read('xl/worksheets/sheet1.xml'))
+        filas = hoja.findall('.//{http://schemas.openxmlformats.org/spreadsheetml/2006/main}row')
+        self.assertEqual(len(filas), 3)
+
+    def test_exportar_parametros_invalidos(self):
+        """Prueba que periodo, robot o fechas inválidos devuelven 400 y un formato desconocido 404"""
+        # DRF reserva ?format= para la negociación: un formato desconocido no llega a la vista
+        response = self.client.get(self.url, {'format': 'pdf'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        for params in ({'periodo': 'anio'}, {'desde': 'ayer'}, {'robot_id': 'abc'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertIn('error', response.json())
+
+
+class ReportePaginacionTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        robot = Robot.objects.create(nombre='Robot Test')
+        # Pares de reportes con la misma fecha exacta para forzar el desempate por pk
+        base = timezone.make_aware(datetime(2024, 5, 1, 8, 0))
+        Reporte.objects.bulk_create([
+            Reporte(robot=robot, fecha=base + timedelta(hours=i // 2)) for i in range(9)
+        ])
+        self.url = reverse('reporte-list')
+        self.client.force_authenticate(user=self.user)
+
+    def test_recorrido_por_cursor(self):
+        """Prueba que el listado de reportes pagina por (fecha, pk) de más reciente a más antiguo"""
+        esperado = list(Reporte.objects.order_by('-fecha', '-id_reporte').values_list('id_reporte', flat=True))
+        ids = []
+        response = self.client.get(self.url, {'page_size': 2})
+        while True:
+            ids.extend(fila['id_reporte'] for fila in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(ids, esperado)
+
+    def test_posicion_invalida(self):
+        """Prueba que un cursor con una fecha inválida devuelve 404 y no un error del servidor"""
+        paginador = PaginacionPorFecha()
+        paginador.base_url = 'http://testserver' + self.url
+        url = paginador.encode_cursor(Cursor(offset=0, reverse=False, position='ayer|3'))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BenchmarkIndicesTests(TestCase):
+    def test_benchmark_revierte_datos(self):
+        """Prueba que el benchmark muestra los planes con los índices parciales y no deja datos"""
+        salida = StringIO()
+        call_command('benchmark_indices', reportes=200, robots=3, repeticiones=1, stdout=salida)
+        self.assertIn('Sin índices', salida.getvalue())
+        self.assertIn('T005_activo_fecha_idx', salida.getvalue())
+        self.assertFalse(Reporte.objects.exists())
+        self.assertFalse(Robot.objects.exists())
+
+    def test_benchmark_serializacion(self):
+        """Prueba que el benchmark de serialización verifica los mismos bytes en ambos caminos y no deja datos"""
+        salida = StringIO()
+        call_command('benchmark_serializacion', filas=30, repeticiones=1, stdout=salida)
+        self.assertEqual(salida.getvalue().count('idénticos en ambos caminos'), 4)
+        self.assertFalse(Reporte.objects.exists())
+        self.assertFalse(Jornada.objects.exists())
+
+class ReporteCamposTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.robot = Robot.objects.create(nombre='Robot Test')
+        self.tanque = Tanque.objects.create(nombre='Tanque Test', capacidad=100)
+        self.maleza = Maleza.objects.create(nombre='Maleza Test')
+        catalogo.invalidar()
+        catalogo.activas()
+        for _ in range(5):
+            reporte = Reporte.objects.create(robot=self.robot, tanque=self.tanque, area_cubierta=12.5)
+            DetalleMaleza.objects.create(reporte=reporte, maleza=self.maleza, cantidad=3)
+        self.url = reverse('reporte-list')
+        self.client.force_authenticate(user=self.user)
+
+    def test_sin_parametros_conserva_la_representacion(self):
+        """Prueba que sin ?fields ni ?expand el reporte sigue incrustando robot, tanque y malezas"""
+        fila = self.client.get(self.url).data['results'][0]
+        self.assertEqual(fila['robot']['nombre'], 'Robot Test')
+        self.assertEqual(fila['tanque']['nombre'], 'Tanque Test')
+        self.assertEqual(fila['malezas_detectadas'][0]['maleza']['nombre'], 'Maleza Test')
+
+    def test_campos_reducen_respuesta_y_consulta(self):
+        """Prueba que ?fields devuelve solo esos campos y la consulta solo trae lo necesario"""
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.url, {'fields': 'id_reporte,fecha,area_cubierta,robot'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Sin detalles no hay prefetch, y solo se une el robot
+        self.assertEqual(len(consultas), 1)
+        sql = consultas[0]['sql']
+        self.assertIn('T002Robot', sql)
+        self.assertNotIn('T003Tanque', sql)
+        self.assertNotIn('T005Observaciones', sql)
+        fila = response.data['results'][0]
+        self.assertEqual(set(fila), {'id_reporte', 'fecha', 'area_cubierta', 'robot'})
+        # Sin ?expand la relación pedida se mantiene incrustada
+        self.assertEqual(fila['robot']['nombre'], 'Robot Test')
+
+    def test_expandir_solo_algunas_relaciones(self):
+        """Prueba que ?expand incrusta las relaciones nombradas y deja el id en las demás"""
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.url, {'expand': 'tanque'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        fila = response.data['results'][0]
+        self.assertEqual(fila['robot'], self.robot.id_robot)
+        self.assertEqual(fila['tanque']['nombre'], 'Tanque Test')
+        self.assertEqual(fila['malezas_detectadas'][0]['maleza'], self.maleza.id_maleza)
+        # Reportes con join al tanque y detalles en una consulta aparte
+        self.assertEqual(len(consultas), 2)
+        self.assertIn('T003Tanque', consultas[0]['sql'])
+        self.assertNotIn('T002Robot', consultas[0]['sql'])
+
+        fila = self.client.get(self.url, {'expand': 'maleza', 'fields': 'id_reporte,malezas_detectadas'}).data['results'][0]
+        self.assertEqual(set(fila), {'id_reporte', 'malezas_detectadas'})
+        self.assertEqual(fila['malezas_detectadas'][0]['maleza']['nombre'], 'Maleza Test')
+
+    def test_parametros_en_acciones_y_detalle(self):
+        """Prueba que ?fields también aplica a las acciones de listado y al detalle"""
+        response = self.client.get(reverse('reporte-por-robot'), {'robot_id': self.robot.id_robot, 'fields': 'id_reporte'})
+        self.assertEqual(response.data[0].keys(), {'id_reporte'})
+        reporte = Reporte.objects.first()
+        response = self.client.get(reverse('reporte-detail', args=[reporte.pk]), {'fields': 'tipo', 'expand': ''})
+        self.assertEqual(response.data, {'tipo': 'Jornada'})
+
+    def test_escritura_ignora_parametros(self):
+        """Prueba que ?fields no afecta la validación ni la respuesta de una escritura"""
+        response = self.client.post(
+            self.url + '?fields=id_reporte&expand=',
+            {'robot_id': self.robot.id_robot, 'tipo': 'Jornada'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['robot']['nombre'], 'Robot Test')
+
+class ReporteLecturaRapidaTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        robot = Robot.objects.create(nombre='Robot Ñandú', latitud=-34.6, ultima_telemetria=timezone.now())
+        tanque = Tanque.objects.create(nombre='Tanque Test', capacidad=100, nivel_actual=37.5)
+        malezas = [Maleza.objects.create(nombre=f'Maleza {i}', nombre_cientifico='Amaranthus') for i in range(2)]
+        catalogo.invalidar()
+        catalogo.activas()
+        for i in range(6):
+            reporte = Reporte.objects.create(
+                robot=robot if i % 3 else None,
+                tanque=tanque if i % 2 else None,
+                area_cubierta=12.25 * i,
+                duracion=timedelta(hours=1, minutes=i, microseconds=i * 7),
+                observaciones='Sin novedad' if i % 2 else None,
+            )
+            for maleza in malezas[:i % 3]:
+                DetalleMaleza.objects.create(reporte=reporte, maleza=maleza, cantidad=i, ubicacion='Sector A')
+        self.client.force_authenticate(user=self.user)
+
+    def test_misma_salida_que_el_serializer(self):
+        """Prueba que la lectura rápida produce los mismos bytes JSON que ReporteSerializer"""
+        reportes = Reporte.objects.order_by('-fecha', '-pk')
+        esperado = JSONRenderer().render(
+            ReporteSerializer(reportes.prefetch_related('detallemaleza_set'), many=True).data
+        )
+        obtenido = JSONRenderer().render(LECTURA_REPORTE.filas(LECTURA_REPORTE.consulta(reportes)))
+        self.assertEqual(obtenido, esperado)
+
+    def test_listado_usa_lectura_rapida(self):
+        """Prueba que el listado sale de values() con dos consultas y con el mismo contenido que con el serializer"""
+        url = reverse('reporte-list')
+        with CaptureQueriesContext(connection) as consultas:
+            rapida = self.client.get(url, {'page_size': 4})
+        self.assertEqual(rapida.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(consultas), 2)
+
+        # ?expand con los valores por defecto fuerza el camino del serializer
+        serializer = self.client.get(url, {'page_size': 4, 'expand': 'robot,tanque,maleza'})
+        self.assertEqual(rapida.json()['results'], serializer.json()['results'])
+
+        # El cursor funciona igual sobre las filas de values()
+        siguiente = self.client.get(rapida.json()['next'])
+        self.assertEqual(len(siguiente.json()['results']), 2)
+
+class JSONRapidoTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.datos = {
+            'fecha': datetime(2024, 5, 1, 8, 30, 15, 250, tzinfo=dt_timezone.utc),
+            'local': datetime(2024, 5, 1, 8, 30, tzinfo=dt_timezone(timedelta(hours=-5))),
+            'naive': datetime(2024, 5, 1, 8, 30),
+            'dia': date(2024, 5, 1),
+            'hora': time(8, 30, 0, 5),
+            'duracion': timedelta(hours=1, microseconds=5),
+            'decimal': Decimal('12.50'),
+            'texto': 'Ñandú\u2028fin',
+            'claves': {1: 'uno'},
+            'lista': [1, 2.5, None, True],
+        }
+
+    def test_mismos_bytes_que_drf(self):
+        """Prueba que el renderer rápido produce los mismos bytes que JSONRenderer, con y sin orjson"""
+        esperado = JSONRenderer().render(self.datos)
+        self.assertEqual(JSONRapidoRenderer().render(self.datos), esperado)
+        self.assertIn(b'"duracion":"3600.000005"', esperado)
+        self.assertIn(b'\\u2028', esperado)
+        with mock.patch('aspersax_api.json_rapido.orjson', None):
+            self.assertEqual(JSONRapidoRenderer().render(self.datos), esperado)
+
+        # Con sangría (API navegable) o enteros de más de 64 bits usa el camino de DRF
+        self.assertEqual(
+            JSONRapidoRenderer().render(self.datos, renderer_context={'indent': 4}),
+            JSONRenderer().render(self.datos, renderer_context={'indent': 4})
+        )
+        self.assertEqual(JSONRapidoRenderer().render({'n': 2 ** 70}), b'{"n":1180591620717411303424}')
+
+    def test_diferencias_con_drf(self):
+        """Prueba las diferencias documentadas con DRF: formato de floats extremos y NaN como null"""
+        if not json_rapido.disponible():
+            self.skipTest('orjson no está instalado')
+        self.assertEqual(JSONRenderer().render({'x': 1e-05, 'y': 1e16}), b'{"x":1e-05,"y":1e+16}')
+        self.assertEqual(JSONRapidoRenderer().render({'x': 1e-05, 'y': 1e16}), b'{"x":0.00001,"y":1e16}')
+
+        with self.assertRaises(ValueError):
+            JSONRenderer().render({'x': float('nan')})
+        self.assertEqual(JSONRapidoRenderer().render({'x': float('nan'), 'y': float('inf')}), b'{"x":null,"y":null}')
+
+    def test_parser(self):
+        """Prueba que el parser rápido lee UTF-8 y rechaza JSON inválido como el de DRF"""
+        cuerpo = '{"nombre": "Ñandú", "valores": [1, 2.5, null]}'.encode()
+        self.assertEqual(
+            JSONRapidoParser().parse(BytesIO(cuerpo)),
+            {'nombre': 'Ñandú', 'valores': [1, 2.5, None]}
+        )
+        for invalido in (b'{"a": }', b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                JSONRapidoParser().parse(BytesIO(invalido))
+        with mock.patch('aspersax_api.json_rapido.orjson', None):
+            self.assertEqual(JSONRapidoParser().parse(BytesIO(cuerpo))['nombre'], 'Ñandú')
+
+    def test_api_usa_renderer_y_parser(self):
+        """Prueba que las clases rápidas son opcionales y que una vista que las usa responde y acepta JSON"""
+        robot = Robot.objects.create(nombre='Robot Test')
+        response = self.client.get(reverse('reporte-list'))
+        self.assertIs(type(response.accepted_renderer), JSONRenderer)
+
+        rapidas = {'renderer_classes': [JSONRapidoRenderer], 'parser_classes': [JSONRapidoParser]}
+        with mock.patch.multiple(ReporteViewSet, **rapidas):
+            response = self.client.post(
+                reverse('reporte-list'),
+                data=json.dumps({'robot_id': robot.id_robot, 'duracion': '01:30:00'}),
+                content_type='application/json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertIsInstance(response.accepted_renderer, JSONRapidoRenderer)
+            self.assertEqual(response.json()['duracion'], '01:30:00')
+
+            response = self.client.post(reverse('reporte-list'), data=b'{"robot_id": ', content_type='application/json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_benchmark_json(self):
+        """Prueba que el benchmark de JSON mide ambos renderers y no deja datos"""
+        salida = StringIO()
+        call_command('benchmark_json', paginas=[20], repeticiones=1, stdout=salida)
+        self.assertIn('Mismos bytes con ambos renderers', salida.getvalue())
+        self.assertIn('Parse orjson', salida.getvalue())
+        self.assertFalse(Reporte.objects.exists())
@@ -3,15 +3,27 @@ from rest_framework.response import Response
 from rest_framework import generics, status, viewsets
 from django.db.models import Q
 from rest_framework.exceptions import NotFound, ValidationError
+from django.db import transaction
+from aspersax_api import versiones
+from aspersax_api.campos import OptimizarConsultaMixin
+from aspersax_api.lectura import ListaRapidaMixin
+from aspersax_api.paginacion import PaginacionPorFecha
+from robots.models import Robot
+from tanques.models import Tanque
+from malezas.catalogo import catalogo
 from .models import Reporte, DetalleMaleza
-from .serializers import ReporteSerializer, DetalleMalezaSerializer
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from .exportar import filas_reportes, generar_csv, generar_xlsx
+from .rollup import a_fecha, rango_dia, clave_reporte, recalcular_resumen, recalcular_malezas
+from .serializers import LECTURA_REPORTE, ReporteSerializer, DetalleMalezaSerializer, ReporteMasivoSerializer
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
 from datetime import timedelta
 
 
-class ReporteList(generics.ListCreateAPIView):
+class ReporteList(OptimizarConsultaMixin, generics.ListCreateAPIView):
     queryset = Reporte.objects.all()
     serializer_class = ReporteSerializer
 
@@ -35,7 +47,7 @@ class ReporteByJornada(generics.RetrieveAPIView):
             return get_object_or_404(Reporte, jornada__id_jornada=jornada_id)
         raise NotFound("Debe proporcionar un ID de jornada válido")
 
-class ReporteDetail(generics.RetrieveUpdateDestroyAPIView):
+class ReporteDetail(OptimizarConsultaMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Reporte.objects.all()
     serializer_class = ReporteSerializer
     lookup_field = 'id_reporte'
@@ -45,10 +57,49 @@ class EliminarReporte(generics.DestroyAPIView):
     serializer_class = ReporteSerializer
     lookup_field = 'id_reporte'
 
-class ReporteViewSet(viewsets.ModelViewSet):
+class _ExportacionRenderer(BaseRenderer):
+    """
+    Los archivos se generan fuera del renderer con StreamingHttpResponse;
+    aquí solo llegan los errores, que se devuelven como JSON.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if renderer_context and renderer_context.get('response') is not None:
+            renderer_context['response']['Content-Type'] = 'application/json'
+        return JSONRenderer().render(data)
+
+class CSVRenderer(_ExportacionRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+class XLSXRenderer(_ExportacionRenderer):
+    media_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    format = 'xlsx'
+    charset = None
+
+# Tipo de contenido y generador de cada formato de exportación
+FORMATOS_EXPORTACION = {
+    'csv': (CSVRenderer.media_type + '; charset=utf-8', generar_csv),
+    'xlsx': (XLSXRenderer.media_type, generar_xlsx),
+}
+
+# Máximo de reportes aceptados en una carga masiva
+MAX_REPORTES_LOTE = 1000
+
+class ReporteViewSet(ListaRapidaMixin, OptimizarConsultaMixin, viewsets.ModelViewSet):
     queryset = Reporte.objects.filter(activo=True)
     serializer_class = ReporteSerializer
+    lectura_rapida = LECTURA_REPORTE
     permission_classes = [IsAuthenticated]
+    pagination_class = PaginacionPorFecha
+
+    def get_queryset(self):
+        # Cargar robot, tanque y detalles en consultas fijas por página; la
+        # maleza de cada detalle sale del catálogo en memoria. En las lecturas
+        # OptimizarConsultaMixin lo reduce a lo que pidan ?fields y ?expand
+        return Reporte.objects.filter(activo=True).select_related('robot', 'tanque').prefetch_related(
+            'detallemaleza_set'
+        )
 
     def perform_destroy(self, instance):
         instance.activo = False
@@ -85,7 +136,7 @@ class ReporteViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        reportes = self.queryset.filter(fecha__gte=fecha_inicio)
+        reportes = self.filter_queryset(self.get_queryset()).filter(fecha__gte=fecha_inicio)
         serializer = self.get_serializer(reportes, many=True)
         return Response(serializer.data)
 
@@ -98,7 +149,7 @@ class ReporteViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        reportes = self.queryset.filter(robot_id=robot_id)
+        reportes = self.filter_queryset(self.get_queryset()).filter(robot_id=robot_id)
         serializer = self.get_serializer(reportes, many=True)
         return Response(serializer.data)
 
@@ -111,7 +162,142 @@ class ReporteViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        reportes = self.queryset.filter(tipo=tipo)
+        reportes = self.filter_queryset(self.get_queryset()).filter(tipo=tipo)
         serializer = self.get_serializer(reportes, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Crea varios reportes con sus detalles de malezas en una sola transacción.
+        Si algún reporte es inválido no se guarda ninguno y los errores se
+        devuelven por índice.
+        """
+        datos = request.data
+        if not isinstance(datos, list):
+            return Response(
+                {'error': 'Se esperaba una lista de reportes'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(datos) > MAX_REPORTES_LOTE:
+            return Response(
+                {'error': f'Se aceptan como máximo {MAX_REPORTES_LOTE} reportes por carga'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = ReporteMasivoSerializer(data=datos, many=True)
+        if not serializer.is_valid():
+            errores = [
+                {'indice': indice, 'errores': error}
+                for indice, error in enumerate(serializer.errors) if error
+            ]
+            return Response({'errores': errores}, status=status.HTTP_400_BAD_REQUEST)
+        reportes = serializer.validated_data
+
+        # Validar todas las referencias con una consulta por tabla
+        robots = set(Robot.objects.filter(
+            pk__in={r['robot_id'] for r in reportes}
+        ).values_list('pk', flat=True))
+        tanques = set(Tanque.objects.filter(
+            pk__in={r['tanque_id'] for r in reportes if r.get('tanque_id')}
+        ).values_list('pk', flat=True))
+        malezas = catalogo.existentes(
+            {d['maleza_id'] for r in reportes for d in r.get('malezas_detectadas', [])}
+        )
+
+        errores = []
+        for indice, reporte in enumerate(reportes):
+            error = {}
+            if reporte['robot_id'] not in robots:
+                error['robot_id'] = [f'El robot {reporte["robot_id"]} no existe']
+            if reporte.get('tanque_id') and reporte['tanque_id'] not in tanques:
+                error['tanque_id'] = [f'El tanque {reporte["tanque_id"]} no existe']
+            detalles = {
+                posicion: {'maleza_id': [f'La maleza {detalle["maleza_id"]} no existe']}
+                for posicion, detalle in enumerate(reporte.get('malezas_detectadas', []))
+                if detalle['maleza_id'] not in malezas
+            }
+            if detalles:
+                error['malezas_detectadas'] = detalles
+            if error:
+                errores.append({'indice': indice, 'errores': error})
+        if errores:
+            return Response({'errores': errores}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            objetos = [
+                Reporte(**{campo: valor for campo, valor in reporte.items() if campo != 'malezas_detectadas'})
+                for reporte in reportes
+            ]
+            Reporte.objects.bulk_create(objetos)
+            DetalleMaleza.objects.bulk_create([
+                DetalleMaleza(reporte=objeto, **detalle)
+                for objeto, reporte in zip(objetos, reportes)
+                for detalle in reporte.get('malezas_detectadas', [])
+            ])
+
+            # bulk_create no dispara señales: actualizar resúmenes y versiones a mano
+            claves = {clave_reporte(objeto) for objeto in objetos}
+            recalcular_resumen(claves)
+            recalcular_malezas({
+                (clave_reporte(objeto)[0], detalle['maleza_id'])
+                for objeto, reporte in zip(objetos, reportes)
+                for detalle in reporte.get('malezas_detectadas', [])
+            })
+            versiones.incrementar_al_confirmar('reportes')
+
+        return Response(
+            {'creados': len(objetos), 'ids': [objeto.id_reporte for objeto in objetos]},
+            status=status.HTTP_201_CREATED
+        )
+
+    @action(detail=False, methods=['get'], renderer_classes=[CSVRenderer, XLSXRenderer])
+    def export(self, request):
+        """
+        Descarga los reportes filtrados como CSV o XLSX. Acepta los mismos
+        filtros que por_periodo, por_robot y por_tipo, además de desde/hasta.
+        La respuesta se genera por bloques desde un cursor de la base de datos.
+
+        El formato lo resuelve la negociación de contenido de DRF (?format= o
+        el encabezado Accept, CSV por defecto); un ?format= desconocido
+        responde 404 antes de llegar aquí.
+        """
+        formato = request.accepted_renderer.format
+
+        reportes = Reporte.objects.filter(activo=True)
+        periodo = request.query_params.get('periodo')
+        robot_id = request.query_params.get('robot_id')
+        tipo = request.query_params.get('tipo')
+        desde = request.query_params.get('desde')
+        hasta = request.query_params.get('hasta')
+
+        if periodo:
+            dias = {'dia': 1, 'semana': 7, 'mes': 30}.get(periodo)
+            if dias is None:
+                return Response(
+                    {'error': 'Periodo inválido. Use: dia, semana o mes'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            reportes = reportes.filter(fecha__gte=timezone.now() - timedelta(days=dias))
+        if robot_id:
+            try:
+                reportes = reportes.filter(robot_id=int(robot_id))
+            except ValueError:
+                return Response(
+                    {'error': 'robot_id debe ser un número entero'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        if tipo:
+            reportes = reportes.filter(tipo=tipo)
+        try:
+            if desde:
+                reportes = reportes.filter(fecha__gte=rango_dia(a_fecha(desde))[0])
+            if hasta:
+                reportes = reportes.filter(fecha__lt=rango_dia(a_fecha(hasta))[1])
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        content_type, generador = FORMATOS_EXPORTACION[formato]
+        response = StreamingHttpResponse(generador(filas_reportes(reportes)), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="reportes.{formato}"'
+        return response
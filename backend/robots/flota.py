@@ -0,0 +1,112 @@
+"""
+Estado de la flota en memoria del proceso.
+
+La flota es pequeña y se lee mucho más de lo que cambia, así que cada proceso
+guarda una instantánea de T002Robot y la reutiliza mientras la versión del
+tema 'robots' (aspersax_api.versiones) no cambie. Cualquier guardado de un
+robot incrementa esa versión al confirmarse, lo que invalida la instantánea
+en todos los procesos en su siguiente lectura.
+
+Con FLOTA_INSTANTANEA_COMPARTIDA el primer proceso que reconstruye una
+versión la publica en la caché de Django y los demás la toman de ahí en lugar
+de consultar la base de datos.
+"""
+import json
+import threading
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from aspersax_api.versiones import versiones
+from .models import Robot
+from .serializers import LECTURA_ROBOT
+
+# Segundos que una instantánea publicada permanece en la caché compartida
+DURACION_INSTANTANEA = 3600
+
+
+def json_compacto(datos):
+    # Mismo formato compacto que JSONRenderer de DRF
+    return json.dumps(datos, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def _clave(version):
+    return f'flota:{version}'
+
+
+class CacheFlota:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (versión, datos) en una sola tupla para leer ambos de forma atómica
+        self._actual = (None, None)
+
+    def _construir(self):
+        robots = list(LECTURA_ROBOT.consulta(Robot.objects.order_by('id_robot')))
+        serializados = LECTURA_ROBOT.filas(robots)
+        return {
+            # Estado resumido de los robots activos para el tablero
+            'estado': [
+                {
+                    'id': robot['id_robot'],
+                    'nombre': robot['nombre'],
+                    'estado': robot['estado'],
+                    'bateria': robot['bateria'],
+                    'ultima_actividad': robot['ultima_actividad'],
+                }
+                for robot in robots if robot['activo']
+            ],
+            'ids': frozenset(robot['id_robot'] for robot in robots),
+            # Cada robot ya serializado como lo haría RobotSerializer, listo para concatenar
+            'filas': [(robot['estado'], json_compacto(fila)) for robot, fila in zip(robots, serializados)],
+        }
+
+    def _vigentes(self):
+        # La versión se lee antes que los datos: si un guardado se confirma en
+        # medio, la siguiente lectura verá una versión nueva y recargará.
+        version = versiones('robots')[0]
+        vigente, datos = self._actual
+        if datos is not None and vigente == version:
+            return datos
+
+        with self._lock:
+            vigente, datos = self._actual
+            if datos is not None and vigente == version:
+                return datos
+            datos = None
+            if settings.FLOTA_INSTANTANEA_COMPARTIDA:
+                datos = cache.get(_clave(version))
+            if datos is None:
+                datos = self._construir()
+                if settings.FLOTA_INSTANTANEA_COMPARTIDA:
+                    cache.set(_clave(version), datos, timeout=DURACION_INSTANTANEA)
+            self._actual = (version, datos)
+        return datos
+
+    def invalidar(self):
+        """
+        Descarta la instantánea local y la publicada para la versión actual;
+        la siguiente lectura la reconstruye desde la base de datos.
+        """
+        with self._lock:
+            self._actual = (None, None)
+            cache.delete(_clave(versiones('robots')[0]))
+
+    def estado(self):
+        """
+        id, nombre, estado, batería y última actividad de los robots activos.
+        """
+        return [dict(robot) for robot in self._vigentes()['estado']]
+
+    def existe(self, id_robot):
+        return id_robot in self._vigentes()['ids']
+
+    def filas_json(self, estado=None):
+        """
+        Robots serializados como bytes JSON, opcionalmente filtrados por estado.
+        """
+        filas = self._vigentes()['filas']
+        if estado is None:
+            return [fila for _, fila in filas]
+        return [fila for estado_robot, fila in filas if estado_robot == estado]
+
+
+flota = CacheFlota()
@@ -0,0 +1,183 @@
+"""
+Escritura diferida de los latidos (heartbeats) de los robots.
+
+Cada latido solo actualiza ultima_actividad y, si viene, la batería. En vez
+de un UPDATE por latido, los latidos se acumulan en memoria (uno por robot,
+el más reciente) y un hilo los vuelca cada LATIDOS_INTERVALO segundos con un
+solo bulk_update. Con 200 robots latiendo cada pocos segundos se pasa de
+decenas de escrituras por segundo a una cada intervalo.
+
+El buffer es por proceso y se vacía también al terminar el proceso (atexit).
+Un latido que aún no se volcó se pierde si el proceso muere de forma abrupta,
+lo cual es aceptable para este dato.
+
+Un volcado solo incrementa la versión de 'robots' (que invalida la instantánea
+de la flota, los ETags y avisa al tablero) si cambió alguna batería. Si solo
+avanzó ultima_actividad se incrementa como mucho una vez cada
+REFRESCO_ACTIVIDAD segundos, así que en esas vistas la última actividad puede
+atrasarse hasta ese margen.
+"""
+import atexit
+import logging
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from aspersax_api import versiones
+from .models import Robot
+
+logger = logging.getLogger(__name__)
+
+# Segundos máximos entre incrementos de versión cuando solo cambia ultima_actividad
+REFRESCO_ACTIVIDAD = 60
+
+
+class BufferLatidos:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pendientes = {}
+        self._hilo = None
+        self._detener = threading.Event()
+        self._recibidos = 0
+        self._vaciados = 0
+        self._filas_escritas = 0
+        self._errores = 0
+        self._ultima_latencia = None
+        self._latencia_max = 0.0
+        self._ultimo_vaciado = None
+        self._ultima_version = None
+
+    def registrar(self, id_robot, bateria=None, fecha=None):
+        """
+        Anota un latido. Si el robot ya tenía uno pendiente se combinan: se
+        conserva la fecha más reciente y la última batería informada.
+        """
+        fecha = fecha or timezone.now()
+        with self._lock:
+            anterior = self._pendientes.get(id_robot)
+            if anterior is not None:
+                if anterior[0] > fecha:
+                    fecha = anterior[0]
+                if bateria is None:
+                    bateria = anterior[1]
+            self._pendientes[id_robot] = (fecha, bateria)
+            self._recibidos += 1
+        self._iniciar()
+
+    def vaciar(self):
+        """
+        Vuelca los latidos pendientes con un bulk_update por grupo de campos,
+        ambos en la misma transacción. Si la escritura falla, los latidos
+        vuelven al buffer para el siguiente intento.
+        """
+        with self._lock:
+            pendientes, self._pendientes = self._pendientes, {}
+        if not pendientes:
+            return 0
+
+        inicio = time.perf_counter()
+        con_bateria, sin_bateria = [], []
+        for id_robot, (fecha, bateria) in pendientes.items():
+            # Un latido atrasado (o con el reloj desfasado) no retrocede la
+            # última actividad ni pisa la batería de uno más nuevo
+            actividad = Greatest(Coalesce(F('ultima_actividad'), Value(fecha)), Value(fecha))
+            if bateria is None:
+                sin_bateria.append(Robot(pk=id_robot, ultima_actividad=actividad))
+            else:
+                con_bateria.append(Robot(pk=id_robot, ultima_actividad=actividad, bateria=Case(
+                    When(ultima_actividad__gt=fecha, then=F('bateria')),
+                    default=Value(bateria),
+                )))
+        try:
+            with transaction.atomic():
+                bateria_cambiada = False
+                if con_bateria:
+                    actuales = Robot.objects.filter(
+                        pk__in=[robot.pk for robot in con_bateria]
+                    ).values_list('pk', 'bateria', 'ultima_actividad')
+                    bateria_cambiada = any(
+                        bateria != pendientes[pk][1]
+                        and (ultima_actividad is None or ultima_actividad <= pendientes[pk][0])
+                        for pk, bateria, ultima_actividad in actuales
+                    )
+                Robot.objects.bulk_update(con_bateria, fields=['ultima_actividad', 'bateria'])
+                Robot.objects.bulk_update(sin_bateria, fields=['ultima_actividad'])
+                # bulk_update no dispara señales
+                self._versionar(bateria_cambiada)
+        except Exception:
+            logger.exception('Error al volcar %d latidos', len(pendientes))
+            with self._lock:
+                self._errores += 1
+                for id_robot, latido in pendientes.items():
+                    actual = self._pendientes.get(id_robot)
+                    if actual is None or actual[0] < latido[0]:
+                        self._pendientes[id_robot] = latido
+            return 0
+
+        latencia = (time.perf_counter() - inicio) * 1000
+        with self._lock:
+            self._vaciados += 1
+            self._filas_escritas += len(pendientes)
+            self._ultima_latencia = latencia
+            self._latencia_max = max(self._latencia_max, latencia)
+            self._ultimo_vaciado = timezone.now()
+        return len(pendientes)
+
+    def _versionar(self, bateria_cambiada):
+        ahora = time.monotonic()
+        if (
+            bateria_cambiada or self._ultima_version is None
+            or ahora - self._ultima_version >= REFRESCO_ACTIVIDAD
+        ):
+            self._ultima_version = ahora
+            versiones.incrementar_al_confirmar('robots')
+
+    def metricas(self):
+        with self._lock:
+            return {
+                'pendientes': len(self._pendientes),
+                'recibidos': self._recibidos,
+                'vaciados': self._vaciados,
+                'filas_escritas': self._filas_escritas,
+                'errores': self._errores,
+                'ultima_latencia_ms': self._ultima_latencia,
+                'latencia_max_ms': self._latencia_max,
+                'ultimo_vaciado': self._ultimo_vaciado,
+            }
+
+    def _iniciar(self):
+        # El hilo se crea con el primer latido, así los comandos de gestión
+        # (migrate, shell...) no lo arrancan.
+        if self._hilo is not None or settings.LATIDOS_INTERVALO <= 0:
+            return
+        with self._lock:
+            if self._hilo is not None:
+                return
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._bucle, name='latidos', daemon=True)
+            self._hilo.start()
+
+    def _bucle(self):
+        while not self._detener.wait(settings.LATIDOS_INTERVALO):
+            try:
+                self.vaciar()
+            finally:
+                close_old_connections()
+
+    def detener(self):
+        """
+        Detiene el hilo y vuelca lo pendiente. Se llama al terminar el proceso.
+        """
+        hilo = self._hilo
+        if hilo is not None:
+            self._detener.set()
+            hilo.join()
+            self._hilo = None
+        self.vaciar()
+
+
+buffer_latidos = BufferLatidos()
+atexit.register(buffer_latidos.detener)
@@ -0,0 +1,28 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from robots.telemetria import compactar, depurar
+
+
+class Command(BaseCommand):
+    help = (
+        'Compacta la telemetría cruda en agregados por minuto y por hora y depura '
+        'los datos que superan su retención. No hay un proceso en segundo plano: '
+        'hay que programarlo periódicamente (cron), por ejemplo cada 5 minutos. '
+        'No recalcula intervalos anteriores a la retención de las muestras crudas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horas', type=int, default=2,
+            help='Horas hacia atrás que se recalculan (cubre muestras que llegan tarde); '
+                 'se limita a la retención de las muestras crudas'
+        )
+
+    def handle(self, *args, **options):
+        agregados = compactar(timezone.now() - timedelta(hours=options['horas']))
+        crudas, minutos = depurar()
+        self.stdout.write(self.style.SUCCESS(
+            f'Agregados escritos: {agregados["minuto"]} por minuto, {agregados["hora"]} por hora. '
+            f'Depurados: {crudas} muestras, {minutos} agregados por minuto'
+        ))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 21:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('robots', '0002_remove_robot_modelo_robot_bateria_robot_nombre_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='robot',
+            index=models.Index(fields=['estado'], name='T002_estado_idx'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2 on 2026-10-17 21:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('robots', '0003_robot_t002_estado_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='robot',
+            name='latitud',
+            field=models.FloatField(blank=True, db_column='T002Latitud', null=True),
+        ),
+        migrations.AddField(
+            model_name='robot',
+            name='longitud',
+            field=models.FloatField(blank=True, db_column='T002Longitud', null=True),
+        ),
+        migrations.AddField(
+            model_name='robot',
+            name='nivel_tanque',
+            field=models.FloatField(blank=True, db_column='T002NivelTanque', null=True),
+        ),
+        migrations.AddField(
+            model_name='robot',
+            name='ultima_telemetria',
+            field=models.DateTimeField(blank=True, db_column='T002UltimaTelemetria', null=True),
+        ),
+        migrations.CreateModel(
+            name='RobotTelemetria',
+            fields=[
+                ('id_muestra', models.BigAutoField(db_column='T009IdMuestra', editable=False, primary_key=True, serialize=False)),
+                ('fecha', models.DateTimeField(db_column='T009Fecha')),
+                ('bateria', models.IntegerField(db_column='T009Bateria')),
+                ('estado', models.CharField(blank=True, choices=[('Disponible', 'Disponible'), ('En Mantenimiento', 'En Mantenimiento'), ('En Operación', 'En Operación'), ('Fuera de Servicio', 'Fuera de Servicio')], db_column='T009Estado', max_length=50, null=True)),
+                ('latitud', models.FloatField(blank=True, db_column='T009Latitud', null=True)),
+                ('longitud', models.FloatField(blank=True, db_column='T009Longitud', null=True)),
+                ('nivel_tanque', models.FloatField(blank=True, db_column='T009NivelTanque', null=True)),
+                ('robot', models.ForeignKey(db_column='T009IdRobot', on_delete=django.db.models.deletion.CASCADE, to='robots.robot')),
+            ],
+            options={
+                'verbose_name': 'Telemetría de Robot',
+                'verbose_name_plural': 'Telemetría de Robots',
+                'db_table': 'T009RobotTelemetria',
+                'indexes': [models.Index(fields=['robot', 'fecha'], name='T009_robot_fecha_idx'), models.Index(fields=['fecha'], name='T009_fecha_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TelemetriaAgregada',
+            fields=[
+                ('id_agregado', models.BigAutoField(db_column='T010IdAgregado', editable=False, primary_key=True, serialize=False)),
+                ('resolucion', models.CharField(choices=[('minuto', '1 minuto'), ('hora', '1 hora')], db_column='T010Resolucion', max_length=10)),
+                ('inicio', models.DateTimeField(db_column='T010Inicio')),
+                ('muestras', models.IntegerField(db_column='T010Muestras', default=0)),
+                ('bateria_promedio', models.FloatField(db_column='T010BateriaPromedio')),
+                ('bateria_min', models.IntegerField(db_column='T010BateriaMin')),
+                ('bateria_max', models.IntegerField(db_column='T010BateriaMax')),
+                ('nivel_tanque_promedio', models.FloatField(db_column='T010NivelTanquePromedio', null=True)),
+                ('nivel_tanque_min', models.FloatField(db_column='T010NivelTanqueMin', null=True)),
+                ('latitud', models.FloatField(db_column='T010Latitud', null=True)),
+                ('longitud', models.FloatField(db_column='T010Longitud', null=True)),
+                ('robot', models.ForeignKey(db_column='T010IdRobot', on_delete=django.db.models.deletion.CASCADE, to='robots.robot')),
+            ],
+            options={
+                'verbose_name': 'Telemetría Agregada',
+                'verbose_name_plural': 'Telemetría Agregada',
+                'db_table': 'T010TelemetriaAgregada',
+                'indexes': [models.Index(fields=['resolucion', 'inicio'], name='T010_resolucion_inicio_idx')],
+                'unique_together': {('robot', 'resolucion', 'inicio')},
+            },
+        ),
+    ]
@@ -14,6 +14,11 @@ class Robot(models.Model):
     bateria = models.IntegerField(default=100, db_column='T002Bateria')
     ultima_actividad = models.DateTimeField(auto_now=True, db_column='T002UltimaActividad')
     activo = models.BooleanField(default=True, db_column='T002Activo')
+    # Última muestra de telemetría recibida (se actualiza una vez por lote)
+    latitud = models.FloatField(null=True, blank=True, db_column='T002Latitud')
+    longitud = models.FloatField(null=True, blank=True, db_column='T002Longitud')
+    nivel_tanque = models.FloatField(null=True, blank=True, db_column='T002NivelTanque')  # en litros
+    ultima_telemetria = models.DateTimeField(null=True, blank=True, db_column='T002UltimaTelemetria')
     
     def __str__(self):
         return f"{self.nombre} ({self.estado})"
@@ -22,3 +27,68 @@ class Robot(models.Model):
         db_table = 'T002Robot'
         verbose_name = 'Robot'
         verbose_name_plural = 'Robots'
+        indexes = [
+            models.Index(fields=['estado'], name='T002_estado_idx'),
+        ]
+
+
+class RobotTelemetria(models.Model):
+    """
+    Muestra cruda de telemetría. Se conserva solo unos días
+    (TELEMETRIA_RETENCION_DIAS); el histórico vive en TelemetriaAgregada.
+    """
+    id_muestra = models.BigAutoField(primary_key=True, editable=False, db_column='T009IdMuestra')
+    robot = models.ForeignKey(Robot, on_delete=models.CASCADE, db_column='T009IdRobot')
+    fecha = models.DateTimeField(db_column='T009Fecha')
+    bateria = models.IntegerField(db_column='T009Bateria')
+    estado = models.CharField(max_length=50, choices=Robot.ESTADOS, null=True, blank=True, db_column='T009Estado')
+    latitud = models.FloatField(null=True, blank=True, db_column='T009Latitud')
+    longitud = models.FloatField(null=True, blank=True, db_column='T009Longitud')
+    nivel_tanque = models.FloatField(null=True, blank=True, db_column='T009NivelTanque')  # en litros
+
+    def __str__(self):
+        return f"Telemetría {self.robot_id} - {self.fecha}"
+
+    class Meta:
+        db_table = 'T009RobotTelemetria'
+        verbose_name = 'Telemetría de Robot'
+        verbose_name_plural = 'Telemetría de Robots'
+        indexes = [
+            models.Index(fields=['robot', 'fecha'], name='T009_robot_fecha_idx'),
+            models.Index(fields=['fecha'], name='T009_fecha_idx'),
+        ]
+
+class TelemetriaAgregada(models.Model):
+    """
+    Telemetría compactada por minuto u hora (ver robots/telemetria.py).
+    """
+    RESOLUCIONES = [
+        ('minuto', '1 minuto'),
+        ('hora', '1 hora'),
+    ]
+
+    id_agregado = models.BigAutoField(primary_key=True, editable=False, db_column='T010IdAgregado')
+    robot = models.ForeignKey(Robot, on_delete=models.CASCADE, db_column='T010IdRobot')
+    resolucion = models.CharField(max_length=10, choices=RESOLUCIONES, db_column='T010Resolucion')
+    inicio = models.DateTimeField(db_column='T010Inicio')
+    muestras = models.IntegerField(default=0, db_column='T010Muestras')
+    bateria_promedio = models.FloatField(db_column='T010BateriaPromedio')
+    bateria_min = models.IntegerField(db_column='T010BateriaMin')
+    bateria_max = models.IntegerField(db_column='T010BateriaMax')
+    nivel_tanque_promedio = models.FloatField(null=True, db_column='T010NivelTanquePromedio')
+    nivel_tanque_min = models.FloatField(null=True, db_column='T010NivelTanqueMin')
+    # Posición media del intervalo
+    latitud = models.FloatField(null=True, db_column='T010Latitud')
+    longitud = models.FloatField(null=True, db_column='T010Longitud')
+
+    def __str__(self):
+        return f"Telemetría {self.resolucion} {self.robot_id} - {self.inicio}"
+
+    class Meta:
+        db_table = 'T010TelemetriaAgregada'
+        verbose_name = 'Telemetría Agregada'
+        verbose_name_plural = 'Telemetría Agregada'
+        unique_together = ('robot', 'resolucion', 'inicio')
+        indexes = [
+            models.Index(fields=['resolucion', 'inicio'], name='T010_resolucion_inicio_idx'),
+        ]
@@ -1,7 +1,42 @@
 from rest_framework import serializers
+from aspersax_api.campos import CamposDinamicosMixin
+from aspersax_api.lectura import Columna, LecturaRapida, fecha_hora
 from .models import Robot
 
-class RobotSerializer(serializers.ModelSerializer):
+class RobotSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Robot
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+# Mismas columnas y orden que RobotSerializer, para la lectura rápida
+COLUMNAS_ROBOT = (
+    Columna('id_robot'),
+    Columna('nombre'),
+    Columna('estado'),
+    Columna('bateria'),
+    Columna('ultima_actividad', convertir=fecha_hora),
+    Columna('activo'),
+    Columna('latitud'),
+    Columna('longitud'),
+    Columna('nivel_tanque'),
+    Columna('ultima_telemetria', convertir=fecha_hora),
+)
+LECTURA_ROBOT = LecturaRapida(COLUMNAS_ROBOT)
+
+class MuestraTelemetriaSerializer(serializers.Serializer):
+    """
+    Muestra dentro de un lote de telemetría. El robot se valida contra un
+    conjunto precargado en la vista, no con una consulta por muestra.
+    """
+    robot_id = serializers.IntegerField()
+    fecha = serializers.DateTimeField()
+    bateria = serializers.IntegerField(min_value=0, max_value=100)
+    estado = serializers.ChoiceField(choices=Robot.ESTADOS, required=False, allow_null=True)
+    latitud = serializers.FloatField(min_value=-90, max_value=90, required=False, allow_null=True)
+    longitud = serializers.FloatField(min_value=-180, max_value=180, required=False, allow_null=True)
+    nivel_tanque = serializers.FloatField(min_value=0, required=False, allow_null=True)
+
+class LatidoSerializer(serializers.Serializer):
+    bateria = serializers.IntegerField(min_value=0, max_value=100, required=False, allow_null=True)
+    fecha = serializers.DateTimeField(required=False)
+
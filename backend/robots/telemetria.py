@@ -0,0 +1,138 @@
+"""
+Ingesta y compactación de la telemetría de robots.
+
+Los robots acumulan muestras y las envían por lotes; cada lote se escribe con
+un solo bulk_create y actualiza la instantánea del robot (T002) una vez por
+robot. La compactación (comando compactar_telemetria, que se programa con
+cron cada pocos minutos; no hay un proceso en segundo plano) resume las
+muestras crudas en agregados por minuto y por hora y depura lo que supera el
+periodo de retención.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min, Q
+from django.db.models.functions import TruncHour, TruncMinute
+from django.utils import timezone
+from aspersax_api import versiones
+from .models import Robot, RobotTelemetria, TelemetriaAgregada
+
+TAMANO_LOTE = 1000
+
+# Campos de la instantánea que solo se actualizan si la muestra los trae
+CAMPOS_OPCIONALES = ('estado', 'latitud', 'longitud', 'nivel_tanque')
+
+TRUNCAR = {
+    'minuto': TruncMinute,
+    'hora': TruncHour,
+}
+
+
+def registrar_muestras(muestras):
+    """
+    Guarda un lote de muestras ya validadas y actualiza la última posición,
+    batería y estado de cada robot con su muestra más reciente del lote.
+    Una muestra atrasada nunca sobrescribe una instantánea más nueva.
+    """
+    with transaction.atomic():
+        RobotTelemetria.objects.bulk_create(
+            [RobotTelemetria(**muestra) for muestra in muestras], batch_size=TAMANO_LOTE
+        )
+
+        ultimas = {}
+        for muestra in muestras:
+            actual = ultimas.get(muestra['robot_id'])
+            if actual is None or muestra['fecha'] >= actual['fecha']:
+                ultimas[muestra['robot_id']] = muestra
+
+        for robot_id, muestra in ultimas.items():
+            cambios = {
+                'bateria': muestra['bateria'],
+                'ultima_actividad': muestra['fecha'],
+                'ultima_telemetria': muestra['fecha'],
+            }
+            cambios.update({
+                campo: muestra[campo] for campo in CAMPOS_OPCIONALES
+                if muestra.get(campo) is not None
+            })
+            Robot.objects.filter(
+                Q(ultima_telemetria__isnull=True) | Q(ultima_telemetria__lt=muestra['fecha']),
+                pk=robot_id,
+            ).update(**cambios)
+
+        # update() no dispara señales
+        versiones.incrementar_al_confirmar('robots')
+    return len(muestras)
+
+
+def _inicio_minuto(fecha):
+    return timezone.localtime(fecha).replace(second=0, microsecond=0)
+
+
+def _inicio_hora(fecha):
+    return timezone.localtime(fecha).replace(minute=0, second=0, microsecond=0)
+
+
+def _agregar(resolucion, desde, hasta):
+    """
+    Recalcula los agregados de una resolución en [desde, hasta). Se borran y
+    se vuelven a insertar, de modo que repetir la compactación es seguro y
+    las muestras que llegan tarde dentro de la ventana quedan incluidas.
+    """
+    filas = RobotTelemetria.objects.filter(fecha__gte=desde, fecha__lt=hasta).annotate(
+        inicio=TRUNCAR[resolucion]('fecha')
+    ).values('robot_id', 'inicio').annotate(
+        muestras=Count('id_muestra'),
+        bateria_promedio=Avg('bateria'),
+        bateria_min=Min('bateria'),
+        bateria_max=Max('bateria'),
+        nivel_tanque_promedio=Avg('nivel_tanque'),
+        nivel_tanque_min=Min('nivel_tanque'),
+        latitud=Avg('latitud'),
+        longitud=Avg('longitud'),
+    ).order_by()
+
+    TelemetriaAgregada.objects.filter(resolucion=resolucion, inicio__gte=desde, inicio__lt=hasta).delete()
+    agregados = TelemetriaAgregada.objects.bulk_create(
+        [TelemetriaAgregada(resolucion=resolucion, **fila) for fila in filas], batch_size=TAMANO_LOTE
+    )
+    return len(agregados)
+
+
+def compactar(desde, hasta=None, ahora=None):
+    """
+    Compacta las muestras desde ``desde`` hasta el último minuto cerrado.
+    La hora en curso se incluye parcialmente y se completa en la siguiente
+    ejecución. Devuelve cuántos agregados se escribieron por resolución.
+
+    Los intervalos que empiezan antes del límite de retención de las muestras
+    crudas (respecto de ``ahora``) no se recalculan: depurar() pudo borrar
+    sus muestras y rehacerlos los dejaría vacíos o incompletos.
+    """
+    ahora = ahora or timezone.now()
+    hasta = _inicio_minuto(hasta or ahora)
+    limite = ahora - timedelta(days=settings.TELEMETRIA_RETENCION_DIAS)
+    # Primer intervalo que empieza después del límite, con todas sus muestras
+    desde_minuto = max(_inicio_minuto(desde), _inicio_minuto(limite) + timedelta(minutes=1))
+    desde_hora = max(_inicio_hora(desde), _inicio_hora(limite) + timedelta(hours=1))
+    with transaction.atomic():
+        return {
+            'minuto': _agregar('minuto', desde_minuto, hasta),
+            'hora': _agregar('hora', desde_hora, hasta),
+        }
+
+
+def depurar(ahora=None):
+    """
+    Borra las muestras crudas y los agregados por minuto que superan su
+    periodo de retención. Devuelve la cantidad de filas borradas de cada tipo.
+    """
+    ahora = ahora or timezone.now()
+    crudas, _ = RobotTelemetria.objects.filter(
+        fecha__lt=ahora - timedelta(days=settings.TELEMETRIA_RETENCION_DIAS)
+    ).delete()
+    minutos, _ = TelemetriaAgregada.objects.filter(
+        resolucion='minuto',
+        inicio__lt=ahora - timedelta(days=settings.TELEMETRIA_RETENCION_MINUTOS_DIAS),
+    ).delete()
+    return crudas, minutos
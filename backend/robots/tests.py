@@ -1,9 +1,23 @@
+import json
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from .models import Robot
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import datetime, timedelta
+from io import StringIO
+from django.test import override_settings
+from unittest import mock
+from .flota import CacheFlota, flota
+from . import latidos
+from .latidos import BufferLatidos, buffer_latidos
+from .models import Robot, RobotTelemetria, TelemetriaAgregada
+from .serializers import RobotSerializer
+from .telemetria import compactar, depurar
 
 User = get_user_model()
 
@@ -86,3 +100,335 @@ class RobotTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['modelo'], 'Modelo Test')
+
+
+class TelemetriaTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.robot = Robot.objects.create(nombre='Robot Test')
+        self.otro = Robot.objects.create(nombre='Robot Dos')
+        self.base = timezone.make_aware(datetime(2024, 5, 10, 8, 0))
+        self.url = reverse('robot-telemetria')
+        self.client.force_authenticate(user=self.user)
+
+    def muestra(self, robot, segundos, bateria, **extra):
+        return {
+            'robot_id': robot.id_robot,
+            'fecha': (self.base + timedelta(seconds=segundos)).isoformat(),
+            'bateria': bateria,
+            **extra,
+        }
+
+    def test_ingesta_por_lote(self):
+        """Prueba que un lote se guarda con consultas fijas y actualiza la instantánea una vez por robot"""
+        lote = [self.muestra(self.robot, i, 100 - i, latitud=4.6, longitud=-74.1) for i in range(50)]
+        lote.append(self.muestra(self.otro, 5, 70, estado='En Operación', nivel_tanque=12.5))
+        # Validación de robots + bulk_create + un UPDATE por robot (+ savepoint del atomic)
+        with self.assertNumQueries(6):
+            response = self.client.post(self.url, lote, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['recibidas'], 51)
+        self.assertEqual(RobotTelemetria.objects.count(), 51)
+
+        self.robot.refresh_from_db()
+        self.assertEqual(self.robot.bateria, 51)
+        self.assertEqual(self.robot.ultima_telemetria, self.base + timedelta(seconds=49))
+        self.assertEqual(self.robot.latitud, 4.6)
+        self.otro.refresh_from_db()
+        self.assertEqual(self.otro.estado, 'En Operación')
+        self.assertEqual(self.otro.nivel_tanque, 12.5)
+
+    def test_muestra_atrasada_no_pisa_instantanea(self):
+        """Prueba que un lote con muestras anteriores no retrocede la instantánea del robot"""
+        self.client.post(self.url, [self.muestra(self.robot, 60, 80)], format='json')
+        self.client.post(self.url, [self.muestra(self.robot, 10, 95)], format='json')
+        self.robot.refresh_from_db()
+        self.assertEqual(self.robot.bateria, 80)
+        self.assertEqual(RobotTelemetria.objects.count(), 2)
+
+    def test_lote_invalido(self):
+        """Prueba que un lote con errores no guarda ninguna muestra"""
+        lote = [
+            self.muestra(self.robot, 0, 90),
+            self.muestra(self.robot, 1, 150),
+            {'robot_id': 9999, 'fecha': self.base.isoformat(), 'bateria': 50},
+        ]
+        response = self.client.post(self.url, lote, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errores'][0]['indice'], 1)
+        self.assertFalse(RobotTelemetria.objects.exists())
+
+        response = self.client.post(self.url, {'robot_id': self.robot.id_robot}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_compactacion(self):
+        """Prueba que la compactación genera agregados por minuto y hora y se puede repetir"""
+        # Dos muestras por minuto durante 90 minutos
+        lote = [self.muestra(self.robot, i * 30, 100 - i % 10, nivel_tanque=10.0) for i in range(180)]
+        self.client.post(self.url, lote, format='json')
+        hasta = self.base + timedelta(minutes=90)
+
+        for _ in range(2):
+            compactar(self.base, hasta, ahora=hasta)
+            minutos = TelemetriaAgregada.objects.filter(resolucion='minuto')
+            horas = TelemetriaAgregada.objects.filter(resolucion='hora').order_by('inicio')
+            self.assertEqual(minutos.count(), 90)
+            self.assertEqual([h.muestras for h in horas], [120, 60])
+
+        primer_minuto = minutos.get(inicio=self.base)
+        self.assertEqual(primer_minuto.muestras, 2)
+        self.assertEqual(primer_minuto.bateria_min, 99)
+        self.assertEqual(primer_minuto.bateria_max, 100)
+        self.assertEqual(primer_minuto.nivel_tanque_promedio, 10.0)
+
+    def test_depuracion(self):
+        """Prueba que la depuración borra solo lo que supera la retención"""
+        self.client.post(self.url, [self.muestra(self.robot, 0, 90)], format='json')
+        compactar(self.base, self.base + timedelta(minutes=5), ahora=self.base + timedelta(minutes=5))
+
+        self.assertEqual(depurar(self.base + timedelta(days=1)), (0, 0))
+        self.assertEqual(depurar(self.base + timedelta(days=30)), (1, 0))
+        self.assertEqual(depurar(self.base + timedelta(days=365)), (0, 1))
+        self.assertTrue(TelemetriaAgregada.objects.filter(resolucion='hora').exists())
+
+    def test_compactar_despues_de_depurar(self):
+        """Prueba que compactar un rango ya depurado no borra los agregados por hora"""
+        lote = [self.muestra(self.robot, i * 60, 90) for i in range(90)]
+        self.client.post(self.url, lote, format='json')
+        fin = self.base + timedelta(minutes=90)
+        compactar(self.base, fin, ahora=fin)
+
+        ahora = self.base + timedelta(days=8)
+        depurar(ahora)
+        self.assertFalse(RobotTelemetria.objects.exists())
+        self.assertEqual(compactar(self.base, ahora=ahora), {'minuto': 0, 'hora': 0})
+
+        horas = TelemetriaAgregada.objects.filter(resolucion='hora').order_by('inicio')
+        self.assertEqual([h.muestras for h in horas], [60, 30])
+        self.assertEqual(TelemetriaAgregada.objects.filter(resolucion='minuto').count(), 90)
+
+    def test_comando_compactar(self):
+        """Prueba el comando periódico de compactación"""
+        self.base = timezone.now() - timedelta(minutes=30)
+        self.client.post(self.url, [self.muestra(self.robot, 0, 90)], format='json')
+        salida = StringIO()
+        call_command('compactar_telemetria', stdout=salida)
+        self.assertIn('1 por minuto', salida.getvalue())
+
+
+class FlotaTests(APITestCase):
+    def setUp(self):
+        # TestCase no ejecuta on_commit: la versión de 'robots' no cambia entre pruebas
+        flota.invalidar()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        for i in range(3):
+            Robot.objects.create(nombre=f'Robot {i}', estado='Disponible' if i else 'En Operación')
+        self.url = reverse('robot-list')
+        self.client.force_authenticate(user=self.user)
+
+    def test_listado_desde_cache(self):
+        """Prueba que el listado conserva el formato de DRF y no consulta la base de datos al repetirse"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        esperado = RobotSerializer(Robot.objects.order_by('id_robot'), many=True).data
+        self.assertEqual(response.json()['count'], 3)
+        self.assertEqual(response.json()['results'], json.loads(json.dumps(esperado)))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).content, response.content)
+
+    def test_campos_solicitados(self):
+        """Prueba que con ?fields el listado se serializa desde la base solo con esos campos"""
+        response = self.client.get(self.url, {'fields': 'id_robot,nombre'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(
+            [dict(fila) for fila in response.data['results']],
+            list(Robot.objects.order_by('id_robot').values('id_robot', 'nombre'))
+        )
+
+        response = self.client.get(reverse('robots-por-estado', args=['Disponible']), {'fields': 'nombre'})
+        self.assertEqual([fila['nombre'] for fila in response.data['results']], ['Robot 1', 'Robot 2'])
+
+    def test_guardado_invalida_cache(self):
+        """Prueba que guardar un robot invalida la caché al confirmarse"""
+        self.client.get(self.url)
+        robot = Robot.objects.get(nombre='Robot 1')
+        with self.captureOnCommitCallbacks(execute=True):
+            robot.bateria = 15
+            robot.save()
+        response = self.client.get(self.url)
+        self.assertIn(15, [fila['bateria'] for fila in response.json()['results']])
+
+    def test_por_estado(self):
+        """Prueba que el filtro por estado usa la caché"""
+        response = self.client.get(reverse('robots-por-estado', args=['Disponible']))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([fila['nombre'] for fila in response.json()['results']], ['Robot 1', 'Robot 2'])
+
+    def test_instantanea_compartida(self):
+        """Prueba que otro proceso toma la instantánea publicada sin consultar la base de datos"""
+        flota.estado()
+        otro_proceso = CacheFlota()
+        with self.assertNumQueries(0):
+            estado = otro_proceso.estado()
+        self.assertEqual([robot['nombre'] for robot in estado], ['Robot 0', 'Robot 1', 'Robot 2'])
+
+
+@override_settings(LATIDOS_INTERVALO=0)
+class LatidosTests(APITestCase):
+    def setUp(self):
+        flota.invalidar()
+        buffer_latidos.vaciar()
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.robots = [Robot.objects.create(nombre=f'Robot {i}') for i in range(200)]
+        self.client.force_authenticate(user=self.user)
+
+    def test_latido_no_escribe_hasta_vaciar(self):
+        """Prueba que el latido responde 202 sin escribir y el volcado actualiza el robot"""
+        robot = self.robots[0]
+        flota.estado()
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('robot-latido', args=[robot.id_robot]), {'bateria': 33})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        robot.refresh_from_db()
+        self.assertEqual(robot.bateria, 100)
+
+        self.assertEqual(buffer_latidos.vaciar(), 1)
+        robot.refresh_from_db()
+        self.assertEqual(robot.bateria, 33)
+
+    def test_latidos_se_combinan(self):
+        """Prueba que 2000 latidos de 200 robots se vuelcan con un solo UPDATE"""
+        base = timezone.now()
+        for ronda in range(10):
+            for robot in self.robots:
+                buffer_latidos.registrar(robot.id_robot, bateria=100 - ronda,
+                                         fecha=base + timedelta(seconds=ronda))
+        self.assertEqual(buffer_latidos.metricas()['pendientes'], 200)
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(buffer_latidos.vaciar(), 200)
+        updates = [q['sql'] for q in consultas.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        robot = Robot.objects.get(pk=self.robots[-1].pk)
+        self.assertEqual(robot.bateria, 91)
+        self.assertEqual(robot.ultima_actividad, base + timedelta(seconds=9))
+
+    def test_latido_sin_bateria_conserva_bateria(self):
+        """Prueba que un latido sin batería solo actualiza la última actividad"""
+        robot = self.robots[0]
+        buffer_latidos.registrar(robot.id_robot, bateria=50)
+        buffer_latidos.registrar(robot.id_robot)
+        buffer_latidos.registrar(self.robots[1].id_robot)
+        buffer_latidos.vaciar()
+        self.assertEqual(Robot.objects.get(pk=robot.pk).bateria, 50)
+        self.assertEqual(Robot.objects.get(pk=self.robots[1].pk).bateria, 100)
+
+    def test_latido_atrasado_no_retrocede(self):
+        """Prueba que un latido más viejo que el guardado no retrocede la actividad ni pisa la batería"""
+        robot = self.robots[0]
+        ahora = timezone.now()
+        buffer_latidos.registrar(robot.id_robot, bateria=40, fecha=ahora)
+        buffer_latidos.vaciar()
+
+        buffer_latidos.registrar(robot.id_robot, bateria=90, fecha=ahora - timedelta(minutes=5))
+        buffer_latidos.registrar(self.robots[1].id_robot, fecha=ahora)
+        buffer_latidos.vaciar()
+        buffer_latidos.registrar(self.robots[1].id_robot, fecha=ahora - timedelta(minutes=5))
+        buffer_latidos.vaciar()
+
+        robot.refresh_from_db()
+        self.assertEqual((robot.ultima_actividad, robot.bateria), (ahora, 40))
+        self.assertEqual(Robot.objects.get(pk=self.robots[1].pk).ultima_actividad, ahora)
+
+    def test_version_solo_con_cambios_visibles(self):
+        """Prueba que un volcado con la misma batería no invalida la flota hasta el margen de actividad"""
+        buffer = BufferLatidos()
+        robot = self.robots[0]
+        with mock.patch.object(latidos.versiones, 'incrementar') as incrementar:
+            with self.captureOnCommitCallbacks(execute=True):
+                buffer.registrar(robot.id_robot, bateria=80)
+                buffer.vaciar()
+            self.assertEqual(incrementar.call_count, 1)
+
+            # Misma batería o solo actividad: no se incrementa dentro del margen
+            with self.captureOnCommitCallbacks(execute=True):
+                buffer.registrar(robot.id_robot, bateria=80)
+                buffer.vaciar()
+                buffer.registrar(self.robots[1].id_robot)
+                buffer.vaciar()
+            self.assertEqual(incrementar.call_count, 1)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                buffer.registrar(robot.id_robot, bateria=79)
+                buffer.vaciar()
+            self.assertEqual(incrementar.call_count, 2)
+
+            # Pasado el margen, la última actividad también llega a las vistas
+            buffer._ultima_version -= latidos.REFRESCO_ACTIVIDAD
+            with self.captureOnCommitCallbacks(execute=True):
+                buffer.registrar(robot.id_robot)
+                buffer.vaciar()
+            self.assertEqual(incrementar.call_count, 3)
+
+    def test_vaciado_atomico(self):
+        """Prueba que si falla el segundo bulk_update tampoco se escribe el primero"""
+        buffer = BufferLatidos()
+        buffer.registrar(self.robots[0].id_robot, bateria=20)
+        buffer.registrar(self.robots[1].id_robot)
+        original = Robot.objects.bulk_update
+
+        def fallar_sin_bateria(objetos, fields, **kwargs):
+            if fields == ['ultima_actividad']:
+                raise RuntimeError
+            return original(objetos, fields, **kwargs)
+
+        with mock.patch.object(Robot.objects, 'bulk_update', side_effect=fallar_sin_bateria):
+            self.assertEqual(buffer.vaciar(), 0)
+        self.assertEqual(Robot.objects.get(pk=self.robots[0].pk).bateria, 100)
+        self.assertEqual(buffer.metricas()['pendientes'], 2)
+
+    def test_error_devuelve_latidos_al_buffer(self):
+        """Prueba que si el volcado falla los latidos se reintentan en el siguiente"""
+        buffer = BufferLatidos()
+        buffer.registrar(self.robots[0].id_robot, bateria=20)
+        with mock.patch.object(Robot.objects, 'bulk_update', side_effect=RuntimeError):
+            self.assertEqual(buffer.vaciar(), 0)
+        self.assertEqual(buffer.metricas()['errores'], 1)
+        self.assertEqual(buffer.metricas()['pendientes'], 1)
+        self.assertEqual(buffer.vaciar(), 1)
+
+    def test_detener_vacia_pendientes(self):
+        """Prueba que al detener el buffer se escribe lo pendiente"""
+        buffer = BufferLatidos()
+        with override_settings(LATIDOS_INTERVALO=60):
+            buffer.registrar(self.robots[0].id_robot, bateria=10)
+            self.assertIsNotNone(buffer._hilo)
+            buffer.detener()
+        self.assertIsNone(buffer._hilo)
+        self.assertEqual(Robot.objects.get(pk=self.robots[0].pk).bateria, 10)
+
+    def test_metricas_y_robot_inexistente(self):
+        """Prueba las métricas del buffer y el 404 para robots desconocidos"""
+        response = self.client.post(reverse('robot-latido', args=[99999]), {})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.post(reverse('robot-latido', args=[self.robots[0].id_robot]), {})
+        buffer_latidos.vaciar()
+        metricas = self.client.get(reverse('robot-latidos-metricas')).data
+        self.assertEqual(metricas['pendientes'], 0)
+        self.assertIsNotNone(metricas['ultima_latencia_ms'])
+
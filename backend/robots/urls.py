@@ -8,4 +8,7 @@ urlpatterns = [
     path('<int:id_robot>/actualizar/', views.ActualizarRobot.as_view(), name='actualizar-robot'),
     path('<int:id_robot>/eliminar/', views.EliminarRobot.as_view(), name='eliminar-robot'),
     path('estado/<str:estado>/', views.RobotsByEstado.as_view(), name='robots-por-estado'),
+    path('telemetria/', views.IngestarTelemetria.as_view(), name='robot-telemetria'),
+    path('<int:id_robot>/latido/', views.LatidoRobot.as_view(), name='robot-latido'),
+    path('latidos/metricas/', views.MetricasLatidos.as_view(), name='robot-latidos-metricas'),
 ]
\ No newline at end of file
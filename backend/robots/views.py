@@ -3,11 +3,50 @@ from rest_framework.response import Response
 from rest_framework import generics, status
 from django.db.models import Q
 from rest_framework.exceptions import NotFound, ValidationError
+from django.http import HttpResponse
+from aspersax_api.campos import OptimizarConsultaMixin, campos_solicitados
+from .flota import flota, json_compacto
 from .models import Robot
-from .serializers import RobotSerializer
+from .latidos import buffer_latidos
+from .serializers import RobotSerializer, MuestraTelemetriaSerializer, LatidoSerializer
+from .telemetria import registrar_muestras
 
+# Máximo de muestras aceptadas en un lote de telemetría
+MAX_MUESTRAS_LOTE = 5000
 
-class RobotList(generics.ListCreateAPIView):
+
+class ListaFlotaMixin:
+    """
+    Responde el listado con los bytes JSON precalculados en la caché de la
+    flota, sin pasar por el ORM ni por RobotSerializer. Mantiene el formato
+    paginado de DRF. Con ?fields= las filas precalculadas no sirven y el
+    listado se serializa de la forma habitual.
+    """
+    def get_estado(self):
+        return None
+
+    def filter_queryset(self, queryset):
+        # Mismo orden que las filas de la flota
+        return super().filter_queryset(queryset).order_by('id_robot')
+
+    def list(self, request, *args, **kwargs):
+        if campos_solicitados(request) is not None:
+            return super().list(request, *args, **kwargs)
+        filas = flota.filas_json(self.get_estado())
+        pagina = self.paginate_queryset(filas)
+        if pagina is None:
+            return HttpResponse(b'[' + b','.join(filas) + b']', content_type='application/json')
+
+        paginador = self.paginator
+        encabezado = json_compacto({
+            'count': paginador.page.paginator.count,
+            'next': paginador.get_next_link(),
+            'previous': paginador.get_previous_link(),
+        })
+        cuerpo = encabezado[:-1] + b',"results":[' + b','.join(pagina) + b']}'
+        return HttpResponse(cuerpo, content_type='application/json')
+
+class RobotList(ListaFlotaMixin, OptimizarConsultaMixin, generics.ListCreateAPIView):
     queryset = Robot.objects.all()
     serializer_class = RobotSerializer
 
@@ -20,14 +59,20 @@ class ActualizarRobot(generics.UpdateAPIView):
     serializer_class = RobotSerializer
     lookup_field = 'id_robot'
 
-class RobotById(generics.RetrieveAPIView):
+class RobotById(OptimizarConsultaMixin, generics.RetrieveAPIView):
     queryset = Robot.objects.all()
     serializer_class = RobotSerializer
     lookup_field = 'id_robot'
 
-class RobotsByEstado(generics.ListAPIView):
+class RobotsByEstado(ListaFlotaMixin, OptimizarConsultaMixin, generics.ListAPIView):
     serializer_class = RobotSerializer
-    
+
+    def get_estado(self):
+        estado = self.kwargs.get('estado') or self.request.query_params.get('estado')
+        if not estado:
+            raise NotFound(detail="No se proporcionó un estado válido")
+        return estado
+
     def get_queryset(self):
         estado = self.kwargs.get('estado', None)
         if estado:
@@ -42,4 +87,72 @@ class RobotsByEstado(generics.ListAPIView):
 class EliminarRobot(generics.DestroyAPIView):
     queryset = Robot.objects.all()
     serializer_class = RobotSerializer
-    lookup_field = 'id_robot'
\ No newline at end of file
+    lookup_field = 'id_robot'
+
+
+class IngestarTelemetria(generics.GenericAPIView):
+    """
+    Recibe un lote de muestras de telemetría (una lista) de uno o varios
+    robots. Si alguna muestra es inválida no se guarda ninguna y los errores
+    se devuelven por índice.
+    """
+    serializer_class = MuestraTelemetriaSerializer
+
+    def post(self, request, *args, **kwargs):
+        datos = request.data
+        if not isinstance(datos, list):
+            return Response(
+                {'error': 'Se esperaba una lista de muestras'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(datos) > MAX_MUESTRAS_LOTE:
+            return Response(
+                {'error': f'Se aceptan como máximo {MAX_MUESTRAS_LOTE} muestras por lote'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = self.get_serializer(data=datos, many=True)
+        if not serializer.is_valid():
+            errores = [
+                {'indice': indice, 'errores': error}
+                for indice, error in enumerate(serializer.errors) if error
+            ]
+            return Response({'errores': errores}, status=status.HTTP_400_BAD_REQUEST)
+        muestras = serializer.validated_data
+
+        robots = set(Robot.objects.filter(
+            pk__in={m['robot_id'] for m in muestras}
+        ).values_list('pk', flat=True))
+        errores = [
+            {'indice': indice, 'errores': {'robot_id': [f'El robot {muestra["robot_id"]} no existe']}}
+            for indice, muestra in enumerate(muestras) if muestra['robot_id'] not in robots
+        ]
+        if errores:
+            return Response({'errores': errores}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'recibidas': registrar_muestras(muestras)}, status=status.HTTP_201_CREATED)
+
+
+class LatidoRobot(generics.GenericAPIView):
+    """
+    Registra un latido del robot (última actividad y batería). La escritura
+    se difiere y se combina con otros latidos (ver latidos.py), por eso
+    responde 202 sin tocar la base de datos.
+    """
+    serializer_class = LatidoSerializer
+
+    def post(self, request, id_robot, *args, **kwargs):
+        if not flota.existe(id_robot):
+            raise NotFound(detail=f"El robot {id_robot} no existe")
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        buffer_latidos.registrar(id_robot, **serializer.validated_data)
+        return Response(status=status.HTTP_202_ACCEPTED)
+
+class MetricasLatidos(generics.GenericAPIView):
+    """
+    Profundidad del buffer de latidos y latencia de los volcados de este proceso.
+    """
+    def get(self, request, *args, **kwargs):
+        return Response(buffer_latidos.metricas())
+
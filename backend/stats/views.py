@@ -2,6 +2,7 @@ from django.shortcuts import render
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from aspersax_api.condicional import condicional
 from django.db.models import Count, Sum
 from django.utils import timezone
 from datetime import timedelta
@@ -9,6 +10,9 @@ from robots.models import Robot
 from tanques.models import Tanque
 from malezas.models import Maleza
 from reportes.models import Reporte, DetalleMaleza
+from dashboard.kpis import (
+    calcular_kpis, serie_actividad, malezas_principales, estado_robots, estado_tanques
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,6 +21,7 @@ logger = logging.getLogger(__name__)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@condicional('robots', 'tanques', 'malezas', 'reportes')
 def get_stats(request):
     try:
         logger.info('Iniciando get_stats')
@@ -24,23 +29,7 @@ def get_stats(request):
         end_date = request.query_params.get('end_date')
         logger.info(f'Fechas recibidas: start_date={start_date}, end_date={end_date}')
 
-        # Filtrar por fechas si se proporcionan
-        reportes = Reporte.objects.filter(activo=True)
-        if start_date and end_date:
-            reportes = reportes.filter(fecha__range=[start_date, end_date])
-
-        stats = {
-            'total_robots': Robot.objects.filter(activo=True).count(),
-            'robots_activos': Robot.objects.filter(activo=True, estado='Activo').count(),
-            'total_tanques': Tanque.objects.filter(activo=True).count(),
-            'tanques_en_uso': Tanque.objects.filter(activo=True, estado__in=['Lleno', 'Medio', 'Bajo']).count(),
-            'total_malezas': Maleza.objects.filter(activo=True).count(),
-            'malezas_detectadas': DetalleMaleza.objects.filter(reporte__in=reportes).aggregate(
-                total=Sum('cantidad')
-            )['total'] or 0,
-            'area_cubierta': reportes.aggregate(total=Sum('area_cubierta'))['total'] or 0,
-            'herbicida_usado': reportes.aggregate(total=Sum('herbicida_usado'))['total'] or 0,
-        }
+        stats = calcular_kpis(start_date, end_date)
 
         logger.info(f'Stats generados: {stats}')
         return Response(stats)
@@ -50,6 +39,7 @@ def get_stats(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@condicional('reportes')
 def get_activity_data(request):
     try:
         logger.info('Iniciando get_activity_data')
@@ -57,71 +47,53 @@ def get_activity_data(request):
         end_date = request.query_params.get('end_date')
         logger.info(f'Fechas recibidas: start_date={start_date}, end_date={end_date}')
 
-        # Si no se proporcionan fechas, usar los últimos 7 días
-        if not start_date:
-            end_date = timezone.now()
-            start_date = end_date - timedelta(days=7)
-
-        reportes = Reporte.objects.filter(
-            fecha__range=[start_date, end_date],
-            activo=True
-        ).values('fecha__date').annotate(
-            robots=Count('robot', distinct=True),
-            malezas=Sum('detallemaleza__cantidad')
-        ).order_by('fecha__date')
-
-        activity_data = []
-        for reporte in reportes:
-            activity_data.append({
-                'fecha': reporte['fecha__date'].strftime('%Y-%m-%d'),
-                'robots': reporte['robots'],
-                'malezas': reporte['malezas'] or 0
-            })
+        activity_data = serie_actividad(
+            start_date, end_date, request.query_params.get('granularity', 'day')
+        )
 
         logger.info(f'Activity data generado: {activity_data}')
         return Response(activity_data)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
     except Exception as e:
         logger.error(f'Error en get_activity_data: {str(e)}')
         return Response({'error': str(e)}, status=500)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@condicional('robots')
 def get_robot_stats(request):
     try:
         logger.info('Iniciando get_robot_stats')
-        robots = Robot.objects.filter(activo=True).values(
-            'id', 'nombre', 'estado', 'bateria', 'ultima_actividad'
-        )
-        logger.info(f'Robot stats generados: {list(robots)}')
-        return Response(list(robots))
+        robots = estado_robots()
+        logger.info(f'Robot stats generados: {robots}')
+        return Response(robots)
     except Exception as e:
         logger.error(f'Error en get_robot_stats: {str(e)}')
         return Response({'error': str(e)}, status=500)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@condicional('tanques')
 def get_tank_stats(request):
     try:
         logger.info('Iniciando get_tank_stats')
-        tanques = Tanque.objects.filter(activo=True).values(
-            'id_tanque', 'nombre', 'capacidad', 'nivel_actual', 'estado'
-        )
-        logger.info(f'Tank stats generados: {list(tanques)}')
-        return Response(list(tanques))
+        tanques = estado_tanques()
+        logger.info(f'Tank stats generados: {tanques}')
+        return Response(tanques)
     except Exception as e:
         logger.error(f'Error en get_tank_stats: {str(e)}')
         return Response({'error': str(e)}, status=500)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@condicional('reportes', 'malezas')
 def get_weed_stats(request):
     try:
         logger.info('Iniciando get_weed_stats')
-        malezas = DetalleMaleza.objects.values('maleza__nombre').annotate(
-            total=Sum('cantidad')
-        ).order_by('-total')[:5]
-        logger.info(f'Weed stats generados: {list(malezas)}')
-        return Response(list(malezas))
+        malezas = malezas_principales()
+        logger.info(f'Weed stats generados: {malezas}')
+        return Response(malezas)
     except Exception as e:
         logger.error(f'Error en get_weed_stats: {str(e)}')
         return Response({'error': str(e)}, status=500)
@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-17 21:21
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jornadas', '0002_jornada_t001_fecha_id_idx'),
+        ('robots', '0004_robot_latitud_robot_longitud_robot_nivel_tanque_and_more'),
+        ('tanques', '0003_remove_tanque_tipo_tanque_nivel_actual_tanque_nombre_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoTanque',
+            fields=[
+                ('id_movimiento', models.BigAutoField(db_column='T011IdMovimiento', editable=False, primary_key=True, serialize=False)),
+                ('tipo', models.CharField(choices=[('Recarga', 'Recarga'), ('Consumo', 'Consumo')], db_column='T011Tipo', max_length=20)),
+                ('litros', models.FloatField(db_column='T011Litros')),
+                ('fecha', models.DateTimeField(db_column='T011Fecha', default=django.utils.timezone.now)),
+                ('jornada', models.ForeignKey(blank=True, db_column='T011IdJornada', null=True, on_delete=django.db.models.deletion.SET_NULL, to='jornadas.jornada')),
+                ('robot', models.ForeignKey(blank=True, db_column='T011IdRobot', null=True, on_delete=django.db.models.deletion.SET_NULL, to='robots.robot')),
+                ('tanque', models.ForeignKey(db_column='T011IdTanque', on_delete=django.db.models.deletion.CASCADE, related_name='movimientos', to='tanques.tanque')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Tanque',
+                'verbose_name_plural': 'Movimientos de Tanques',
+                'db_table': 'T011MovimientoTanque',
+                'indexes': [models.Index(fields=['tanque', 'fecha'], name='T011_tanque_fecha_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 class Tanque(models.Model):
     ESTADOS = [
@@ -22,4 +23,34 @@ class Tanque(models.Model):
     class Meta:
         db_table = 'T003Tanque'
         verbose_name = 'Tanque'
-        verbose_name_plural = 'Tanques'
\ No newline at end of file
+        verbose_name_plural = 'Tanques'
+
+class MovimientoTanque(models.Model):
+    """
+    Libro de recargas y consumos de cada tanque. El nivel del tanque se
+    actualiza en la misma transacción que el movimiento (ver movimientos.py).
+    """
+    TIPOS = [
+        ('Recarga', 'Recarga'),
+        ('Consumo', 'Consumo'),
+    ]
+
+    id_movimiento = models.BigAutoField(primary_key=True, editable=False, db_column='T011IdMovimiento')
+    tanque = models.ForeignKey(Tanque, on_delete=models.CASCADE, related_name='movimientos', db_column='T011IdTanque')
+    tipo = models.CharField(max_length=20, choices=TIPOS, db_column='T011Tipo')
+    litros = models.FloatField(db_column='T011Litros')
+    fecha = models.DateTimeField(default=timezone.now, db_column='T011Fecha')
+    robot = models.ForeignKey('robots.Robot', on_delete=models.SET_NULL, null=True, blank=True, db_column='T011IdRobot')
+    jornada = models.ForeignKey('jornadas.Jornada', on_delete=models.SET_NULL, null=True, blank=True, db_column='T011IdJornada')
+
+    def __str__(self):
+        return f"{self.tipo} de {self.litros} L en {self.tanque_id} - {self.fecha}"
+
+    class Meta:
+        db_table = 'T011MovimientoTanque'
+        verbose_name = 'Movimiento de Tanque'
+        verbose_name_plural = 'Movimientos de Tanques'
+        indexes = [
+            models.Index(fields=['tanque', 'fecha'], name='T011_tanque_fecha_idx'),
+        ]
+
@@ -0,0 +1,111 @@
+"""
+Recargas y consumos de tanques aplicados en la base de datos.
+
+El nivel y el estado se calculan dentro del UPDATE con expresiones F() y
+Case/When, así dos operaciones concurrentes sobre el mismo tanque nunca
+pierden una actualización y solo se escriben las columnas que cambian.
+Cada operación deja su registro en MovimientoTanque.
+"""
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.db.models.lookups import GreaterThan, GreaterThanOrEqual
+from django.utils import timezone
+from aspersax_api import versiones
+from .models import Tanque, MovimientoTanque
+
+# Fracción de la capacidad desde la que un tanque se considera a medio llenar
+UMBRAL_MEDIO = 0.5
+
+
+def estado_para(nivel):
+    """
+    Expresión con el estado que corresponde a ``nivel`` (otra expresión),
+    con los mismos umbrales que se usaban al guardar desde Python.
+    """
+    return Case(
+        When(GreaterThanOrEqual(nivel, F('capacidad')), then=Value('Lleno')),
+        When(GreaterThanOrEqual(nivel, F('capacidad') * UMBRAL_MEDIO), then=Value('Medio')),
+        When(GreaterThan(nivel, 0), then=Value('Bajo')),
+        default=Value('Vacío'),
+    )
+
+
+def registrar_recarga(tanque, litros, robot_id=None, jornada_id=None):
+    """
+    Suma ``litros`` al tanque si caben. La condición de capacidad va en el
+    WHERE del UPDATE, por lo que dos recargas simultáneas no pueden
+    desbordarlo. Devuelve False si la recarga excede la capacidad.
+    """
+    nuevo_nivel = F('nivel_actual') + litros
+    ahora = timezone.now()
+    with transaction.atomic():
+        actualizados = Tanque.objects.filter(
+            pk=tanque.pk, nivel_actual__lte=F('capacidad') - litros
+        ).update(
+            nivel_actual=nuevo_nivel,
+            estado=estado_para(nuevo_nivel),
+            ultima_recarga=ahora,
+        )
+        if not actualizados:
+            return False
+        MovimientoTanque.objects.create(
+            tanque=tanque, tipo='Recarga', litros=litros, fecha=ahora,
+            robot_id=robot_id, jornada_id=jornada_id,
+        )
+        # update() no dispara señales
+        versiones.incrementar_al_confirmar('tanques')
+    return True
+
+
+def registrar_consumos(consumos):
+    """
+    Descuenta varios consumos (dicts con tanque_id, litros y opcionalmente
+    robot_id, jornada_id y fecha) con un único UPDATE para todos los tanques
+    y un único INSERT en el libro. El nivel nunca baja de cero.
+
+    El descuento se hace con F() dentro del UPDATE, que es el que bloquea las
+    filas hasta el final de la transacción. Después se leen los tanques que
+    quedaron por debajo de cero: lo que falta es lo que no se pudo descontar,
+    así que se dejan en cero y cada movimiento registra los litros realmente
+    descontados (en el orden recibido, 0 si el tanque ya quedó vacío).
+    """
+    if not consumos:
+        return 0
+    totales = defaultdict(float)
+    for consumo in consumos:
+        totales[consumo['tanque_id']] += consumo['litros']
+
+    nuevo_nivel = Case(
+        *[When(pk=tanque_id, then=F('nivel_actual') - litros) for tanque_id, litros in totales.items()],
+        output_field=FloatField(),
+    )
+    ahora = timezone.now()
+    with transaction.atomic():
+        Tanque.objects.filter(pk__in=totales).update(
+            nivel_actual=nuevo_nivel,
+            estado=estado_para(nuevo_nivel),
+        )
+        # Solo los tanques sobregirados necesitan una segunda escritura
+        faltantes = dict(
+            Tanque.objects.filter(pk__in=totales, nivel_actual__lt=0).values_list('pk', 'nivel_actual')
+        )
+        if faltantes:
+            Tanque.objects.filter(pk__in=faltantes).update(nivel_actual=0.0)
+
+        disponibles = {
+            tanque_id: max(litros + faltantes.get(tanque_id, 0.0), 0.0)
+            for tanque_id, litros in totales.items()
+        }
+        movimientos = []
+        for consumo in consumos:
+            litros = min(consumo['litros'], disponibles[consumo['tanque_id']])
+            disponibles[consumo['tanque_id']] -= litros
+            movimientos.append(MovimientoTanque(
+                tanque_id=consumo['tanque_id'], tipo='Consumo', litros=litros,
+                fecha=consumo.get('fecha') or ahora,
+                robot_id=consumo.get('robot_id'), jornada_id=consumo.get('jornada_id'),
+            ))
+        MovimientoTanque.objects.bulk_create(movimientos)
+        versiones.incrementar_al_confirmar('tanques')
+    return len(totales)
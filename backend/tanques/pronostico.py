@@ -0,0 +1,118 @@
+"""
+Pronóstico de agotamiento de los tanques activos.
+
+La tasa de consumo de cada tanque se ajusta con mínimos cuadrados sobre el
+herbicida acumulado de sus reportes (Reporte.herbicida_usado) en los últimos
+VENTANA_DIAS días. Todos los reportes se leen con un único values_list y las
+tasas de todos los tanques se calculan a la vez con operaciones vectorizadas
+de NumPy agrupadas por tanque.
+
+El resultado se guarda en la caché de Django con las versiones de los temas
+'tanques' y 'reportes', así que se reutiliza hasta el siguiente reporte,
+recarga o consumo.
+"""
+from datetime import timedelta
+import numpy as np
+from django.core.cache import cache
+from django.utils import timezone
+from aspersax_api.versiones import versiones
+from reportes.models import Reporte
+from .models import Tanque
+
+# Días de historia usados para ajustar la tasa de consumo
+VENTANA_DIAS = 30
+
+# Segundos que un pronóstico permanece en caché aunque no cambien los datos,
+# para que la ventana de historia avance
+DURACION_PRONOSTICO = 3600
+
+SEGUNDOS_DIA = 86400
+
+
+def _clave(version_tanques, version_reportes):
+    return f'pronostico:{version_tanques}:{version_reportes}'
+
+
+def tasas_consumo(grupos, dias, litros, total_grupos):
+    """
+    Litros por día de cada grupo (tanque). ``grupos`` es el índice del tanque
+    de cada reporte, ``dias`` su fecha en días y ``litros`` el herbicida usado,
+    ordenados por grupo y fecha. Devuelve (tasas, reportes por grupo).
+
+    La tasa es la pendiente de la recta ajustada al consumo acumulado. Con
+    menos de dos fechas distintas no hay pendiente y se usa el promedio de la
+    ventana.
+    """
+    cantidad = np.bincount(grupos, minlength=total_grupos)
+    if not len(grupos):
+        return np.zeros(total_grupos), cantidad
+
+    # Suma acumulada que vuelve a empezar en cada grupo
+    acumulado = np.cumsum(litros)
+    inicios = np.flatnonzero(np.r_[True, grupos[1:] != grupos[:-1]])
+    desplazamiento = np.repeat(acumulado[inicios] - litros[inicios], np.diff(np.r_[inicios, len(grupos)]))
+    acumulado -= desplazamiento
+
+    suma_x = np.bincount(grupos, weights=dias, minlength=total_grupos)
+    suma_y = np.bincount(grupos, weights=acumulado, minlength=total_grupos)
+    suma_xx = np.bincount(grupos, weights=dias * dias, minlength=total_grupos)
+    suma_xy = np.bincount(grupos, weights=dias * acumulado, minlength=total_grupos)
+
+    denominador = cantidad * suma_xx - suma_x * suma_x
+    ajustable = denominador > 1e-9
+    pendiente = np.divide(
+        cantidad * suma_xy - suma_x * suma_y, denominador,
+        out=np.zeros(total_grupos), where=ajustable
+    )
+    promedio = np.bincount(grupos, weights=litros, minlength=total_grupos) / VENTANA_DIAS
+    return np.where(ajustable, pendiente, promedio), cantidad
+
+
+def _calcular(ahora):
+    tanques = list(Tanque.objects.filter(activo=True).order_by('id_tanque').values_list(
+        'id_tanque', 'nombre', 'capacidad', 'nivel_actual'
+    ))
+    ids = np.array([tanque[0] for tanque in tanques], dtype=np.int64)
+
+    filas = list(Reporte.objects.filter(
+        activo=True, tanque__activo=True, herbicida_usado__gt=0,
+        fecha__gte=ahora - timedelta(days=VENTANA_DIAS),
+    ).order_by('tanque_id', 'fecha').values_list('tanque_id', 'fecha', 'herbicida_usado'))
+
+    referencia = ahora.timestamp()
+    grupos = np.searchsorted(ids, np.fromiter((fila[0] for fila in filas), dtype=np.int64, count=len(filas)))
+    dias = np.fromiter(
+        ((fila[1].timestamp() - referencia) / SEGUNDOS_DIA for fila in filas), dtype=float, count=len(filas)
+    )
+    litros = np.fromiter((fila[2] for fila in filas), dtype=float, count=len(filas))
+    tasas, cantidad = tasas_consumo(grupos, dias, litros, len(ids))
+
+    resultado = []
+    for (id_tanque, nombre, capacidad, nivel_actual), tasa, reportes in zip(tanques, tasas.tolist(), cantidad.tolist()):
+        dias_restantes = nivel_actual / tasa if tasa > 0 else None
+        resultado.append({
+            'id_tanque': id_tanque,
+            'nombre': nombre,
+            'capacidad': capacidad,
+            'nivel_actual': nivel_actual,
+            'consumo_diario': round(tasa, 3),
+            'reportes': reportes,
+            'dias_restantes': round(dias_restantes, 2) if dias_restantes is not None else None,
+            'fecha_agotamiento': ahora + timedelta(days=dias_restantes) if dias_restantes is not None else None,
+        })
+    return resultado
+
+
+def pronostico_tanques():
+    """
+    Tasa de consumo, días restantes y fecha estimada de agotamiento de cada
+    tanque activo. Un tanque sin consumo en la ventana no tiene fecha.
+    """
+    # Las versiones se leen antes que los datos, como en robots.flota
+    clave = _clave(*versiones('tanques', 'reportes'))
+    guardado = cache.get(clave)
+    if guardado is None:
+        ahora = timezone.now()
+        guardado = {'calculado': ahora, 'tanques': _calcular(ahora)}
+        cache.set(clave, guardado, timeout=DURACION_PRONOSTICO)
+    return guardado
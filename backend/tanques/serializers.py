@@ -1,9 +1,45 @@
 from rest_framework import serializers
-from .models import Tanque
+from aspersax_api.campos import CamposDinamicosMixin
+from aspersax_api.lectura import Columna, fecha_hora
+from .models import Tanque, MovimientoTanque
 
-class TanqueSerializer(serializers.ModelSerializer):
+class TanqueSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Tanque
         fields = ['id_tanque', 'nombre', 'capacidad', 'nivel_actual', 
                  'estado', 'ultima_recarga', 'activo']
-        read_only_fields = ['id_tanque']      
\ No newline at end of file
+        read_only_fields = ['id_tanque']
+
+# Mismas columnas y orden que TanqueSerializer, para la lectura rápida
+COLUMNAS_TANQUE = (
+    Columna('id_tanque'),
+    Columna('nombre'),
+    Columna('capacidad'),
+    Columna('nivel_actual'),
+    Columna('estado'),
+    Columna('ultima_recarga', convertir=fecha_hora),
+    Columna('activo'),
+)
+
+class MovimientoTanqueSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MovimientoTanque
+        fields = ['id_movimiento', 'tanque', 'tipo', 'litros', 'fecha', 'robot', 'jornada']
+        read_only_fields = fields
+
+class RecargaSerializer(serializers.Serializer):
+    cantidad = serializers.FloatField()
+    robot_id = serializers.IntegerField(required=False, allow_null=True)
+    jornada_id = serializers.IntegerField(required=False, allow_null=True)
+
+class ConsumoSerializer(serializers.Serializer):
+    """
+    Consumo dentro de un lote. Las referencias se validan contra conjuntos
+    precargados en la vista, no con una consulta por elemento.
+    """
+    tanque_id = serializers.IntegerField()
+    litros = serializers.FloatField(min_value=0)
+    robot_id = serializers.IntegerField(required=False, allow_null=True)
+    jornada_id = serializers.IntegerField(required=False, allow_null=True)
+    fecha = serializers.DateTimeField(required=False)
+
@@ -3,8 +3,17 @@ from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from .models import Tanque
+from robots.models import Robot
+from .models import Tanque, MovimientoTanque
+from .movimientos import registrar_recarga, registrar_consumos
+from .pronostico import pronostico_tanques
+from datetime import timedelta
 from decimal import Decimal
+from django.core.cache import cache
+from django.utils import timezone
+from reportes.models import Reporte
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 User = get_user_model()
 
@@ -91,3 +100,187 @@ class TanqueTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['tipo'], 'Principal')
+
+
+class MovimientoTanqueTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        self.robot = Robot.objects.create(nombre='Robot Test')
+        self.tanque = Tanque.objects.create(nombre='Tanque 1', capacidad=100, nivel_actual=20, estado='Bajo')
+        self.otro = Tanque.objects.create(nombre='Tanque 2', capacidad=50, nivel_actual=50, estado='Lleno')
+        self.client.force_authenticate(user=self.user)
+
+    def test_recargar(self):
+        """Prueba que la recarga suma en la base de datos, recalcula el estado y registra el movimiento"""
+        url = reverse('tanque-recargar', args=[self.tanque.id_tanque])
+        response = self.client.post(url, {'cantidad': 40, 'robot_id': self.robot.id_robot}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['nivel_actual'], 60)
+        self.assertEqual(response.data['estado'], 'Medio')
+
+        movimiento = MovimientoTanque.objects.get()
+        self.assertEqual((movimiento.tipo, movimiento.litros, movimiento.robot_id), ('Recarga', 40, self.robot.id_robot))
+
+    def test_recargas_concurrentes_no_pierden_litros(self):
+        """Prueba que dos recargas con la misma instancia desactualizada se aplican ambas"""
+        self.assertTrue(registrar_recarga(self.tanque, 30))
+        self.assertTrue(registrar_recarga(self.tanque, 50))
+        self.tanque.refresh_from_db()
+        self.assertEqual(self.tanque.nivel_actual, 100)
+        self.assertEqual(self.tanque.estado, 'Lleno')
+
+        # La capacidad se comprueba en el UPDATE, no con el nivel leído antes
+        self.assertFalse(registrar_recarga(self.tanque, 1))
+        self.assertEqual(MovimientoTanque.objects.count(), 2)
+
+    def test_recargar_invalido(self):
+        """Prueba las recargas que exceden la capacidad o no son positivas"""
+        url = reverse('tanque-recargar', args=[self.tanque.id_tanque])
+        for datos in ({'cantidad': 90}, {'cantidad': 0}, {'cantidad': 'mucho'}, {'cantidad': 5, 'robot_id': 999}):
+            response = self.client.post(url, datos, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(MovimientoTanque.objects.exists())
+
+    def test_consumo_por_lote(self):
+        """Prueba que un lote de consumos descuenta varios tanques con un solo UPDATE"""
+        consumos = [
+            {'tanque_id': self.tanque.id_tanque, 'litros': 5, 'robot_id': self.robot.id_robot},
+            {'tanque_id': self.tanque.id_tanque, 'litros': 10},
+            {'tanque_id': self.otro.id_tanque, 'litros': 30},
+        ]
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.post(reverse('tanque-consumir'), consumos, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'tanques': 2, 'movimientos': 3})
+        actualizaciones = [q for q in contexto.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(actualizaciones), 1)
+        # El descuento se calcula sobre la columna, no con un nivel leído antes
+        self.assertIn('"T003NivelActual" -', actualizaciones[0]['sql'])
+
+        self.tanque.refresh_from_db()
+        self.otro.refresh_from_db()
+        self.assertEqual((self.tanque.nivel_actual, self.tanque.estado), (5, 'Bajo'))
+        self.assertEqual((self.otro.nivel_actual, self.otro.estado), (20, 'Bajo'))
+        self.assertEqual(MovimientoTanque.objects.filter(tipo='Consumo').count(), 3)
+
+    def test_consumo_no_baja_de_cero(self):
+        """Prueba que consumir más de lo disponible deja el tanque vacío y el libro con lo descontado"""
+        registrar_consumos([
+            {'tanque_id': self.tanque.id_tanque, 'litros': 15},
+            {'tanque_id': self.tanque.id_tanque, 'litros': 500},
+            {'tanque_id': self.tanque.id_tanque, 'litros': 4},
+        ])
+        self.tanque.refresh_from_db()
+        self.assertEqual((self.tanque.nivel_actual, self.tanque.estado), (0, 'Vacío'))
+        litros = list(MovimientoTanque.objects.order_by('id_movimiento').values_list('litros', flat=True))
+        self.assertEqual(litros, [15, 5, 0])
+        self.assertEqual(sum(litros), 20)
+
+    def test_consumo_sobre_nivel_cambiado(self):
+        """Prueba que el consumo parte del nivel guardado aunque haya cambiado desde la última lectura"""
+        Tanque.objects.filter(pk=self.tanque.pk).update(nivel_actual=8)
+        registrar_consumos([
+            {'tanque_id': self.tanque.id_tanque, 'litros': 5},
+            {'tanque_id': self.tanque.id_tanque, 'litros': 10},
+        ])
+        self.tanque.refresh_from_db()
+        self.assertEqual((self.tanque.nivel_actual, self.tanque.estado), (0, 'Vacío'))
+        litros = list(MovimientoTanque.objects.order_by('id_movimiento').values_list('litros', flat=True))
+        self.assertEqual(litros, [5, 3])
+
+    def test_consumo_invalido(self):
+        """Prueba que un lote con referencias inexistentes no descuenta nada"""
+        consumos = [
+            {'tanque_id': self.tanque.id_tanque, 'litros': 5},
+            {'tanque_id': 999, 'litros': 5},
+            {'tanque_id': self.tanque.id_tanque, 'litros': -1},
+        ]
+        response = self.client.post(reverse('tanque-consumir'), consumos, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['indice'] for error in response.data['errores']], [2])
+
+        response = self.client.post(reverse('tanque-consumir'), consumos[:2], format='json')
+        self.assertEqual(response.data['errores'], [{'indice': 1, 'errores': {'tanque_id': ['El tanque 999 no existe']}}])
+        self.tanque.refresh_from_db()
+        self.assertEqual(self.tanque.nivel_actual, 20)
+
+    def test_listar_movimientos(self):
+        """Prueba el historial de movimientos de un tanque, del más reciente al más antiguo"""
+        registrar_recarga(self.tanque, 10)
+        registrar_consumos([{'tanque_id': self.tanque.id_tanque, 'litros': 3}])
+        response = self.client.get(reverse('tanque-movimientos', args=[self.tanque.id_tanque]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([m['tipo'] for m in response.data['results']], ['Consumo', 'Recarga'])
+
+
+class PronosticoTanqueTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            email='test@example.com'
+        )
+        # Las versiones solo cambian al confirmar; cada prueba parte sin pronósticos guardados
+        cache.clear()
+        self.tanque = Tanque.objects.create(nombre='Tanque 1', capacidad=100, nivel_actual=20, estado='Bajo')
+        self.otro = Tanque.objects.create(nombre='Tanque 2', capacidad=50, nivel_actual=50, estado='Lleno')
+        self.ahora = timezone.now()
+        # 2 litros diarios durante los últimos 10 días
+        Reporte.objects.bulk_create([
+            Reporte(tanque=self.tanque, fecha=self.ahora - timedelta(days=dia), herbicida_usado=2)
+            for dia in range(10)
+        ])
+        self.client.force_authenticate(user=self.user)
+
+    def test_pronostico(self):
+        """Prueba la tasa de consumo y los días restantes de cada tanque activo"""
+        Tanque.objects.create(nombre='Inactivo', capacidad=10, nivel_actual=5, activo=False)
+        response = self.client.get(reverse('tanque-pronostico'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        tanque, otro = response.data['tanques']
+        self.assertAlmostEqual(tanque['consumo_diario'], 2, places=2)
+        self.assertAlmostEqual(tanque['dias_restantes'], 10, places=1)
+        self.assertEqual(tanque['reportes'], 10)
+        self.assertIsNotNone(tanque['fecha_agotamiento'])
+        # Sin consumo en la ventana no hay fecha de agotamiento
+        self.assertEqual((otro['consumo_diario'], otro['dias_restantes'], otro['fecha_agotamiento']), (0, None, None))
+
+    def test_un_solo_reporte_usa_promedio(self):
+        """Prueba que con un único reporte la tasa es el promedio de la ventana"""
+        Reporte.objects.create(tanque=self.otro, fecha=self.ahora, herbicida_usado=15)
+        otro = pronostico_tanques()['tanques'][1]
+        self.assertAlmostEqual(otro['consumo_diario'], 0.5)
+        self.assertAlmostEqual(otro['dias_restantes'], 100)
+
+    def test_consultas_constantes(self):
+        """Prueba que el pronóstico usa las mismas consultas sin importar la cantidad de tanques"""
+        with CaptureQueriesContext(connection) as pocos:
+            pronostico_tanques()
+        cache.clear()
+        for i in range(20):
+            tanque = Tanque.objects.create(nombre=f'Extra {i}', capacidad=10, nivel_actual=10)
+            Reporte.objects.create(tanque=tanque, fecha=self.ahora, herbicida_usado=1)
+        with CaptureQueriesContext(connection) as muchos:
+            self.assertEqual(len(pronostico_tanques()['tanques']), 22)
+        self.assertEqual(len(muchos.captured_queries), len(pocos.captured_queries))
+
+    def test_cache_hasta_recarga_o_reporte(self):
+        """Prueba que el pronóstico se reutiliza hasta la siguiente recarga o reporte"""
+        pronostico_tanques()
+        with self.assertNumQueries(0):
+            pronostico_tanques()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            registrar_recarga(self.tanque, 20)
+        tanque = pronostico_tanques()['tanques'][0]
+        self.assertEqual(tanque['nivel_actual'], 40)
+        self.assertAlmostEqual(tanque['dias_restantes'], 20, places=1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Reporte.objects.create(tanque=self.otro, fecha=self.ahora, herbicida_usado=15)
+        self.assertEqual(pronostico_tanques()['tanques'][1]['reportes'], 1)
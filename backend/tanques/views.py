@@ -3,13 +3,22 @@ from rest_framework.response import Response
 from rest_framework import generics, status, viewsets
 from django.db.models import Q
 from rest_framework.exceptions import NotFound, ValidationError
+from aspersax_api.campos import OptimizarConsultaMixin
+from aspersax_api.paginacion import PaginacionPorFecha
+from jornadas.models import Jornada
+from robots.models import Robot
 from .models import Tanque
-from .serializers import TanqueSerializer
+from .movimientos import registrar_recarga, registrar_consumos
+from .pronostico import pronostico_tanques
+from .serializers import TanqueSerializer, MovimientoTanqueSerializer, RecargaSerializer, ConsumoSerializer
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 
+# Máximo de consumos aceptados en un lote
+MAX_CONSUMOS_LOTE = 1000
 
-class TanqueList(generics.ListCreateAPIView):
+
+class TanqueList(OptimizarConsultaMixin, generics.ListCreateAPIView):
     queryset = Tanque.objects.all()
     serializer_class = TanqueSerializer
 
@@ -22,7 +31,7 @@ class ActualizarTanque(generics.UpdateAPIView):
     serializer_class = TanqueSerializer
     lookup_field = 'id_tanque'
 
-class TanqueByTipo(generics.ListAPIView):
+class TanqueByTipo(OptimizarConsultaMixin, generics.ListAPIView):
     serializer_class = TanqueSerializer
     
     def get_queryset(self):
@@ -31,7 +40,7 @@ class TanqueByTipo(generics.ListAPIView):
             return Tanque.objects.filter(tipo=tipo)
         raise NotFound("Debe proporcionar un tipo válido")
 
-class TanqueDetail(generics.RetrieveUpdateDestroyAPIView):
+class TanqueDetail(OptimizarConsultaMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Tanque.objects.all()
     serializer_class = TanqueSerializer
     lookup_field = 'id_tanque'
@@ -41,7 +50,7 @@ class EliminarTanque(generics.DestroyAPIView):
     serializer_class = TanqueSerializer
     lookup_field = 'id_tanque'
 
-class TanqueViewSet(viewsets.ModelViewSet):
+class TanqueViewSet(OptimizarConsultaMixin, viewsets.ModelViewSet):
     queryset = Tanque.objects.filter(activo=True)
     serializer_class = TanqueSerializer
     permission_classes = [IsAuthenticated]
@@ -53,30 +62,101 @@ class TanqueViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def recargar(self, request, pk=None):
         tanque = self.get_object()
-        cantidad = float(request.data.get('cantidad', 0))
-        
-        if cantidad <= 0:
+        serializer = RecargaSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+
+        if datos['cantidad'] <= 0:
             return Response(
                 {'error': 'La cantidad debe ser mayor que 0'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        nueva_cantidad = tanque.nivel_actual + cantidad
-        if nueva_cantidad > tanque.capacidad:
+        if datos.get('robot_id') and not Robot.objects.filter(pk=datos['robot_id']).exists():
+            return Response(
+                {'error': f'El robot {datos["robot_id"]} no existe'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if datos.get('jornada_id') and not Jornada.objects.filter(pk=datos['jornada_id']).exists():
+            return Response(
+                {'error': f'La jornada {datos["jornada_id"]} no existe'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not registrar_recarga(tanque, datos['cantidad'], datos.get('robot_id'), datos.get('jornada_id')):
             return Response(
                 {'error': 'La cantidad excede la capacidad del tanque'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        tanque.nivel_actual = nueva_cantidad
-        if nueva_cantidad >= tanque.capacidad:
-            tanque.estado = 'Lleno'
-        elif nueva_cantidad >= tanque.capacidad * 0.5:
-            tanque.estado = 'Medio'
-        elif nueva_cantidad > 0:
-            tanque.estado = 'Bajo'
-        else:
-            tanque.estado = 'Vacío'
-        
-        tanque.save()
-        return Response(TanqueSerializer(tanque).data)
\ No newline at end of file
+
+        tanque.refresh_from_db()
+        return Response(TanqueSerializer(tanque).data)
+
+    @action(detail=False, methods=['post'])
+    def consumir(self, request):
+        """
+        Descuenta el herbicida usado por un lote de jornadas. Si algún consumo
+        es inválido no se aplica ninguno y los errores se devuelven por índice.
+        """
+        datos = request.data
+        if not isinstance(datos, list):
+            return Response(
+                {'error': 'Se esperaba una lista de consumos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(datos) > MAX_CONSUMOS_LOTE:
+            return Response(
+                {'error': f'Se aceptan como máximo {MAX_CONSUMOS_LOTE} consumos por lote'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = ConsumoSerializer(data=datos, many=True)
+        if not serializer.is_valid():
+            errores = [
+                {'indice': indice, 'errores': error}
+                for indice, error in enumerate(serializer.errors) if error
+            ]
+            return Response({'errores': errores}, status=status.HTTP_400_BAD_REQUEST)
+        consumos = serializer.validated_data
+
+        # Validar todas las referencias con una consulta por tabla
+        tanques = set(self.get_queryset().filter(
+            pk__in={c['tanque_id'] for c in consumos}
+        ).values_list('pk', flat=True))
+        robots = set(Robot.objects.filter(
+            pk__in={c['robot_id'] for c in consumos if c.get('robot_id')}
+        ).values_list('pk', flat=True))
+        jornadas = set(Jornada.objects.filter(
+            pk__in={c['jornada_id'] for c in consumos if c.get('jornada_id')}
+        ).values_list('pk', flat=True))
+
+        errores = []
+        for indice, consumo in enumerate(consumos):
+            error = {}
+            if consumo['tanque_id'] not in tanques:
+                error['tanque_id'] = [f'El tanque {consumo["tanque_id"]} no existe']
+            if consumo.get('robot_id') and consumo['robot_id'] not in robots:
+                error['robot_id'] = [f'El robot {consumo["robot_id"]} no existe']
+            if consumo.get('jornada_id') and consumo['jornada_id'] not in jornadas:
+                error['jornada_id'] = [f'La jornada {consumo["jornada_id"]} no existe']
+            if error:
+                errores.append({'indice': indice, 'errores': error})
+        if errores:
+            return Response({'errores': errores}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'tanques': registrar_consumos(consumos), 'movimientos': len(consumos)})
+
+    @action(detail=False, methods=['get'])
+    def pronostico(self, request):
+        """
+        Días restantes y fecha estimada de agotamiento de cada tanque activo
+        según su consumo reciente.
+        """
+        return Response(pronostico_tanques())
+
+    @action(detail=True, methods=['get'])
+    def movimientos(self, request, pk=None):
+        tanque = self.get_object()
+        paginador = PaginacionPorFecha()
+        pagina = paginador.paginate_queryset(tanque.movimientos.all(), request, view=self)
+        serializer = MovimientoTanqueSerializer(pagina, many=True)
+        return paginador.get_paginated_response(serializer.data)
\ No newline at end of file
@@ -60,6 +60,7 @@ import TimelineIcon from '@mui/icons-material/Timeline';
 import WarningIcon from '@mui/icons-material/Warning';
 import RefreshIcon from '@mui/icons-material/Refresh';
 import { mockDataService } from '../services/mockDataService';
+import dashboardService from '../services/dashboardService';
 import UserProfileCard from '../components/UserProfileCard';
 
 interface StatCardProps {
@@ -255,15 +256,48 @@ const DashboardPage: React.FC = () => {
         fetchDashboardData();
     }, [fetchDashboardData, dateRange.start, dateRange.end]);
 
-    // Actualizar datos cada 30 segundos para reflejar cambios en tiempo real
+    // Aplica al estado del tablero las secciones recibidas por el flujo de eventos
+    const applyStreamData = useCallback((type: 'snapshot' | 'delta', data: any) => {
+        if (data.kpis) {
+            setStats((prev: any) => ({ ...prev, ...data.kpis }));
+        }
+        const merge = (key: string, rows: any[], section: any) => {
+            if (!section) return rows;
+            if (type === 'snapshot') {
+                const byId = new Map(section.map((row: any) => [row[key], row]));
+                return rows.map(row => byId.has(row[key]) ? { ...row, ...(byId.get(row[key]) as any) } : row);
+            }
+            const updated = new Map(section.actualizados.map((row: any) => [row[key], row]));
+            const removed = new Set(section.eliminados);
+            return rows
+                .filter(row => !removed.has(row[key]))
+                .map(row => updated.has(row[key]) ? { ...row, ...(updated.get(row[key]) as any) } : row);
+        };
+        // Las filas de la flota traen 'id'; en la página los robots usan 'id_robot'
+        const robotRows = (section: any) => {
+            if (!section) return section;
+            const rename = (row: any) => { const { id, ...rest } = row; return { ...rest, id_robot: id }; };
+            return Array.isArray(section)
+                ? section.map(rename)
+                : { ...section, actualizados: section.actualizados.map(rename) };
+        };
+        setRobots(prev => merge('id_robot', prev, robotRows(data.robots)));
+        setTanques(prev => merge('id_tanque', prev, data.tanques));
+        setLastUpdate(new Date());
+    }, []);
+
+    // Actualizar con los cambios que envía el servidor (una conexión SSE por cliente)
+    const [streamConnected, setStreamConnected] = useState(false);
     useEffect(() => {
-        const interval = setInterval(() => {
-            console.log('Actualizando datos del dashboard...');
-            fetchDashboardData();
-        }, 30000);
+        return dashboardService.subscribe(applyStreamData, setStreamConnected);
+    }, [applyStreamData]);
 
+    // Mientras el flujo está caído se vuelve a consultar cada 30 segundos
+    useEffect(() => {
+        if (streamConnected) return;
+        const interval = setInterval(fetchDashboardData, 30000);
         return () => clearInterval(interval);
-    }, [fetchDashboardData]);
+    }, [streamConnected, fetchDashboardData]);
 
     // Función para forzar actualización manual
     const handleRefresh = () => {
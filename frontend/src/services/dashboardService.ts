@@ -17,6 +17,18 @@ const dashboardService = {
     return axios.get(`/api/dashboard/activity/?${params.toString()}`);
   },
 
+  // Todas las secciones (o solo las indicadas) en una sola petición
+  getOverview: async (startDate: string, endDate: string, sections?: string[]) => {
+    const params = new URLSearchParams({
+      start_date: startDate,
+      end_date: endDate
+    });
+    if (sections && sections.length) {
+      params.set('sections', sections.join(','));
+    }
+    return axios.get(`/api/dashboard/overview/?${params.toString()}`);
+  },
+
   getRobotStats: async () => {
     return axios.get('/api/dashboard/robots/');
   },
@@ -27,6 +39,64 @@ const dashboardService = {
 
   getWeedStats: async () => {
     return axios.get('/api/dashboard/weeds/');
+  },
+
+  // Abre el flujo de eventos del tablero (SSE). EventSource no permite
+  // encabezados, así que se pide con el JWT un ticket de un solo uso y se
+  // pasa en la URL; el JWT no queda en los registros de acceso. Si la
+  // conexión se corta se cierra y se abre otra con un ticket nuevo, con
+  // espera creciente entre intentos; onConnection avisa los cambios de estado
+  // para que la página pueda consultar por su cuenta mientras tanto.
+  subscribe: (
+    onEvent: (type: 'snapshot' | 'delta', data: any) => void,
+    onConnection?: (connected: boolean) => void
+  ) => {
+    let source: EventSource | null = null;
+    let retry: ReturnType<typeof setTimeout> | null = null;
+    let delay = 1000;
+    let closed = false;
+
+    const reconnect = () => {
+      onConnection?.(false);
+      if (!closed) {
+        retry = setTimeout(connect, delay);
+        delay = Math.min(delay * 2, 60000);
+      }
+    };
+
+    const connect = async () => {
+      let ticket: string;
+      try {
+        const response = await axios.post('/api/dashboard/stream/ticket/');
+        ticket = response.data.ticket;
+      } catch (error) {
+        reconnect();
+        return;
+      }
+      if (closed) return;
+      const params = new URLSearchParams({ ticket });
+      const current = new EventSource(`${axios.defaults.baseURL}/api/dashboard/stream/?${params.toString()}`);
+      current.addEventListener('snapshot', (event) => {
+        delay = 1000;
+        onConnection?.(true);
+        onEvent('snapshot', JSON.parse((event as MessageEvent).data));
+      });
+      current.addEventListener('delta', (event) => onEvent('delta', JSON.parse((event as MessageEvent).data)));
+      // EventSource reintentaría con el mismo ticket, que ya se consumió
+      current.onerror = () => {
+        current.close();
+        source = null;
+        reconnect();
+      };
+      source = current;
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      if (retry) clearTimeout(retry);
+      source?.close();
+    };
   }
 };
 